@@ -0,0 +1,453 @@
+"""
+Замеры производительности горячих участков игры.
+
+Набор измеряет движение змейки разной длины, выбор клетки для еды при
+разной заполненности поля, время кадра GameLogic.draw на нескольких
+разрешениях и размерах клетки и задержку сохранения игры и чтения
+рекордов в SQLite и в памяти. Отрисовка выполняется драйвером SDL
+dummy, без окна.
+
+Каждый замер повторяется несколько раз, в отчет попадает медиана и
+минимум времени одной операции. Результаты сохраняются в JSON и
+сравниваются с сохраненным базовым прогоном по минимуму, наименее
+зависящему от посторонней нагрузки на машину: если замер хуже базового
+больше чем на допуск или базового прогона нет, прогон завершается с
+кодом 1.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+from datetime import datetime
+from time import perf_counter_ns
+
+# Замеры отрисовки не должны зависеть от окна и оконного менеджера
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
+sys.path.append(os.path.dirname(__file__))
+
+import pygame
+
+from game.snake import Snake
+from game.food import Food
+from game.game_logic import GameLogic
+from game.agents import GreedyAgent
+from database.storage import MemoryStorage, SQLiteStorage
+
+DEFAULT_OUTPUT = 'benchmark_results.json'
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+# Допустимое замедление относительно базового прогона
+DEFAULT_TOLERANCE = 0.25
+
+SNAKE_LENGTHS = (3, 100, 1000, 10000, 50000)
+FOOD_FILLS = (0.1, 0.5, 0.9, 0.99)
+# Поле для выбора клетки еды: 128 x 72 клетки
+FOOD_BOARD = (1280, 720, 10)
+DRAW_RESOLUTIONS = ((800, 600), (3840, 2160))
+DRAW_GRID_SIZES = (10, 20, 40)
+RENDER_MODES = ('full', 'incremental')
+STORAGES = ('memory', 'sqlite')
+# Сессий в хранилище до замеров чтения рекордов
+STORAGE_SESSIONS = 5000
+
+SEED = 1
+
+
+def measure(run, number, repeat):
+    """
+    Повторяет замер и считает время одной операции.
+
+    Args:
+        run (callable): run(number) выполняет number операций и возвращает
+            затраченное время в наносекундах
+        number (int): Операций в одном повторе
+        repeat (int): Количество повторов
+
+    Returns:
+        dict: median_ns и min_ns на операцию, number и repeat
+    """
+    # Прогрев: кэши отрисовки, шрифты и страницы БД
+    run(max(1, number // 10))
+    times = [run(number) / number for _ in range(repeat)]
+    return {
+        'median_ns': statistics.median(times),
+        'min_ns': min(times),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def bench_snake_move(length):
+    """
+    Готовит замер Snake.move для змейки заданной длины.
+
+    Змейка вытянута в линию и движется вправо без стен, поэтому
+    столкновений нет и длина не меняется.
+
+    Args:
+        length (int): Длина змейки
+
+    Returns:
+        callable: run(number) для measure()
+    """
+    snake = Snake(10)
+    snake.positions.clear()
+    snake.positions.extend((-i * 10, 0) for i in range(length))
+    snake.occupied = set(snake.positions)
+    snake.length = snake.grow_to = length
+
+    def run(number):
+        move = snake.move
+        start = perf_counter_ns()
+        for _ in range(number):
+            move()
+        return perf_counter_ns() - start
+    return run
+
+
+def bench_food_randomize(fill):
+    """
+    Готовит замер Food.randomize_position при заполненном поле.
+
+    Args:
+        fill (float): Доля занятых змейкой клеток, от 0 до 1
+
+    Returns:
+        callable: run(number) для measure()
+    """
+    width, height, grid_size = FOOD_BOARD
+    rng = random.Random(SEED)
+    cells = [(x, y) for x in range(0, width, grid_size) for y in range(0, height, grid_size)]
+    occupied = rng.sample(cells, int(len(cells) * fill))
+    food = Food(grid_size, rng=rng)
+    food.track(occupied, width, height)
+
+    def run(number):
+        randomize_position = food.randomize_position
+        start = perf_counter_ns()
+        for _ in range(number):
+            randomize_position(None, width, height)
+        return perf_counter_ns() - start
+    return run
+
+
+def bench_draw(width, height, grid_size, render_mode):
+    """
+    Готовит замер кадра GameLogic.draw.
+
+    Игру ведет GreedyAgent, на каждый шаг приходится два кадра
+    (alpha 0.5 и 1.0), как при частоте кадров вдвое выше скорости игры.
+    Время шага игры в замер не входит.
+
+    Args:
+        width (int): Ширина экрана
+        height (int): Высота экрана
+        grid_size (int): Размер клетки
+        render_mode (str): 'full' или 'incremental'
+
+    Returns:
+        callable: run(number) для measure()
+    """
+    settings = dict(width=width, height=height, grid_size=grid_size, speed=10, wall_pass=False,
+                    snake_color='green', food_color='red', render_mode=render_mode)
+    game = GameLogic(settings, None)
+    engine = game.engine
+    engine.reset(SEED)
+    agent = GreedyAgent(random.Random(SEED))
+
+    def run(number):
+        elapsed = 0
+        for frame in range(number):
+            if frame % 2 == 0:
+                if engine.done:
+                    engine.reset(SEED)
+                engine.step(agent.act(engine))
+            start = perf_counter_ns()
+            game.draw(0.5 if frame % 2 == 0 else 1.0)
+            elapsed += perf_counter_ns() - start
+        return elapsed
+    return run
+
+
+def make_storage(kind, directory):
+    """
+    Создает хранилище с STORAGE_SESSIONS сохраненными играми.
+
+    Args:
+        kind (str): 'memory' или 'sqlite'
+        directory (str): Каталог для файла SQLite
+
+    Returns:
+        Storage: Заполненное хранилище
+    """
+    if kind == 'sqlite':
+        storage = SQLiteStorage(os.path.join(directory, 'benchmark.db'))
+    else:
+        storage = MemoryStorage()
+    rng = random.Random(SEED)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        storage.save_game_sessions(session_args(rng, i) for i in range(STORAGE_SESSIONS))
+    return storage
+
+
+def session_args(rng, index):
+    """
+    Возвращает аргументы save_game_session для случайной игры.
+
+    Args:
+        rng (random.Random): Генератор случайных чисел
+        index (int): Номер игры, определяет имя игрока
+
+    Returns:
+        dict: Аргументы save_game_session
+    """
+    food_eaten = rng.randrange(200)
+    return {
+        'player_name': f'Player{index % 500}',
+        'score': food_eaten * 10,
+        'game_duration': rng.randrange(1, 600),
+        'settings': {'speed': 10, 'wall_pass': False, 'grid_size': 20, 'width': 800, 'height': 600},
+        'food_eaten': food_eaten,
+        'max_length': food_eaten + 3,
+        'walls_passed': False,
+        'replay': None,
+    }
+
+
+def bench_save(storage):
+    """
+    Готовит замер save_game_session.
+
+    Args:
+        storage (Storage): Хранилище
+
+    Returns:
+        callable: run(number) для measure()
+    """
+    rng = random.Random(SEED)
+
+    def run(number):
+        sessions = [session_args(rng, i) for i in range(number)]
+        # Сообщения о сохранении не должны засорять вывод замеров
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = perf_counter_ns()
+            for session in sessions:
+                storage.save_game_session(**session)
+            return perf_counter_ns() - start
+    return run
+
+
+def bench_high_scores(storage, cold):
+    """
+    Готовит замер get_high_scores.
+
+    Args:
+        storage (Storage): Хранилище
+        cold (bool): Сбрасывать кэш рекордов перед каждым запросом, чтобы
+            замерить чтение таблицы из хранилища
+
+    Returns:
+        callable: run(number) для measure()
+    """
+    def run(number):
+        get_high_scores = storage.get_high_scores
+        invalidate = storage.invalidate_high_scores
+        start = perf_counter_ns()
+        for _ in range(number):
+            if cold:
+                invalidate()
+            get_high_scores(10)
+        return perf_counter_ns() - start
+    return run
+
+
+def run_benchmarks(repeat=7, selected=None, scale=1.0):
+    """
+    Выполняет замеры.
+
+    Args:
+        repeat (int): Повторов каждого замера
+        selected (str or None): Выполнять только замеры, имя которых содержит строку
+        scale (float): Множитель количества операций в повторе
+
+    Returns:
+        dict: Результат measure() по имени замера
+    """
+    def number(count):
+        return max(1, int(count * scale))
+
+    cases = []
+    for length in SNAKE_LENGTHS:
+        cases.append((f'snake.move[length={length}]', lambda length=length: bench_snake_move(length),
+                      number(20000)))
+    for fill in FOOD_FILLS:
+        cases.append((f'food.randomize_position[fill={fill:.0%}]', lambda fill=fill: bench_food_randomize(fill),
+                      number(20000)))
+    for width, height in DRAW_RESOLUTIONS:
+        for grid_size in DRAW_GRID_SIZES:
+            for render_mode in RENDER_MODES:
+                cases.append((f'game_logic.draw[{width}x{height},grid={grid_size},{render_mode}]',
+                              lambda args=(width, height, grid_size, render_mode): bench_draw(*args),
+                              number(40)))
+
+    results = {}
+    pygame.init()
+    try:
+        for name, setup, count in cases:
+            if selected and selected not in name:
+                continue
+            results[name] = measure(setup(), count, repeat)
+            print_result(name, results[name])
+    finally:
+        pygame.quit()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in STORAGES:
+            storage_cases = [
+                (f'storage.save_game_session[{kind}]', bench_save, number(200)),
+                (f'storage.get_high_scores[{kind}]', lambda storage: bench_high_scores(storage, False), number(2000)),
+                (f'storage.get_high_scores.cold[{kind}]', lambda storage: bench_high_scores(storage, True),
+                 number(20)),
+            ]
+            storage_cases = [case for case in storage_cases if not selected or selected in case[0]]
+            if not storage_cases:
+                continue
+            storage = make_storage(kind, directory)
+            try:
+                for name, setup, count in storage_cases:
+                    results[name] = measure(setup(storage), count, repeat)
+                    print_result(name, results[name])
+            finally:
+                storage.close()
+    return results
+
+
+def print_result(name, result):
+    """
+    Печатает результат замера.
+
+    Args:
+        name (str): Имя замера
+        result (dict): Результат measure()
+    """
+    print(f"⏱️  {name:<52} {format_ns(result['median_ns']):>10}  (min {format_ns(result['min_ns'])})")
+
+
+def format_ns(value):
+    """
+    Форматирует длительность в подходящих единицах.
+
+    Args:
+        value (float): Длительность в наносекундах
+
+    Returns:
+        str: Длительность с единицами ns, us или ms
+    """
+    if value < 1e3:
+        return f'{value:.0f} ns'
+    if value < 1e6:
+        return f'{value / 1e3:.1f} us'
+    return f'{value / 1e6:.2f} ms'
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Сравнивает результаты с базовым прогоном по минимальному времени.
+
+    Args:
+        results (dict): Текущие результаты
+        baseline (dict): Результаты базового прогона
+        tolerance (float): Допустимое относительное замедление
+
+    Returns:
+        list: Кортежи (имя, базовое время, текущее время) для замеров,
+            ставших медленнее допуска
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['min_ns'] > base['min_ns'] * (1 + tolerance):
+            regressions.append((name, base['min_ns'], result['min_ns']))
+    return regressions
+
+
+def parse_args():
+    """
+    Разбирает аргументы командной строки замеров.
+
+    Returns:
+        argparse.Namespace: Аргументы
+    """
+    parser = argparse.ArgumentParser(description='Snake Game benchmarks')
+    parser.add_argument('--output', type=str, default=DEFAULT_OUTPUT,
+                        help='JSON file for the results')
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE,
+                        help='JSON file with baseline results to compare against')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store the results as the new baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown against the baseline, 0.25 = 25%%')
+    parser.add_argument('--repeat', type=int, default=7,
+                        help='Repeats of every benchmark, the fastest one is compared')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiplier for operations per repeat')
+    parser.add_argument('--filter', type=str, default=None,
+                        help='Run only benchmarks whose name contains this text')
+    return parser.parse_args()
+
+
+def main():
+    """
+    Выполняет замеры, сохраняет их и сравнивает с базовым прогоном.
+
+    Returns:
+        int: Код завершения, 1 если найдены регрессии или нет базового прогона
+    """
+    args = parse_args()
+    results = run_benchmarks(args.repeat, args.filter, args.scale)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f"💾 Результаты сохранены: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"💾 Базовый прогон сохранен: {args.baseline}")
+        return 0
+
+    # Без базового прогона регрессию не обнаружить: это ошибка, а не успех
+    if not os.path.exists(args.baseline):
+        print(f"❌ Базовый прогон {args.baseline} не найден, сохраните его с --save-baseline")
+        return 1
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)['results']
+    regressions = compare(results, baseline, args.tolerance)
+    if not regressions:
+        print(f"✅ Регрессий нет (допуск {args.tolerance:.0%})")
+        return 0
+
+    print(f"❌ Регрессии производительности (допуск {args.tolerance:.0%}):")
+    for name, base, current in regressions:
+        print(f"   {name}: {format_ns(base)} -> {format_ns(current)} (x{current / base:.2f})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
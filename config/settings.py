@@ -6,6 +6,10 @@
 
 import argparse
 
+# Хранилище по умолчанию и путь к файлу SQLite
+DEFAULT_STORAGE = 'postgres'
+DEFAULT_DB_PATH = 'snake_game.db'
+
 
 class GameSettings:
     """
@@ -24,9 +28,10 @@ class GameSettings:
         """
         Настраивает аргументы командной строки.
 
-        Добавляет только игровые настройки, без параметров БД.
+        Добавляет игровые настройки и выбор хранилища результатов.
+        Параметры подключения к PostgreSQL задаются в db_handler.py.
         """
-        # ТОЛЬКО игровые настройки, без БД
+        # Игровые настройки и выбор хранилища, без параметров подключения к БД
         self.parser.add_argument('--speed', type=int, default=10,
                                  help='Snake speed (1-20), default: 10')
         self.parser.add_argument('--wall-pass', action='store_true',
@@ -45,6 +50,23 @@ class GameSettings:
                                  help='Window height')
         self.parser.add_argument('--player-name', type=str, default='Player',
                                  help='Player name for high scores')
+        self.parser.add_argument('--fps', type=int, default=0,
+                                 help='Render and input rate, default: desktop refresh rate if pygame reports it, otherwise 60')
+        self.parser.add_argument('--render-mode', type=str, default='full',
+                                 choices=['full', 'incremental'],
+                                 help='Redraw the whole frame or only changed cells (dirty rects)')
+        self.parser.add_argument('--storage', type=str, default=DEFAULT_STORAGE,
+                                 choices=['postgres', 'sqlite', 'memory'],
+                                 help='Where game results are stored')
+        self.parser.add_argument('--db-path', type=str, default=DEFAULT_DB_PATH,
+                                 help='SQLite database file for --storage sqlite')
+        self.parser.add_argument('--leaderboard-ttl', type=float, default=0,
+                                 help='Seconds before cached high scores are reloaded, '
+                                      'default: only after a new game is saved')
+        self.parser.add_argument('--profile', action='store_true',
+                                 help='Time input, update, draw and flip of every frame and show percentiles')
+        self.parser.add_argument('--profile-output', type=str, default='profile.json',
+                                 help='Report written on exit with --profile: .json or .csv')
 
     def get_settings(self):
         """
@@ -60,6 +82,13 @@ class GameSettings:
                 - width (int): Ширина окна
                 - height (int): Высота окна
                 - player_name (str): Имя игрока
+                - fps (int): Частота кадров отрисовки, 0 - частота дисплея или 60
+                - render_mode (str): Режим отрисовки: full или incremental
+                - storage (str): Хранилище результатов: postgres, sqlite или memory
+                - db_path (str): Файл базы SQLite
+                - leaderboard_ttl (float): Время жизни кэша рекордов, 0 - до новой игры
+                - profile (bool): Замерять время участков кадра
+                - profile_output (str): Файл отчета профилирования (.json или .csv)
         """
         return {
             'speed': self.args.speed,
@@ -69,6 +98,13 @@ class GameSettings:
             'grid_size': self.args.grid_size,
             'width': self.args.width,
             'height': self.args.height,
-            'player_name': self.args.player_name
-            # УБРАНЫ все параметры БД из возвращаемого словаря
+            'player_name': self.args.player_name,
+            'fps': self.args.fps,
+            'render_mode': self.args.render_mode,
+            'storage': self.args.storage,
+            'db_path': self.args.db_path,
+            'leaderboard_ttl': self.args.leaderboard_ttl,
+            'profile': self.args.profile,
+            'profile_output': self.args.profile_output
+            # Параметры подключения к БД в словарь не входят
         }
\ No newline at end of file
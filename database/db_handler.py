@@ -5,49 +5,300 @@
 и получение рекордов.
 """
 
-import psycopg2
-from datetime import datetime
+from contextlib import contextmanager
+import base64
 import json
+import os
+import queue
+import threading
+import weakref
 
+from .journal import SessionJournal
+from .leaderboard import split_leaderboard_rows
+from .storage import Storage
 
-class DatabaseHandler:
+# psycopg2 импортируется при первом подключении (_import_driver), чтобы
+# загрузка драйвера не задерживала открытие окна игры
+psycopg2 = None
+
+# Журнал сессий, ожидающих сохранения в PostgreSQL
+JOURNAL_PATH = os.path.join(os.path.expanduser('~'), '.snake_game', 'sessions.journal')
+
+# Ключи записи журнала, без которых сессию нельзя сохранить
+SESSION_KEYS = ('player_name', 'score', 'game_duration', 'settings', 'food_eaten', 'max_length', 'walls_passed')
+
+# Ключ рекомендательной блокировки: миграции не выполняются параллельно
+MIGRATION_LOCK = 0x536E616B
+
+# Версионированные миграции схемы: (версия, описание, SQL, индекс).
+# Миграции с именем индекса строят его CREATE INDEX CONCURRENTLY вне
+# транзакции, чтобы не блокировать запись в таблицу, остальные выполняются
+# в транзакции. Новые миграции добавляются в конец со следующей версией
+MIGRATIONS = (
+    (1, 'индекс таблицы рекордов по убыванию счета', '''
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS game_sessions_score_idx
+        ON game_sessions (score DESC, id) INCLUDE (player_name, game_duration, end_time)
+    ''', 'game_sessions_score_idx'),
+    (2, 'индекс результатов игрока', '''
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS game_sessions_player_idx
+        ON game_sessions (player_name, score DESC, id)
+    ''', 'game_sessions_player_idx'),
+    (3, 'индекс внешнего ключа game_stats.session_id', '''
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS game_stats_session_id_idx
+        ON game_stats (session_id)
+    ''', 'game_stats_session_id_idx'),
+    (4, 'таблица записей игр', '''
+        CREATE TABLE IF NOT EXISTS game_replays (
+            session_id INTEGER PRIMARY KEY REFERENCES game_sessions(id),
+            replay BYTEA NOT NULL
+        )
+    ''', None),
+    (5, 'отметка проверки записей игр', '''
+        ALTER TABLE game_replays ADD COLUMN IF NOT EXISTS verified BOOLEAN
+    ''', None),
+    (6, 'индекс непроверенных записей игр', '''
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS game_replays_unverified_idx
+        ON game_replays (session_id) WHERE verified IS NULL
+    ''', 'game_replays_unverified_idx'),
+)
+
+
+def _import_driver():
+    """
+    Импортирует psycopg2, если он еще не импортирован.
+    """
+    global psycopg2
+    if psycopg2 is None:
+        import psycopg2.extras
+        import psycopg2.pool
+
+
+class DatabaseHandler(Storage):
     """
     Класс для управления подключением и операциями с базой данных.
 
+    Хранилище результатов на PostgreSQL.
+
+    Сессии сохраняются через подключения из пула, поэтому фоновый поток
+    записи и синхронные вызовы не ждут друг друга на одном подключении.
+
+    С background=True подключение и создание таблиц выполняются в фоновом
+    потоке: до его завершения (connecting) сессии записываются в журнал,
+    а таблица рекордов пуста.
+
     Attributes:
-        connection: Подключение к PostgreSQL
+        connection: Подключение к PostgreSQL для чтения рекордов и схемы
+            (autocommit)
+        pool (ThreadedConnectionPool): Пул подключений для записи
         db_config (dict): Конфигурация подключения к БД
+        journal (SessionJournal): Локальный журнал сессий, еще не сохраненных в БД
+        connecting (bool): True пока идет фоновое подключение
     """
 
-    def __init__(self):
+    # Сколько ждать ответа сервера при подключении, секунды
+    CONNECT_TIMEOUT = 5
+
+    # Максимум одновременно открытых подключений пула
+    POOL_SIZE = 4
+
+    # Сессия, запись игры и статистика одним запросом: id из INSERT
+    # передается в CTE. Готовится на сервере один раз на подключение
+    PREPARE_SAVE_SESSION = '''
+        PREPARE save_game_session (varchar, integer, integer, jsonb, integer, integer, boolean, bytea) AS
+        WITH session AS (
+            INSERT INTO game_sessions (player_name, start_time, end_time, score, game_duration, settings)
+            VALUES ($1, now(), now(), $2, $3, $4)
+            RETURNING id
+        ), replay AS (
+            INSERT INTO game_replays (session_id, replay)
+            SELECT id, $8 FROM session WHERE $8 IS NOT NULL
+        )
+        INSERT INTO game_stats (session_id, food_eaten, max_length, walls_passed, final_score)
+        SELECT id, $5, $6, $7, $2 FROM session
+        RETURNING session_id
+    '''
+
+    # Максимум сессий в одной пачке фоновой записи
+    WRITE_BATCH_SIZE = 100
+    # Пауза перед повторной попыткой записи журнала в БД, секунды
+    RETRY_MIN_DELAY = 1.0
+    RETRY_MAX_DELAY = 60.0
+
+    def __init__(self, journal_path=JOURNAL_PATH, background=False):
         """
         Инициализирует подключение к БД и создает таблицы.
+
+        Если в журнале остались сессии с прошлого запуска, фоновый поток
+        сразу начинает переносить их в БД.
+
+        Args:
+            journal_path (str): Путь к файлу журнала несохраненных сессий
+            background (bool): Подключаться в фоновом потоке, не дожидаясь БД
         """
         self.connection = None
+        self.connecting = background
+        self._opener = None
+        self.pool = None
+        # Подключения, на которых уже подготовлен запрос сохранения
+        self._prepared = weakref.WeakSet()
+        # Основное подключение занимает одно место в пуле навсегда
+        self._pool_slots = threading.BoundedSemaphore(self.POOL_SIZE - 1)
+        # Пул заменяется (переподключение, закрытие) только когда им никто
+        # не пользуется: фоновый поток записи переподключается, пока меню
+        # читает рекорды через основное подключение
+        self._pool_guard = threading.Condition()
+        self._pool_users = 0
+        self._pool_swapping = False
+        self.journal = SessionJournal(journal_path)
+        self._write_queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
         self.db_config = {
             'host': 'localhost',
             'port': '5432',
             'dbname': 'snake_game',
             'user': 'postgres',
-            'password': 'admin'  # ваш пароль
+            'password': 'admin',  # ваш пароль
+            'connect_timeout': self.CONNECT_TIMEOUT
         }
-        self.connect()
-        if self.connection:
-            self.create_tables()
+        if background:
+            self._opener = threading.Thread(target=self._open, name='db-connect', daemon=True)
+            self._opener.start()
+        else:
+            self._open()
+
+    def _open(self):
+        """
+        Подключается к БД, создает таблицы и запускает перенос журнала.
+        """
+        try:
+            _import_driver()
+            self.connect()
+            if self.connection:
+                self.create_tables()
+        finally:
+            self.connecting = False
+        if self.journal.pending():
+            self._start_writer()
+
+    def _wait_opened(self):
+        """
+        Ждет завершения фонового подключения.
+        """
+        opener = self._opener
+        if opener is not None and opener is not threading.current_thread():
+            opener.join()
 
     def connect(self):
         """
-        Устанавливает подключение к PostgreSQL.
+        Создает пул подключений к PostgreSQL и берет из него основное подключение.
+
+        Предыдущий пул закрывается, когда завершатся все запросы, которые
+        им пользуются.
 
         Prints:
             Сообщение об успешном подключении или ошибке.
         """
+        with self._swapping_pool():
+            self._close_pool()
+            try:
+                # Основное подключение и одно подключение для записи держатся
+                # открытыми, остальные закрываются после использования
+                self.pool = psycopg2.pool.ThreadedConnectionPool(2, self.POOL_SIZE, **self.db_config)
+                self.connection = self.pool.getconn()
+                # Основное подключение только читает: без autocommit оно
+                # оставалось бы в открытой транзакции между запросами, а
+                # после ошибки запроса - в прерванной до перезапуска
+                self.connection.autocommit = True
+                print("✅ Автоподключение к PostgreSQL успешно!")
+            except Exception as e:
+                print(f"❌ Ошибка подключения к PostgreSQL: {e}")
+                self._close_pool()
+
+    @contextmanager
+    def _using_pool(self):
+        """
+        Не дает заменить или закрыть пул, пока выполняется блок.
+        """
+        with self._pool_guard:
+            while self._pool_swapping:
+                self._pool_guard.wait()
+            self._pool_users += 1
         try:
-            self.connection = psycopg2.connect(**self.db_config)
-            print("✅ Автоподключение к PostgreSQL успешно!")
-        except Exception as e:
-            print(f"❌ Ошибка подключения к PostgreSQL: {e}")
-            self.connection = None
+            yield
+        finally:
+            with self._pool_guard:
+                self._pool_users -= 1
+                self._pool_guard.notify_all()
+
+    @contextmanager
+    def _swapping_pool(self):
+        """
+        Ждет, пока пулом перестанут пользоваться, и не дает начать новые
+        запросы до конца блока. Внутри _using_pool() вызывать нельзя.
+        """
+        with self._pool_guard:
+            while self._pool_swapping or self._pool_users:
+                self._pool_guard.wait()
+            self._pool_swapping = True
+        try:
+            yield
+        finally:
+            with self._pool_guard:
+                self._pool_swapping = False
+                self._pool_guard.notify_all()
+
+    @contextmanager
+    def _main_connection(self):
+        """
+        Дает основное подключение на время блока.
+
+        Подключение работает в режиме autocommit, поэтому каждый запрос
+        выполняется в своей транзакции.
+
+        Yields:
+            Подключение к PostgreSQL или None, если его нет
+        """
+        with self._using_pool():
+            yield self.connection
+
+    def _close_pool(self):
+        """
+        Закрывает все подключения пула. Вызывается внутри _swapping_pool().
+        """
+        if self.pool is not None:
+            try:
+                self.pool.closeall()
+            except Exception:
+                pass
+        self.pool = None
+        self.connection = None
+        self._prepared.clear()
+
+    @contextmanager
+    def _pooled_connection(self):
+        """
+        Берет подключение из пула на время блока.
+
+        Если все подключения заняты, ждет освобождения. Сломанное
+        подключение закрывается, а не возвращается в пул.
+
+        Yields:
+            Подключение к PostgreSQL
+
+        Raises:
+            RuntimeError: Если пул закрыт
+        """
+        with self._using_pool():
+            pool = self.pool
+            if pool is None:
+                raise RuntimeError("Нет подключения к БД")
+            with self._pool_slots:
+                connection = pool.getconn()
+                try:
+                    yield connection
+                finally:
+                    pool.putconn(connection, close=connection.closed != 0)
 
     def create_tables(self):
         """
@@ -94,8 +345,105 @@ class DatabaseHandler:
 
         except Exception as e:
             print(f"❌ Ошибка создания таблиц: {e}")
+            return
 
-    def save_game_session(self, player_name, score, game_duration, settings, food_eaten, max_length, walls_passed):
+        self.migrate()
+
+    def migrate(self):
+        """
+        Применяет к схеме миграции MIGRATIONS, которые еще не применены.
+
+        Примененные версии хранятся в таблице schema_migrations. Миграции
+        выполняются под рекомендательной блокировкой сессии: если ее держит
+        другой клиент, этот вызов ничего не применяет и не ждет. Индексы
+        строятся CREATE INDEX CONCURRENTLY в режиме autocommit, поэтому
+        сохранение игр во время построения не блокируется; версия такой
+        миграции записывается после построения. Остальные миграции
+        выполняются каждая в своей транзакции вместе с записью версии.
+
+        Returns:
+            list: Версии, примененные этим вызовом
+        """
+        if not self.connection:
+            return []
+
+        connection = self.connection
+        autocommit = connection.autocommit
+        new_versions = []
+        locked = False
+        try:
+            connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TIMESTAMP NOT NULL DEFAULT now()
+                )
+            ''')
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', (MIGRATION_LOCK,))
+            locked = cursor.fetchone()[0]
+            if not locked:
+                print("✅ Миграции схемы выполняет другой клиент")
+                return []
+            cursor.execute('SELECT version FROM schema_migrations')
+            applied = {row[0] for row in cursor.fetchall()}
+
+            for version, description, sql, index in MIGRATIONS:
+                if version in applied:
+                    continue
+                if index is not None:
+                    self._build_index(cursor, index, sql)
+                    cursor.execute('INSERT INTO schema_migrations (version, description) VALUES (%s, %s)',
+                                   (version, description))
+                else:
+                    connection.autocommit = False
+                    cursor.execute(sql)
+                    cursor.execute('INSERT INTO schema_migrations (version, description) VALUES (%s, %s)',
+                                   (version, description))
+                    connection.commit()
+                    connection.autocommit = True
+                new_versions.append(version)
+                print(f"✅ Миграция {version}: {description}")
+
+            cursor.close()
+            return new_versions
+
+        except Exception as e:
+            self._rollback()
+            print(f"❌ Ошибка миграции схемы: {e}")
+            return new_versions
+
+        finally:
+            if not connection.closed:
+                if locked:
+                    connection.autocommit = True
+                    connection.cursor().execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK,))
+                connection.autocommit = autocommit
+
+    @staticmethod
+    def _build_index(cursor, index, sql):
+        """
+        Строит индекс миграции без блокировки записи в таблицу.
+
+        Неудавшийся CREATE INDEX CONCURRENTLY оставляет недействительный
+        индекс, который IF NOT EXISTS посчитал бы построенным, поэтому
+        такой индекс сначала удаляется. Подключение должно быть в режиме
+        autocommit.
+
+        Args:
+            cursor: Курсор основного подключения
+            index (str): Имя индекса
+            sql (str): CREATE INDEX CONCURRENTLY IF NOT EXISTS
+        """
+        cursor.execute('SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)', (index,))
+        row = cursor.fetchone()
+        if row is not None and not row[0]:
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {index}')
+        cursor.execute(sql)
+
+    def save_game_session(self, player_name, score, game_duration, settings, food_eaten, max_length, walls_passed,
+                          replay=None):
         """
         Сохраняет игровую сессию и статистику в БД.
 
@@ -107,76 +455,496 @@ class DatabaseHandler:
             food_eaten (int): Количество съеденной еды
             max_length (int): Максимальная длина змейки
             walls_passed (bool): Флаг прохождения сквозь стены
+            replay (bytes or None): Запись игры (Replay.to_bytes())
 
         Returns:
             int or None: ID сохраненной сессии или None при ошибке
         """
+        if self.connecting:
+            self.queue_game_session(player_name, score, game_duration, settings,
+                                    food_eaten, max_length, walls_passed, replay)
+            return None
+
         if not self.connection:
-            print("❌ Нет подключения к БД")
+            print("❌ Нет подключения к БД, игра записана в журнал")
+            self.queue_game_session(player_name, score, game_duration, settings,
+                                    food_eaten, max_length, walls_passed, replay)
             return None
 
         try:
-            cursor = self.connection.cursor()
+            with self._pooled_connection() as connection:
+                try:
+                    cursor = connection.cursor()
+                    if connection not in self._prepared:
+                        cursor.execute(self.PREPARE_SAVE_SESSION)
+                        self._prepared.add(connection)
 
-            # Сохраняем игровую сессию
-            cursor.execute('''
-                INSERT INTO game_sessions (player_name, start_time, end_time, score, game_duration, settings)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING id
-            ''', (player_name, datetime.now(), datetime.now(), score, game_duration, json.dumps(settings)))
+                    # Сессия и статистика сохраняются одним запросом
+                    cursor.execute('EXECUTE save_game_session (%s, %s, %s, %s, %s, %s, %s, %s)',
+                                   (player_name, score, game_duration, json.dumps(settings),
+                                    food_eaten, max_length, walls_passed, replay))
+                    session_id = cursor.fetchone()[0]
 
-            session_id = cursor.fetchone()[0]
+                    connection.commit()
+                    cursor.close()
+                except Exception:
+                    self._rollback(connection)
+                    raise
 
-            # Сохраняем статистику
-            cursor.execute('''
-                INSERT INTO game_stats (session_id, food_eaten, max_length, walls_passed, final_score)
-                VALUES (%s, %s, %s, %s, %s)
-            ''', (session_id, food_eaten, max_length, walls_passed, score))
-
-            self.connection.commit()
-            cursor.close()
+            self._record_sessions([(player_name, score, game_duration)])
             print(f"✅ Игра сохранена в PostgreSQL. Игрок: {player_name}, Счет: {score}")
             return session_id
 
         except Exception as e:
-            print(f"❌ Ошибка сохранения игры: {e}")
+            print(f"❌ Ошибка сохранения игры: {e}, игра записана в журнал")
+            self.queue_game_session(player_name, score, game_duration, settings,
+                                    food_eaten, max_length, walls_passed, replay)
             return None
 
-    def get_high_scores(self, limit=10):
+    def save_game_sessions(self, sessions, page_size=1000):
         """
-        Получает таблицу рекордов из БД.
+        Сохраняет много игровых сессий одной транзакцией.
+
+        Каждая страница записей отправляется одним запросом: идентификаторы
+        сессий выделяются из последовательности в CTE, и строки game_sessions,
+        game_stats и game_replays вставляются вместе.
 
         Args:
-            limit (int): Количество возвращаемых записей (по умолчанию 10)
+            sessions (iterable): Словари с ключами как у аргументов
+                save_game_session (player_name, score, game_duration, settings,
+                food_eaten, max_length, walls_passed и необязательный replay)
+            page_size (int): Количество записей в одном запросе
 
         Returns:
-            list: Список кортежей с данными рекордов:
-                (player_name, score, game_duration, end_time)
+            int: Количество сохраненных сессий (0 при ошибке)
         """
         if not self.connection:
+            print("❌ Нет подключения к БД")
+            return 0
+
+        rows = [
+            (s['player_name'], s['score'], s['game_duration'], json.dumps(s['settings']),
+             s['food_eaten'], s['max_length'], s['walls_passed'], s.get('replay'))
+            for s in sessions
+        ]
+        if not rows:
+            return 0
+
+        try:
+            with self._pooled_connection() as connection:
+                try:
+                    cursor = connection.cursor()
+                    psycopg2.extras.execute_values(cursor, '''
+                        WITH data AS (
+                            SELECT nextval(pg_get_serial_sequence('game_sessions', 'id')) AS id, v.*
+                            FROM (VALUES %s) AS v (player_name, score, game_duration, settings,
+                                                   food_eaten, max_length, walls_passed, replay)
+                        ), sessions AS (
+                            INSERT INTO game_sessions (id, player_name, start_time, end_time, score, game_duration, settings)
+                            SELECT id, player_name, now(), now(), score, game_duration, settings FROM data
+                        ), replays AS (
+                            INSERT INTO game_replays (session_id, replay)
+                            SELECT id, replay FROM data WHERE replay IS NOT NULL
+                        )
+                        INSERT INTO game_stats (session_id, food_eaten, max_length, walls_passed, final_score)
+                        SELECT id, food_eaten, max_length, walls_passed, score FROM data
+                    ''', rows, template='(%s, %s, %s, %s::jsonb, %s, %s, %s, %s::bytea)', page_size=page_size)
+
+                    connection.commit()
+                    cursor.close()
+                except Exception:
+                    self._rollback(connection)
+                    raise
+
+            self._record_sessions((row[0], row[1], row[2]) for row in rows)
+            print(f"✅ Сохранено игр в PostgreSQL: {len(rows)}")
+            return len(rows)
+
+        except Exception as e:
+            print(f"❌ Ошибка пакетного сохранения игр: {e}")
+            return 0
+
+    def _rollback(self, connection=None):
+        """
+        Откатывает текущую транзакцию, если подключение еще открыто.
+
+        Args:
+            connection: Подключение, по умолчанию основное
+        """
+        connection = connection or self.connection
+        if connection and not connection.closed:
+            connection.rollback()
+
+    def queue_game_session(self, player_name, score, game_duration, settings, food_eaten, max_length, walls_passed,
+                           replay=None):
+        """
+        Ставит игровую сессию в очередь фоновой записи и сразу возвращается.
+
+        Фоновый поток дописывает накопившиеся в очереди сессии (не больше
+        WRITE_BATCH_SIZE) в локальный журнал и переносит весь журнал в БД
+        одним запросом save_game_sessions. Если БД недоступна, сессии
+        остаются в журнале, а поток переподключается с экспоненциально
+        растущей паузой. Очередь дописывается при close().
+
+        Args:
+            player_name (str): Имя игрока
+            score (int): Финальный счет
+            game_duration (int): Длительность игры в секундах
+            settings (dict): Настройки игры
+            food_eaten (int): Количество съеденной еды
+            max_length (int): Максимальная длина змейки
+            walls_passed (bool): Флаг прохождения сквозь стены
+            replay (bytes or None): Запись игры (Replay.to_bytes())
+        """
+        self._write_queue.put({
+            'player_name': player_name,
+            'score': score,
+            'game_duration': game_duration,
+            'settings': settings,
+            'food_eaten': food_eaten,
+            'max_length': max_length,
+            'walls_passed': walls_passed,
+            # Журнал хранит JSON, поэтому запись игры кодируется в base64
+            'replay': base64.b64encode(replay).decode('ascii') if replay is not None else None,
+        })
+        self._start_writer()
+
+    def _start_writer(self):
+        """
+        Запускает фоновый поток записи, если он еще не запущен.
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_behind, name='db-writer', daemon=True)
+                self._writer.start()
+
+    def _write_behind(self):
+        """
+        Цикл фонового потока записи.
+
+        Забирает поставленные в очередь сессии, дописывает их в журнал и
+        переносит журнал в БД. Пока журнал не перенесен, новые попытки
+        делаются с паузой от RETRY_MIN_DELAY до RETRY_MAX_DELAY. None в
+        очереди завершает поток после последней попытки.
+        """
+        # Переносить журнал можно только после фонового подключения
+        self._wait_opened()
+        # None - журнал пуст, ждем новые сессии без ограничения
+        delay = 0 if self.journal.pending() else None
+        stop = False
+        while not stop:
+            batch = []
+            try:
+                session = self._write_queue.get(timeout=delay)
+                while session is not None:
+                    batch.append(session)
+                    if len(batch) == self.WRITE_BATCH_SIZE:
+                        break
+                    session = self._write_queue.get_nowait()
+                stop = session is None
+            except queue.Empty:
+                pass
+
+            try:
+                self.journal.append(batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._write_queue.task_done()
+
+            if self._replay():
+                delay = None
+            elif delay is None or delay == 0:
+                delay = self.RETRY_MIN_DELAY
+            else:
+                delay = min(delay * 2, self.RETRY_MAX_DELAY)
+
+    def _replay(self):
+        """
+        Переносит все сессии из журнала в БД и очищает журнал.
+
+        Журнал заблокирован от чтения до очистки: другие процессы с тем же
+        журналом ждут, чтобы их записи не были стерты непрочитанными.
+        Записи могут быть сохранены повторно, если процесс упадет между
+        фиксацией транзакции и очисткой журнала. Записи, которые нельзя
+        разобрать, переносятся в SessionJournal.quarantine() и не мешают
+        сохранению остальных.
+
+        Returns:
+            bool: True если журнал пуст после вызова
+        """
+        try:
+            with self.journal.lock():
+                records = self.journal.read()
+                if not records:
+                    return True
+
+                if not self.connection or self.connection.closed:
+                    self.connect()
+                    if not self.connection:
+                        return False
+                    self.create_tables()
+
+                records = [record for record in map(self._decode_record, records) if record is not None]
+                if records and self.save_game_sessions(records) != len(records):
+                    return False
+                self.journal.clear()
+                return True
+        except Exception as e:
+            print(f"❌ Ошибка записи журнала игр: {e}")
+            return False
+
+    def _decode_record(self, record):
+        """
+        Проверяет запись журнала и декодирует запись игры из base64.
+
+        Args:
+            record: Запись, прочитанная из журнала
+
+        Returns:
+            dict or None: Аргументы save_game_session или None, если запись
+                испорчена и перенесена в карантин
+        """
+        try:
+            if not isinstance(record, dict) or any(key not in record for key in SESSION_KEYS):
+                raise ValueError("нет полей сессии")
+            if record.get('replay') is not None:
+                record['replay'] = base64.b64decode(record['replay'], validate=True)
+            return record
+        except (ValueError, TypeError) as e:
+            print(f"❌ Испорченная запись журнала игр: {e}, запись перенесена в {self.journal.path}.bad")
+            self.journal.quarantine(json.dumps(record, separators=(',', ':')).encode('utf-8'))
+            return None
+
+    def flush(self):
+        """
+        Ждет, пока фоновый поток запишет все сессии из очереди в журнал.
+        """
+        if self._writer is not None:
+            self._write_queue.join()
+
+    def _load_leaderboard(self, limit):
+        """
+        Получает из БД лучшие сессии и лучший результат каждого игрока одним запросом.
+
+        Args:
+            limit (int): Сколько лучших сессий прочитать
+
+        Returns:
+            tuple or None: (top, bests) где top - список кортежей
+                (player_name, score, game_duration, end_time) по убыванию
+                счета, bests - лучший счет по имени игрока; None, если БД недоступна
+        """
+        if self.connecting or not self.connection:
+            return None
+
+        try:
+            with self._main_connection() as connection:
+                if connection is None:
+                    return None
+                cursor = connection.cursor()
+                # Лучший счет каждого игрока читается рекурсивно, по одной
+                # строке индекса game_sessions_player_idx на игрока, а не
+                # агрегированием всей таблицы
+                cursor.execute('''
+                    WITH RECURSIVE bests (player_name, score) AS (
+                        (SELECT player_name, score
+                         FROM game_sessions
+                         WHERE score IS NOT NULL
+                         ORDER BY player_name, score DESC
+                         LIMIT 1)
+                        UNION ALL
+                        SELECT next.player_name, next.score
+                        FROM bests, LATERAL (
+                            SELECT player_name, score
+                            FROM game_sessions
+                            WHERE player_name > bests.player_name AND score IS NOT NULL
+                            ORDER BY player_name, score DESC
+                            LIMIT 1
+                        ) AS next
+                    )
+                    (SELECT id, player_name, score, game_duration, end_time, TRUE
+                     FROM game_sessions
+                     ORDER BY score DESC, id
+                     LIMIT %s)
+                    UNION ALL
+                    SELECT NULL, player_name, score, NULL, NULL, FALSE
+                    FROM bests
+                ''', (limit,))
+
+                results = cursor.fetchall()
+                cursor.close()
+                return split_leaderboard_rows(results)
+
+        except Exception as e:
+            print(f"❌ Ошибка получения рекордов: {e}")
+            return None
+
+    def get_high_scores_page(self, after_score=None, after_id=None, limit=10):
+        """
+        Получает страницу таблицы рекордов по ключу последней строки.
+
+        Страницы упорядочены по убыванию счета, при равном счете - по id.
+        Следующая страница начинается после (score, id) последней строки
+        предыдущей, поэтому запрос читает только limit строк индекса
+        game_sessions_score_idx независимо от номера страницы, без OFFSET.
+
+        Args:
+            after_score (int or None): Счет последней строки предыдущей
+                страницы, None - первая страница
+            after_id (int or None): ID последней строки предыдущей страницы
+            limit (int): Количество строк на странице
+
+        Returns:
+            list: Список кортежей (id, player_name, score, game_duration, end_time)
+        """
+        if self.connecting or not self.connection:
             return []
 
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                SELECT player_name, score, game_duration, end_time
-                FROM game_sessions
-                ORDER BY score DESC
-                LIMIT %s
-            ''', (limit,))
+            with self._main_connection() as connection:
+                if connection is None:
+                    return []
+                cursor = connection.cursor()
+                if after_score is None:
+                    cursor.execute('''
+                        SELECT id, player_name, score, game_duration, end_time
+                        FROM game_sessions
+                        ORDER BY score DESC, id
+                        LIMIT %(limit)s
+                    ''', {'limit': limit})
+                else:
+                    # score <= after_score ограничивает просмотр индекса сверху,
+                    # второе условие отбрасывает уже показанные строки с тем же счетом
+                    cursor.execute('''
+                        SELECT id, player_name, score, game_duration, end_time
+                        FROM game_sessions
+                        WHERE score <= %(score)s AND (score < %(score)s OR id > %(id)s)
+                        ORDER BY score DESC, id
+                        LIMIT %(limit)s
+                    ''', {'score': after_score, 'id': after_id, 'limit': limit})
 
-            results = cursor.fetchall()
-            cursor.close()
-            return results
+                results = cursor.fetchall()
+                cursor.close()
+                return results
 
         except Exception as e:
             print(f"❌ Ошибка получения рекордов: {e}")
             return []
 
+    def get_replay(self, session_id):
+        """
+        Получает запись игры, сохраненную вместе с сессией.
+
+        Args:
+            session_id (int): ID сессии
+
+        Returns:
+            bytes or None: Запись игры или None, если ее нет или при ошибке
+        """
+        if self.connecting or not self.connection:
+            return None
+
+        try:
+            with self._main_connection() as connection:
+                if connection is None:
+                    return None
+                cursor = connection.cursor()
+                cursor.execute('SELECT replay FROM game_replays WHERE session_id = %s', (session_id,))
+                row = cursor.fetchone()
+                cursor.close()
+                return bytes(row[0]) if row is not None else None
+
+        except Exception as e:
+            print(f"❌ Ошибка получения записи игры: {e}")
+            return None
+
+    def get_unverified_replays(self, after_id=0, limit=100):
+        """
+        Получает непроверенные записи игр вместе с заявленными результатами.
+
+        Запрос читает только limit строк частичного индекса
+        game_replays_unverified_idx.
+
+        Args:
+            after_id (int): ID сессии, после которой начинать
+            limit (int): Количество записей
+
+        Returns:
+            list: Кортежи (session_id, score, food_eaten, max_length, settings, replay)
+        """
+        if self.connecting or not self.connection:
+            return []
+
+        try:
+            with self._main_connection() as connection:
+                if connection is None:
+                    return []
+                cursor = connection.cursor()
+                cursor.execute('''
+                    SELECT r.session_id, s.score, t.food_eaten, t.max_length, s.settings, r.replay
+                    FROM game_replays r
+                    JOIN game_sessions s ON s.id = r.session_id
+                    JOIN game_stats t ON t.session_id = r.session_id
+                    WHERE r.verified IS NULL AND r.session_id > %(after)s
+                    ORDER BY r.session_id
+                    LIMIT %(limit)s
+                ''', {'after': after_id, 'limit': limit})
+                results = [row[:5] + (bytes(row[5]),) for row in cursor.fetchall()]
+                cursor.close()
+                return results
+
+        except Exception as e:
+            print(f"❌ Ошибка получения записей игр: {e}")
+            return []
+
+    def mark_replays_verified(self, results):
+        """
+        Сохраняет результаты проверки записей игр одним запросом.
+
+        Args:
+            results (iterable): Пары (session_id, verified)
+
+        Returns:
+            int: Количество отмеченных записей (0 при ошибке)
+        """
+        rows = list(results)
+        if self.connecting or not self.connection or not rows:
+            return 0
+
+        try:
+            with self._pooled_connection() as connection:
+                try:
+                    cursor = connection.cursor()
+                    psycopg2.extras.execute_values(cursor, '''
+                        UPDATE game_replays AS r SET verified = v.verified
+                        FROM (VALUES %s) AS v (session_id, verified)
+                        WHERE r.session_id = v.session_id
+                    ''', rows, page_size=len(rows))
+                    connection.commit()
+                    cursor.close()
+                except Exception:
+                    self._rollback(connection)
+                    raise
+            return len(rows)
+
+        except Exception as e:
+            print(f"❌ Ошибка отметки проверенных игр: {e}")
+            return 0
+
     def close(self):
         """
-        Закрывает подключение к БД.
+        Дописывает очередь фоновой записи и закрывает подключение к БД.
+
+        Делается одна последняя попытка перенести журнал в БД; если она не
+        удалась, сессии остаются в журнале до следующего запуска.
         """
+        self._wait_opened()
+        if self._writer is not None:
+            self._write_queue.put(None)
+            self._writer.join()
+            self._writer = None
+
         if self.connection:
-            self.connection.close()
+            with self._swapping_pool():
+                self._close_pool()
             print("✅ Подключение к PostgreSQL закрыто")
\ No newline at end of file
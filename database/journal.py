@@ -0,0 +1,181 @@
+"""
+Модуль локального журнала несохраненных игровых сессий.
+
+Журнал - файл только для дописывания, в котором каждая запись хранится
+как 4 байта длины (big-endian) и JSON записи в UTF-8. Пачка записей
+дописывается одним вызовом и сбрасывается на диск одним fsync, поэтому
+результаты игр переживают падение процесса и недоступность PostgreSQL
+до тех пор, пока не будут перенесены в БД.
+
+Один журнал могут использовать несколько процессов (игра, tournament.py,
+verify_replays.py), поэтому дописывание и перенос в БД выполняются под
+блокировкой файла path + '.lock'.
+
+Записи, которые не удалось разобрать, переносятся в файл path + '.bad' в
+том же формате, чтобы не задерживать перенос остальных записей.
+"""
+
+import json
+import os
+import struct
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: вместо flock блокируется первый байт файла блокировки
+    fcntl = None
+    import msvcrt
+
+_LENGTH = struct.Struct('>I')
+
+
+class SessionJournal:
+    """
+    Класс журнала записей, ожидающих сохранения в БД.
+
+    Attributes:
+        path (str): Путь к файлу журнала
+    """
+
+    def __init__(self, path):
+        """
+        Инициализирует журнал. Файл создается при первой записи.
+
+        Args:
+            path (str): Путь к файлу журнала
+        """
+        self.path = path
+
+    def pending(self):
+        """
+        Проверяет, есть ли в журнале записи.
+
+        Returns:
+            bool: True если файл журнала не пуст
+        """
+        try:
+            return os.path.getsize(self.path) > 0
+        except OSError:
+            return False
+
+    def append(self, records):
+        """
+        Дописывает записи в конец журнала и сбрасывает их на диск.
+
+        Args:
+            records (list): Словари, сериализуемые в JSON
+        """
+        if not records:
+            return
+
+        chunks = []
+        for record in records:
+            data = json.dumps(record, separators=(',', ':')).encode('utf-8')
+            chunks.append(_LENGTH.pack(len(data)))
+            chunks.append(data)
+
+        with self.lock():
+            with open(self.path, 'ab') as journal:
+                journal.write(b''.join(chunks))
+                journal.flush()
+                os.fsync(journal.fileno())
+
+    @contextmanager
+    def lock(self):
+        """
+        Захватывает журнал для монопольного доступа на время блока.
+
+        Перенос журнала в БД держит блокировку от read() до clear(), а
+        append() других процессов ждет ее освобождения, поэтому записи,
+        добавленные во время переноса, не удаляются. Блокировка не
+        реентерабельна и снимается ОС, если процесс завершится.
+
+        Yields:
+            None
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path + '.lock', 'a+b') as lock_file:
+            descriptor = lock_file.fileno()
+            if fcntl is not None:
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(descriptor, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK ждет 10 секунд, затем ошибка: ждем дальше
+                        pass
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(descriptor, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(descriptor, msvcrt.LK_UNLCK, 1)
+
+    def read(self):
+        """
+        Читает все записи журнала.
+
+        Недописанная последняя запись (процесс упал во время записи)
+        отбрасывается, и файл обрезается до последней целой записи. Целые
+        записи с испорченным JSON пропускаются и переносятся в quarantine().
+
+        Returns:
+            list: Записи в порядке добавления
+        """
+        try:
+            with open(self.path, 'rb') as journal:
+                data = journal.read()
+        except FileNotFoundError:
+            return []
+
+        records = []
+        offset = 0
+        while offset + _LENGTH.size <= len(data):
+            size, = _LENGTH.unpack_from(data, offset)
+            end = offset + _LENGTH.size + size
+            if end > len(data):
+                break
+            try:
+                records.append(json.loads(data[offset + _LENGTH.size:end].decode('utf-8')))
+            except ValueError as e:
+                print(f"❌ Испорченная запись журнала игр: {e}, запись перенесена в {self.path}.bad")
+                self.quarantine(data[offset + _LENGTH.size:end])
+            offset = end
+
+        if offset < len(data):
+            with open(self.path, 'r+b') as journal:
+                journal.truncate(offset)
+                os.fsync(journal.fileno())
+        return records
+
+    def quarantine(self, data):
+        """
+        Дописывает запись, которую нельзя сохранить, в файл path + '.bad'.
+
+        Args:
+            data (bytes): Содержимое записи
+        """
+        with open(self.path + '.bad', 'ab') as bad:
+            bad.write(_LENGTH.pack(len(data)))
+            bad.write(data)
+            bad.flush()
+            os.fsync(bad.fileno())
+
+    def clear(self):
+        """
+        Удаляет все записи из журнала.
+        """
+        try:
+            with open(self.path, 'r+b') as journal:
+                journal.truncate(0)
+                os.fsync(journal.fileno())
+        except FileNotFoundError:
+            pass
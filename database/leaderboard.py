@@ -0,0 +1,165 @@
+"""
+Модуль таблицы рекордов в памяти.
+
+Хранит лучшие сессии (ограниченная куча) и лучший счет каждого игрока,
+загруженные из хранилища один раз и дополняемые каждой сохраненной игрой.
+Отвечает на запросы "лучшие N", "место игрока" и "лучший счет игрока"
+без обращения к БД.
+"""
+
+import bisect
+import heapq
+import threading
+
+
+def split_leaderboard_rows(rows):
+    """
+    Разбирает строки запроса таблицы рекордов.
+
+    Запрос возвращает строки (id, player_name, score, game_duration,
+    end_time, in_top) в любом порядке: лучшие сессии с in_top и лучший
+    счет каждого игрока без in_top (остальные поля не нужны).
+
+    Args:
+        rows (iterable): Строки запроса
+
+    Returns:
+        tuple: (top, bests) для Leaderboard.seed
+    """
+    top = []
+    bests = {}
+    for session_id, player_name, score, game_duration, end_time, in_top in rows:
+        if in_top:
+            top.append((-score, session_id, (player_name, score, game_duration, end_time)))
+        else:
+            bests[player_name] = score
+    top.sort()
+    return [row for _, _, row in top], bests
+
+
+class Leaderboard:
+    """
+    Класс таблицы рекордов.
+
+    Лучшие сессии хранятся в min-куче размера capacity: новая сессия
+    вытесняет худшую, если она лучше. При равном счете выше стоит более
+    ранняя сессия. Лучшие результаты игроков хранятся в словаре и в
+    отсортированном списке для вычисления места.
+
+    Attributes:
+        capacity (int): Сколько лучших сессий хранится
+    """
+
+    def __init__(self, capacity=100):
+        """
+        Создает пустую таблицу.
+
+        Args:
+            capacity (int): Сколько лучших сессий хранится
+        """
+        self.capacity = capacity
+        self._heap = []
+        self._count = 0
+        self._top = None
+        self._bests = {}
+        self._sorted_bests = []
+        # Таблицу дополняет фоновый поток записи, а читает меню
+        self._lock = threading.Lock()
+
+    def seed(self, top, bests):
+        """
+        Заполняет таблицу данными из хранилища.
+
+        Args:
+            top (list): Лучшие сессии (player_name, score, game_duration,
+                end_time) по убыванию счета
+            bests (dict): Лучший счет по имени игрока
+        """
+        with self._lock:
+            self._heap = []
+            self._count = 0
+            self._top = None
+            for row in top:
+                self._push(row)
+            self._bests = dict(bests)
+            self._sorted_bests = sorted(self._bests.values())
+
+    def _push(self, row):
+        """Добавляет сессию в кучу, вытесняя худшую при переполнении."""
+        self._count += 1
+        entry = (row[1], -self._count, row)
+        if len(self._heap) < self.capacity:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+        else:
+            return
+        self._top = None
+
+    def add(self, player_name, score, game_duration, end_time):
+        """
+        Учитывает новую сохраненную сессию.
+
+        Args:
+            player_name (str): Имя игрока
+            score (int): Счет
+            game_duration (int): Длительность игры в секундах
+            end_time (datetime): Время окончания игры
+        """
+        with self._lock:
+            self._push((player_name, score, game_duration, end_time))
+
+            best = self._bests.get(player_name)
+            if best is None or score > best:
+                if best is not None:
+                    del self._sorted_bests[bisect.bisect_left(self._sorted_bests, best)]
+                bisect.insort(self._sorted_bests, score)
+                self._bests[player_name] = score
+
+    def top(self, limit=10):
+        """
+        Возвращает лучшие сессии.
+
+        Список пересчитывается только после изменения таблицы, его нельзя изменять.
+
+        Args:
+            limit (int): Количество сессий, не больше capacity
+
+        Returns:
+            list: Кортежи (player_name, score, game_duration, end_time) по убыванию счета
+        """
+        with self._lock:
+            if self._top is None:
+                self._top = [row for _, _, row in sorted(self._heap, reverse=True)]
+            top = self._top
+        return top if len(top) <= limit else top[:limit]
+
+    def best(self, player_name):
+        """
+        Возвращает лучший счет игрока.
+
+        Args:
+            player_name (str): Имя игрока
+
+        Returns:
+            int or None: Лучший счет или None, если игрок не играл
+        """
+        return self._bests.get(player_name)
+
+    def rank(self, player_name):
+        """
+        Возвращает место игрока среди всех игроков по лучшему счету.
+
+        Игроки с одинаковым лучшим счетом делят место.
+
+        Args:
+            player_name (str): Имя игрока
+
+        Returns:
+            int or None: Место, начиная с 1, или None, если игрок не играл
+        """
+        with self._lock:
+            best = self._bests.get(player_name)
+            if best is None:
+                return None
+            return len(self._sorted_bests) - bisect.bisect_right(self._sorted_bests, best) + 1
@@ -0,0 +1,788 @@
+"""
+Модуль хранилищ результатов игр.
+
+Определяет общий интерфейс хранилища (Storage) и его реализации без
+сетевой БД: SQLite для установки на одной машине и хранение в памяти для
+тестов и бенчмарков. Реализация для PostgreSQL - DatabaseHandler из
+database/db_handler.py. Хранилище выбирается настройкой storage.
+"""
+
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+import time
+from datetime import datetime
+from itertools import islice
+
+from config.settings import DEFAULT_STORAGE, DEFAULT_DB_PATH
+from .leaderboard import Leaderboard, split_leaderboard_rows
+
+
+class Storage(ABC):
+    """
+    Базовый класс хранилища результатов игр.
+
+    Реализации переопределяют все абстрактные методы (save_game_session,
+    _load_leaderboard, get_high_scores_page и методы записей игр), иначе
+    их нельзя создать, и после сохранения сессий вызывают _record_sessions.
+    Пакетное сохранение, постановка в очередь и close по умолчанию
+    выражены через них и выполняются синхронно.
+
+    Рекорды читаются из таблицы Leaderboard в памяти: она загружается из
+    хранилища одним запросом при первом обращении и дополняется каждой
+    сохраненной игрой. Заново она загружается только после
+    invalidate_high_scores или по истечении high_scores_ttl.
+
+    Attributes:
+        high_scores_ttl (float or None): Через сколько секунд перечитывать
+            таблицу рекордов, None - не перечитывать
+        leaderboard_size (int): Сколько лучших сессий хранится в памяти
+        connecting (bool): True пока хранилище подключается в фоне
+    """
+
+    high_scores_ttl = None
+    connecting = False
+    leaderboard_size = 100
+    _leaderboard = None
+    _leaderboard_loaded = 0.0
+    _leaderboard_version = 0
+
+    @abstractmethod
+    def save_game_session(self, player_name, score, game_duration, settings, food_eaten, max_length, walls_passed,
+                          replay=None):
+        """
+        Сохраняет игровую сессию и статистику.
+
+        Args:
+            player_name (str): Имя игрока
+            score (int): Финальный счет
+            game_duration (int): Длительность игры в секундах
+            settings (dict): Настройки игры
+            food_eaten (int): Количество съеденной еды
+            max_length (int): Максимальная длина змейки
+            walls_passed (bool): Флаг прохождения сквозь стены
+            replay (bytes or None): Запись игры (Replay.to_bytes())
+
+        Returns:
+            int or None: ID сохраненной сессии или None при ошибке
+        """
+
+    def save_game_sessions(self, sessions, page_size=1000):
+        """
+        Сохраняет много игровых сессий.
+
+        Args:
+            sessions (iterable): Словари с ключами как у аргументов save_game_session
+            page_size (int): Количество записей в одном запросе
+
+        Returns:
+            int: Количество сохраненных сессий
+        """
+        return sum(self.save_game_session(**session) is not None for session in sessions)
+
+    def queue_game_session(self, player_name, score, game_duration, settings, food_eaten, max_length, walls_passed,
+                           replay=None):
+        """
+        Сохраняет игровую сессию, не требуя результата.
+
+        Args:
+            player_name (str): Имя игрока
+            score (int): Финальный счет
+            game_duration (int): Длительность игры в секундах
+            settings (dict): Настройки игры
+            food_eaten (int): Количество съеденной еды
+            max_length (int): Максимальная длина змейки
+            walls_passed (bool): Флаг прохождения сквозь стены
+            replay (bytes or None): Запись игры (Replay.to_bytes())
+        """
+        self.save_game_session(player_name, score, game_duration, settings, food_eaten, max_length, walls_passed,
+                               replay)
+
+    def leaderboard(self):
+        """
+        Возвращает таблицу рекордов в памяти, при необходимости загружая ее.
+
+        Returns:
+            Leaderboard or None: Таблица рекордов или None, если хранилище недоступно
+        """
+        board = self._leaderboard
+        if board is None or (self.high_scores_ttl is not None and
+                             time.monotonic() - self._leaderboard_loaded >= self.high_scores_ttl):
+            loaded = time.monotonic()
+            version = self._leaderboard_version
+            data = self._load_leaderboard(self.leaderboard_size)
+            if data is None:
+                return None
+            board = Leaderboard(self.leaderboard_size)
+            board.seed(*data)
+            # Если во время чтения фоновый поток сохранил игру, таблица
+            # может ее не содержать: используем ее один раз и читаем заново
+            if version == self._leaderboard_version:
+                self._leaderboard = board
+                self._leaderboard_loaded = loaded
+        return board
+
+    def get_high_scores(self, limit=10):
+        """
+        Получает таблицу рекордов.
+
+        Возвращаемый список общий для всех вызовов и не должен изменяться.
+
+        Args:
+            limit (int): Количество возвращаемых записей
+
+        Returns:
+            list: Список кортежей (player_name, score, game_duration, end_time)
+        """
+        if limit > self.leaderboard_size:
+            self.leaderboard_size = limit
+            self._leaderboard = None
+        board = self.leaderboard()
+        return board.top(limit) if board is not None else []
+
+    def get_player_best(self, player_name):
+        """
+        Возвращает лучший счет игрока.
+
+        Args:
+            player_name (str): Имя игрока
+
+        Returns:
+            int or None: Лучший счет или None, если игрок не играл
+        """
+        board = self.leaderboard()
+        return board.best(player_name) if board is not None else None
+
+    def get_player_rank(self, player_name):
+        """
+        Возвращает место игрока среди всех игроков по лучшему счету.
+
+        Args:
+            player_name (str): Имя игрока
+
+        Returns:
+            int or None: Место, начиная с 1, или None, если игрок не играл
+        """
+        board = self.leaderboard()
+        return board.rank(player_name) if board is not None else None
+
+    @abstractmethod
+    def get_replay(self, session_id):
+        """
+        Получает запись игры, сохраненную вместе с сессией.
+
+        Args:
+            session_id (int): ID сессии
+
+        Returns:
+            bytes or None: Запись игры или None, если ее нет
+        """
+
+    @abstractmethod
+    def get_unverified_replays(self, after_id=0, limit=100):
+        """
+        Получает непроверенные записи игр вместе с заявленными результатами.
+
+        Записи упорядочены по ID сессии; следующая пачка запрашивается с
+        ID последней записи предыдущей.
+
+        Args:
+            after_id (int): ID сессии, после которой начинать
+            limit (int): Количество записей
+
+        Returns:
+            list: Кортежи (session_id, score, food_eaten, max_length, settings, replay)
+        """
+
+    @abstractmethod
+    def mark_replays_verified(self, results):
+        """
+        Сохраняет результаты проверки записей игр.
+
+        Args:
+            results (iterable): Пары (session_id, verified) где verified -
+                совпали ли результаты повторной игры с заявленными
+
+        Returns:
+            int: Количество отмеченных записей
+        """
+
+    @abstractmethod
+    def get_high_scores_page(self, after_score=None, after_id=None, limit=10):
+        """
+        Получает страницу таблицы рекордов по ключу последней строки.
+
+        Строки упорядочены по убыванию счета, при равном счете - по id.
+        Следующая страница запрашивается с (score, id) последней строки
+        предыдущей.
+
+        Args:
+            after_score (int or None): Счет последней строки предыдущей
+                страницы, None - первая страница
+            after_id (int or None): ID последней строки предыдущей страницы
+            limit (int): Количество строк на странице
+
+        Returns:
+            list: Список кортежей (id, player_name, score, game_duration, end_time)
+        """
+
+    @abstractmethod
+    def _load_leaderboard(self, limit):
+        """
+        Читает из хранилища данные для таблицы рекордов.
+
+        Args:
+            limit (int): Сколько лучших сессий прочитать
+
+        Returns:
+            tuple or None: (top, bests) где top - лучшие сессии
+                (player_name, score, game_duration, end_time) по убыванию
+                счета, bests - словарь лучших результатов по имени игрока;
+                None, если хранилище недоступно
+        """
+
+    def _record_sessions(self, sessions):
+        """
+        Добавляет сохраненные сессии в таблицу рекордов.
+
+        Args:
+            sessions (iterable): Кортежи (player_name, score, game_duration)
+        """
+        self._leaderboard_version += 1
+        board = self._leaderboard
+        if board is not None:
+            end_time = datetime.now()
+            for player_name, score, game_duration in sessions:
+                board.add(player_name, score, game_duration, end_time)
+
+    def invalidate_high_scores(self):
+        """
+        Сбрасывает таблицу рекордов: следующее обращение прочитает ее заново.
+        """
+        self._leaderboard_version += 1
+        self._leaderboard = None
+
+    def flush(self):
+        """
+        Ждет сохранения всех поставленных в очередь сессий.
+        """
+
+    def close(self):
+        """
+        Освобождает ресурсы хранилища.
+        """
+
+
+class MemoryStorage(Storage):
+    """
+    Хранилище результатов в памяти процесса.
+
+    Attributes:
+        sessions (list): Сохраненные сессии в виде словарей
+    """
+
+    def __init__(self):
+        """Создает пустое хранилище."""
+        self.sessions = []
+
+    def save_game_session(self, player_name, score, game_duration, settings, food_eaten, max_length, walls_passed,
+                          replay=None):
+        """
+        Сохраняет игровую сессию и статистику.
+
+        Args:
+            player_name (str): Имя игрока
+            score (int): Финальный счет
+            game_duration (int): Длительность игры в секундах
+            settings (dict): Настройки игры
+            food_eaten (int): Количество съеденной еды
+            max_length (int): Максимальная длина змейки
+            walls_passed (bool): Флаг прохождения сквозь стены
+            replay (bytes or None): Запись игры (Replay.to_bytes())
+
+        Returns:
+            int: ID сохраненной сессии
+        """
+        now = datetime.now()
+        session_id = len(self.sessions) + 1
+        self.sessions.append({
+            'id': session_id,
+            'player_name': player_name,
+            'start_time': now,
+            'end_time': now,
+            'score': score,
+            'game_duration': game_duration,
+            'settings': settings,
+            'food_eaten': food_eaten,
+            'max_length': max_length,
+            'walls_passed': walls_passed,
+            'replay': replay,
+            'verified': None,
+        })
+        self._record_sessions([(player_name, score, game_duration)])
+        return session_id
+
+    def get_replay(self, session_id):
+        """
+        Получает запись игры, сохраненную вместе с сессией.
+
+        Args:
+            session_id (int): ID сессии
+
+        Returns:
+            bytes or None: Запись игры или None, если ее нет
+        """
+        if 1 <= session_id <= len(self.sessions):
+            return self.sessions[session_id - 1]['replay']
+        return None
+
+    def get_unverified_replays(self, after_id=0, limit=100):
+        """
+        Получает непроверенные записи игр вместе с заявленными результатами.
+
+        Args:
+            after_id (int): ID сессии, после которой начинать
+            limit (int): Количество записей
+
+        Returns:
+            list: Кортежи (session_id, score, food_eaten, max_length, settings, replay)
+        """
+        pending = (s for s in self.sessions[after_id:]
+                   if s['replay'] is not None and s['verified'] is None)
+        return [(s['id'], s['score'], s['food_eaten'], s['max_length'], s['settings'], s['replay'])
+                for s in islice(pending, limit)]
+
+    def mark_replays_verified(self, results):
+        """
+        Сохраняет результаты проверки записей игр.
+
+        Args:
+            results (iterable): Пары (session_id, verified)
+
+        Returns:
+            int: Количество отмеченных записей
+        """
+        count = 0
+        for session_id, verified in results:
+            self.sessions[session_id - 1]['verified'] = verified
+            count += 1
+        return count
+
+    def get_high_scores_page(self, after_score=None, after_id=None, limit=10):
+        """
+        Получает страницу таблицы рекордов по ключу последней строки.
+
+        Args:
+            after_score (int or None): Счет последней строки предыдущей
+                страницы, None - первая страница
+            after_id (int or None): ID последней строки предыдущей страницы
+            limit (int): Количество строк на странице
+
+        Returns:
+            list: Список кортежей (id, player_name, score, game_duration, end_time)
+        """
+        ordered = sorted(self.sessions, key=lambda session: (-session['score'], session['id']))
+        if after_score is not None:
+            ordered = [s for s in ordered if (-s['score'], s['id']) > (-after_score, after_id)]
+        return [(s['id'], s['player_name'], s['score'], s['game_duration'], s['end_time'])
+                for s in ordered[:limit]]
+
+    def _load_leaderboard(self, limit):
+        """
+        Собирает данные для таблицы рекордов.
+
+        Args:
+            limit (int): Сколько лучших сессий вернуть
+
+        Returns:
+            tuple: (top, bests) как у Storage._load_leaderboard
+        """
+        best = sorted(self.sessions, key=lambda session: session['score'], reverse=True)[:limit]
+        top = [(s['player_name'], s['score'], s['game_duration'], s['end_time']) for s in best]
+        bests = {}
+        for session in self.sessions:
+            if session['score'] > bests.get(session['player_name'], session['score'] - 1):
+                bests[session['player_name']] = session['score']
+        return top, bests
+
+
+class SQLiteStorage(Storage):
+    """
+    Хранилище результатов в файле SQLite.
+
+    База открывается в режиме WAL: запись сессии не блокирует чтение
+    рекордов и требует одной синхронизации журнала. Запросы используют
+    постоянные тексты с параметрами, поэтому sqlite3 компилирует каждый
+    из них один раз и дальше берет из кэша подготовленных выражений.
+
+    Attributes:
+        path (str): Путь к файлу базы
+        connection (sqlite3.Connection): Подключение к базе
+    """
+
+    INSERT_SESSION = '''
+        INSERT INTO game_sessions (player_name, start_time, end_time, score, game_duration, settings)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    INSERT_STATS = '''
+        INSERT INTO game_stats (session_id, food_eaten, max_length, walls_passed, final_score)
+        VALUES (?, ?, ?, ?, ?)
+    '''
+    INSERT_REPLAY = '''
+        INSERT INTO game_replays (session_id, replay) VALUES (?, ?)
+    '''
+    SELECT_UNVERIFIED = '''
+        SELECT r.session_id, s.score, t.food_eaten, t.max_length, s.settings, r.replay
+        FROM game_replays r
+        JOIN game_sessions s ON s.id = r.session_id
+        JOIN game_stats t ON t.session_id = r.session_id
+        WHERE r.verified IS NULL AND r.session_id > :after
+        ORDER BY r.session_id
+        LIMIT :limit
+    '''
+    # Версионированные миграции схемы: (версия, описание, SQL). Номер
+    # последней примененной миграции хранится в PRAGMA user_version
+    MIGRATIONS = (
+        (1, 'индекс таблицы рекордов по убыванию счета', '''
+            CREATE INDEX IF NOT EXISTS game_sessions_score_idx
+            ON game_sessions (score DESC, id, player_name, game_duration, end_time)
+        '''),
+        (2, 'индекс результатов игрока', '''
+            CREATE INDEX IF NOT EXISTS game_sessions_player_idx
+            ON game_sessions (player_name, score DESC, id)
+        '''),
+        (3, 'индекс внешнего ключа game_stats.session_id', '''
+            CREATE INDEX IF NOT EXISTS game_stats_session_id_idx
+            ON game_stats (session_id)
+        '''),
+        (4, 'таблица записей игр', '''
+            CREATE TABLE IF NOT EXISTS game_replays (
+                session_id INTEGER PRIMARY KEY REFERENCES game_sessions(id),
+                replay BLOB NOT NULL
+            )
+        '''),
+        (5, 'отметка проверки записей игр', '''
+            ALTER TABLE game_replays ADD COLUMN verified INTEGER
+        '''),
+        (6, 'индекс непроверенных записей игр', '''
+            CREATE INDEX IF NOT EXISTS game_replays_unverified_idx
+            ON game_replays (session_id) WHERE verified IS NULL
+        '''),
+    )
+    SELECT_PAGE = '''
+        SELECT id, player_name, score, game_duration, end_time
+        FROM game_sessions
+        WHERE score <= :score AND (score < :score OR id > :id)
+        ORDER BY score DESC, id
+        LIMIT :limit
+    '''
+    SELECT_FIRST_PAGE = '''
+        SELECT id, player_name, score, game_duration, end_time
+        FROM game_sessions
+        ORDER BY score DESC, id
+        LIMIT :limit
+    '''
+    # Лучшие сессии и лучший счет каждого игрока одним запросом
+    SELECT_LEADERBOARD = '''
+        SELECT * FROM (
+            SELECT id, player_name, score, game_duration, end_time, 1
+            FROM game_sessions
+            ORDER BY score DESC, id
+            LIMIT :limit
+        )
+        UNION ALL
+        SELECT NULL, player_name, MAX(score), NULL, NULL, 0
+        FROM game_sessions
+        GROUP BY player_name
+    '''
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        """
+        Открывает базу и создает таблицы.
+
+        Args:
+            path (str): Путь к файлу базы или ':memory:'
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('PRAGMA foreign_keys=ON')
+        self.create_tables()
+        self.migrate()
+
+    def create_tables(self):
+        """
+        Создает таблицы game_sessions и game_stats, если они не существуют.
+        """
+        with self.connection:
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS game_sessions (
+                    id INTEGER PRIMARY KEY,
+                    player_name TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    score INTEGER DEFAULT 0,
+                    game_duration INTEGER,
+                    settings TEXT
+                )
+            ''')
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS game_stats (
+                    id INTEGER PRIMARY KEY,
+                    session_id INTEGER REFERENCES game_sessions(id),
+                    food_eaten INTEGER DEFAULT 0,
+                    max_length INTEGER DEFAULT 0,
+                    walls_passed INTEGER DEFAULT 0,
+                    final_score INTEGER DEFAULT 0
+                )
+            ''')
+
+    def migrate(self):
+        """
+        Применяет миграции MIGRATIONS, которые еще не применены.
+
+        Каждая миграция и новый номер версии фиксируются одной транзакцией,
+        поэтому после падения посреди миграции она повторяется целиком.
+
+        Returns:
+            list: Версии, примененные этим вызовом
+        """
+        current = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        new_versions = []
+        for version, description, sql in self.MIGRATIONS:
+            if version <= current:
+                continue
+            with self.connection:
+                # sqlite3 не открывает транзакцию перед DDL сам и фиксировал
+                # бы ALTER TABLE отдельно от user_version
+                self.connection.execute('BEGIN')
+                self.connection.execute(sql)
+                self.connection.execute(f'PRAGMA user_version = {version:d}')
+            new_versions.append(version)
+        return new_versions
+
+    def _insert(self, session):
+        """
+        Вставляет сессию и ее статистику в текущей транзакции.
+
+        Args:
+            session (dict): Словарь с ключами как у аргументов save_game_session
+
+        Returns:
+            int: ID сессии
+        """
+        now = datetime.now().isoformat(sep=' ')
+        cursor = self.connection.execute(self.INSERT_SESSION, (
+            session['player_name'], now, now, session['score'], session['game_duration'],
+            json.dumps(session['settings'])))
+        self.connection.execute(self.INSERT_STATS, (
+            cursor.lastrowid, session['food_eaten'], session['max_length'],
+            session['walls_passed'], session['score']))
+        if session.get('replay') is not None:
+            self.connection.execute(self.INSERT_REPLAY, (cursor.lastrowid, session['replay']))
+        return cursor.lastrowid
+
+    def save_game_session(self, player_name, score, game_duration, settings, food_eaten, max_length, walls_passed,
+                          replay=None):
+        """
+        Сохраняет игровую сессию и статистику одной транзакцией.
+
+        Args:
+            player_name (str): Имя игрока
+            score (int): Финальный счет
+            game_duration (int): Длительность игры в секундах
+            settings (dict): Настройки игры
+            food_eaten (int): Количество съеденной еды
+            max_length (int): Максимальная длина змейки
+            walls_passed (bool): Флаг прохождения сквозь стены
+            replay (bytes or None): Запись игры (Replay.to_bytes())
+
+        Returns:
+            int or None: ID сохраненной сессии или None при ошибке
+        """
+        try:
+            with self.connection:
+                session_id = self._insert({
+                    'player_name': player_name,
+                    'score': score,
+                    'game_duration': game_duration,
+                    'settings': settings,
+                    'food_eaten': food_eaten,
+                    'max_length': max_length,
+                    'walls_passed': walls_passed,
+                    'replay': replay,
+                })
+        except sqlite3.Error as e:
+            print(f"❌ Ошибка сохранения игры: {e}")
+            return None
+        self._record_sessions([(player_name, score, game_duration)])
+        print(f"✅ Игра сохранена в SQLite. Игрок: {player_name}, Счет: {score}")
+        return session_id
+
+    def save_game_sessions(self, sessions, page_size=1000):
+        """
+        Сохраняет много игровых сессий одной транзакцией.
+
+        Args:
+            sessions (iterable): Словари с ключами как у аргументов save_game_session
+            page_size (int): Не используется, сохраняется для совместимости
+
+        Returns:
+            int: Количество сохраненных сессий (0 при ошибке)
+        """
+        saved = []
+        try:
+            with self.connection:
+                for session in sessions:
+                    self._insert(session)
+                    saved.append((session['player_name'], session['score'], session['game_duration']))
+        except sqlite3.Error as e:
+            print(f"❌ Ошибка пакетного сохранения игр: {e}")
+            return 0
+        self._record_sessions(saved)
+        print(f"✅ Сохранено игр в SQLite: {len(saved)}")
+        return len(saved)
+
+    def get_high_scores_page(self, after_score=None, after_id=None, limit=10):
+        """
+        Получает страницу таблицы рекордов по ключу последней строки.
+
+        Запрос читает только limit строк индекса game_sessions_score_idx
+        независимо от номера страницы.
+
+        Args:
+            after_score (int or None): Счет последней строки предыдущей
+                страницы, None - первая страница
+            after_id (int or None): ID последней строки предыдущей страницы
+            limit (int): Количество строк на странице
+
+        Returns:
+            list: Список кортежей (id, player_name, score, game_duration, end_time)
+        """
+        try:
+            if after_score is None:
+                rows = self.connection.execute(self.SELECT_FIRST_PAGE, {'limit': limit}).fetchall()
+            else:
+                rows = self.connection.execute(
+                    self.SELECT_PAGE, {'score': after_score, 'id': after_id, 'limit': limit}).fetchall()
+        except sqlite3.Error as e:
+            print(f"❌ Ошибка получения рекордов: {e}")
+            return []
+        return [(session_id, player, score, duration, datetime.fromisoformat(end_time))
+                for session_id, player, score, duration, end_time in rows]
+
+    def get_replay(self, session_id):
+        """
+        Получает запись игры, сохраненную вместе с сессией.
+
+        Args:
+            session_id (int): ID сессии
+
+        Returns:
+            bytes or None: Запись игры или None, если ее нет или при ошибке
+        """
+        try:
+            row = self.connection.execute(
+                'SELECT replay FROM game_replays WHERE session_id = ?', (session_id,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"❌ Ошибка получения записи игры: {e}")
+            return None
+        return row[0] if row is not None else None
+
+    def get_unverified_replays(self, after_id=0, limit=100):
+        """
+        Получает непроверенные записи игр вместе с заявленными результатами.
+
+        Запрос читает только limit строк частичного индекса
+        game_replays_unverified_idx.
+
+        Args:
+            after_id (int): ID сессии, после которой начинать
+            limit (int): Количество записей
+
+        Returns:
+            list: Кортежи (session_id, score, food_eaten, max_length, settings, replay)
+        """
+        try:
+            rows = self.connection.execute(
+                self.SELECT_UNVERIFIED, {'after': after_id, 'limit': limit}).fetchall()
+            return [row[:4] + (json.loads(row[4]) if row[4] else None, row[5]) for row in rows]
+        except sqlite3.Error as e:
+            print(f"❌ Ошибка получения записей игр: {e}")
+            return []
+
+    def mark_replays_verified(self, results):
+        """
+        Сохраняет результаты проверки записей игр одной транзакцией.
+
+        Args:
+            results (iterable): Пары (session_id, verified)
+
+        Returns:
+            int: Количество отмеченных записей (0 при ошибке)
+        """
+        rows = [(verified, session_id) for session_id, verified in results]
+        try:
+            with self.connection:
+                self.connection.executemany(
+                    'UPDATE game_replays SET verified = ? WHERE session_id = ?', rows)
+        except sqlite3.Error as e:
+            print(f"❌ Ошибка отметки проверенных игр: {e}")
+            return 0
+        return len(rows)
+
+    def _load_leaderboard(self, limit):
+        """
+        Читает из базы данные для таблицы рекордов одним запросом.
+
+        Args:
+            limit (int): Сколько лучших сессий прочитать
+
+        Returns:
+            tuple or None: (top, bests) как у Storage._load_leaderboard или None при ошибке
+        """
+        try:
+            rows = self.connection.execute(self.SELECT_LEADERBOARD, {'limit': limit}).fetchall()
+        except sqlite3.Error as e:
+            print(f"❌ Ошибка получения рекордов: {e}")
+            return None
+        return split_leaderboard_rows(
+            (session_id, player, score, duration, end_time and datetime.fromisoformat(end_time), in_top)
+            for session_id, player, score, duration, end_time, in_top in rows)
+
+    def close(self):
+        """
+        Закрывает подключение к базе.
+        """
+        self.connection.close()
+
+
+def create_storage(settings, background=False):
+    """
+    Создает хранилище, выбранное в настройках.
+
+    Args:
+        settings (dict): Настройки с ключами storage ('postgres', 'sqlite'
+            или 'memory'), db_path (файл SQLite) и leaderboard_ttl (время
+            жизни кэша рекордов в секундах, 0 - до сохранения новой игры)
+        background (bool): Подключаться к PostgreSQL в фоновом потоке
+
+    Returns:
+        Storage: Хранилище результатов
+    """
+    kind = settings.get('storage', DEFAULT_STORAGE)
+    if kind == 'sqlite':
+        storage = SQLiteStorage(settings.get('db_path', DEFAULT_DB_PATH))
+    elif kind == 'memory':
+        storage = MemoryStorage()
+    elif kind == 'postgres':
+        # psycopg2 нужен только для PostgreSQL
+        from .db_handler import DatabaseHandler
+        storage = DatabaseHandler(background=background)
+    else:
+        raise ValueError(f"Неизвестное хранилище: {kind}")
+
+    if settings.get('leaderboard_ttl'):
+        storage.high_scores_ttl = settings['leaderboard_ttl']
+    return storage
@@ -0,0 +1,122 @@
+"""
+Модуль встроенных агентов для автоматической игры.
+
+Агенты выбирают действие для GameEngine по текущему состоянию игры и
+используются турнирным прогоном и тестами без участия игрока.
+"""
+
+import random
+
+from .engine import DIRECTIONS, OPPOSITE, UP, DOWN, LEFT, RIGHT
+
+
+class RandomAgent:
+    """
+    Агент, поворачивающий в случайную сторону.
+
+    Attributes:
+        rng (random.Random): Генератор случайных чисел агента
+        turn_chance (float): Вероятность поворота на шаге
+    """
+
+    def __init__(self, rng=None, turn_chance=0.2):
+        """
+        Инициализирует агента.
+
+        Args:
+            rng (random.Random): Генератор случайных чисел
+            turn_chance (float): Вероятность поворота на шаге
+        """
+        self.rng = rng if rng is not None else random.Random()
+        self.turn_chance = turn_chance
+
+    def act(self, engine):
+        """
+        Выбирает действие.
+
+        Args:
+            engine (GameEngine): Игровой движок
+
+        Returns:
+            int or None: Действие или None, чтобы сохранить направление
+        """
+        if self.rng.random() < self.turn_chance:
+            return self.rng.randrange(len(DIRECTIONS))
+        return None
+
+
+class GreedyAgent:
+    """
+    Агент, идущий к еде кратчайшим путем и избегающий столкновений на следующем шаге.
+
+    Attributes:
+        rng (random.Random): Генератор случайных чисел для выбора среди равных ходов
+    """
+
+    def __init__(self, rng=None):
+        """
+        Инициализирует агента.
+
+        Args:
+            rng (random.Random): Генератор случайных чисел
+        """
+        self.rng = rng if rng is not None else random.Random()
+
+    def _next_cell(self, engine, head, action):
+        """
+        Возвращает клетку после хода или None, если ход приводит к столкновению.
+
+        Args:
+            engine (GameEngine): Игровой движок
+            head (tuple): Позиция головы
+            action (int): Действие
+
+        Returns:
+            tuple or None: Новая позиция головы
+        """
+        dx, dy = engine.directions[action]
+        x, y = head[0] + dx, head[1] + dy
+        if engine.wall_pass:
+            x %= engine.screen_width
+            y %= engine.screen_height
+        elif not (0 <= x < engine.screen_width and 0 <= y < engine.screen_height):
+            return None
+        if (x, y) in engine.snake.occupied:
+            return None
+        return x, y
+
+    def act(self, engine):
+        """
+        Выбирает действие.
+
+        Args:
+            engine (GameEngine): Игровой движок
+
+        Returns:
+            int or None: Действие или None, если безопасного хода нет
+        """
+        snake = engine.snake
+        head = snake.positions[0]
+        current = engine.current_action()
+        target = engine.food.position or head
+
+        best = None
+        best_distance = None
+        actions = [UP, DOWN, LEFT, RIGHT]
+        self.rng.shuffle(actions)
+        for action in actions:
+            if action == OPPOSITE[current]:
+                continue
+            cell = self._next_cell(engine, head, action)
+            if cell is None:
+                continue
+            distance = abs(cell[0] - target[0]) + abs(cell[1] - target[1])
+            if best_distance is None or distance < best_distance:
+                best, best_distance = action, distance
+        return best
+
+
+AGENTS = {
+    'random': RandomAgent,
+    'greedy': GreedyAgent,
+}
@@ -0,0 +1,213 @@
+"""
+Модуль пакетного игрового движка на NumPy.
+
+Хранит N независимых игр в массивах NumPy и продвигает их все за один
+векторизованный шаг. Правила повторяют GameEngine (Snake.move, Snake.grow,
+Food.randomize_position), но поле задается в клетках, а не в пикселях.
+Используется для обучения и оценки агентов, где шаг по одному объекту
+Python на игру слишком медленный.
+"""
+
+import numpy as np
+
+from .engine import DIRECTIONS, UP, DOWN, LEFT, RIGHT
+
+_DX = np.array([dx for dx, dy in DIRECTIONS], dtype=np.int64)
+_DY = np.array([dy for dx, dy in DIRECTIONS], dtype=np.int64)
+_OPPOSITE = np.array([DOWN, UP, RIGHT, LEFT], dtype=np.int64)
+
+
+class BatchGameEngine:
+    """
+    Класс пакетного движка для N игр.
+
+    Тело каждой змейки хранится в кольцевом буфере индексов клеток
+    (клетка = y * cols + x), занятость поля - в булевой сетке. Закончившиеся
+    игры автоматически начинаются заново в том же вызове step().
+
+    Attributes:
+        num_games (int): Количество игр
+        cols (int): Ширина поля в клетках
+        rows (int): Высота поля в клетках
+        wall_pass (bool): Прохождение сквозь стены
+        rng (numpy.random.Generator): Генератор случайных чисел
+        body (numpy.ndarray): Кольцевые буферы тел, форма (num_games, cols * rows)
+        head (numpy.ndarray): Индекс головы в кольцевом буфере каждой игры
+        length (numpy.ndarray): Текущая длина змеек
+        grow_to (numpy.ndarray): Целевая длина для роста
+        direction (numpy.ndarray): Направление движения (UP, DOWN, LEFT, RIGHT)
+        occupied (numpy.ndarray): Занятость клеток, форма (num_games, cols * rows)
+        food (numpy.ndarray): Клетка еды каждой игры
+        score (numpy.ndarray): Текущий счет
+        food_eaten (numpy.ndarray): Количество съеденной еды
+        max_length (numpy.ndarray): Максимальная длина змейки
+        ticks (numpy.ndarray): Количество шагов в текущей игре
+    """
+
+    def __init__(self, num_games, cols, rows, wall_pass=False, seed=None):
+        """
+        Инициализирует массивы и начинает все игры.
+
+        Args:
+            num_games (int): Количество одновременных игр
+            cols (int): Ширина поля в клетках (screen_width // grid_size)
+            rows (int): Высота поля в клетках (screen_height // grid_size)
+            wall_pass (bool): Разрешить прохождение сквозь стены
+            seed: Начальное значение генератора случайных чисел
+        """
+        if cols < 6 or rows < 6:
+            raise ValueError("Поле должно быть не меньше 6x6 клеток")
+
+        self.num_games = num_games
+        self.cols = cols
+        self.rows = rows
+        self.wall_pass = wall_pass
+        self.num_cells = cols * rows
+        self.rng = np.random.default_rng(seed)
+
+        self._games = np.arange(num_games)
+        # Начальная змейка как в Snake.reset: голова в (5, 5), хвост слева
+        self._start_cells = np.array([5 * cols + 3, 5 * cols + 4, 5 * cols + 5], dtype=np.int32)
+
+        self.body = np.zeros((num_games, self.num_cells), dtype=np.int32)
+        self.occupied = np.zeros((num_games, self.num_cells), dtype=bool)
+        self.head = np.zeros(num_games, dtype=np.int64)
+        self.length = np.zeros(num_games, dtype=np.int64)
+        self.grow_to = np.zeros(num_games, dtype=np.int64)
+        self.direction = np.zeros(num_games, dtype=np.int64)
+        self.food = np.zeros(num_games, dtype=np.int64)
+        self.score = np.zeros(num_games, dtype=np.int64)
+        self.food_eaten = np.zeros(num_games, dtype=np.int64)
+        self.max_length = np.zeros(num_games, dtype=np.int64)
+        self.ticks = np.zeros(num_games, dtype=np.int64)
+        self.reset()
+
+    def reset(self, mask=None):
+        """
+        Начинает заново выбранные игры.
+
+        Args:
+            mask (numpy.ndarray): Булева маска игр для сброса, по умолчанию все
+        """
+        games = self._games if mask is None else np.flatnonzero(mask)
+        if games.size == 0:
+            return
+
+        start = len(self._start_cells)
+        self.occupied[games] = False
+        self.occupied[games[:, None], self._start_cells] = True
+        self.body[games, :start] = self._start_cells
+        self.head[games] = start - 1
+        self.length[games] = start
+        self.grow_to[games] = start
+        self.direction[games] = RIGHT
+        self.score[games] = 0
+        self.food_eaten[games] = 0
+        self.max_length[games] = start
+        self.ticks[games] = 0
+        self.food[games] = self._spawn_food(games)
+
+    def _spawn_food(self, games):
+        """
+        Выбирает равномерно случайную свободную клетку для каждой игры.
+
+        Args:
+            games (numpy.ndarray): Индексы игр
+
+        Returns:
+            numpy.ndarray: Клетки еды, -1 если свободных клеток нет
+        """
+        free = ~self.occupied[games]
+        counts = free.sum(axis=1)
+        picks = (self.rng.random(games.size) * counts).astype(np.int64)
+        cells = np.argmax(np.cumsum(free, axis=1) > picks[:, None], axis=1)
+        return np.where(counts > 0, cells, -1)
+
+    def heads(self):
+        """
+        Возвращает клетки голов всех змеек.
+
+        Returns:
+            numpy.ndarray: Индексы клеток голов
+        """
+        return self.body[self._games, self.head]
+
+    def boards(self):
+        """
+        Возвращает занятость полей в виде сеток.
+
+        Returns:
+            numpy.ndarray: Представление occupied формы (num_games, rows, cols)
+        """
+        return self.occupied.reshape(self.num_games, self.rows, self.cols)
+
+    def step(self, actions=None):
+        """
+        Продвигает все игры на один шаг.
+
+        Args:
+            actions (array-like): Действие для каждой игры (UP, DOWN, LEFT,
+                RIGHT или -1, чтобы сохранить направление). None - все игры
+                сохраняют направление.
+
+        Returns:
+            tuple: (dones, rewards, scores) где:
+                dones (numpy.ndarray): Игры, закончившиеся на этом шаге
+                    (они уже сброшены)
+                rewards (numpy.ndarray): Прирост счета за шаг
+                scores (numpy.ndarray): Счет на этом шаге, для закончившихся
+                    игр - финальный счет до сброса
+        """
+        games = self._games
+        if actions is not None:
+            # Разворот на 180 градусов игнорируется, как в Snake.turn
+            actions = np.asarray(actions, dtype=np.int64)
+            valid = (actions >= 0) & (actions != _OPPOSITE[self.direction])
+            self.direction = np.where(valid, actions, self.direction)
+
+        head_cells = self.body[games, self.head]
+        new_x = head_cells % self.cols + _DX[self.direction]
+        new_y = head_cells // self.cols + _DY[self.direction]
+
+        if self.wall_pass:
+            new_x %= self.cols
+            new_y %= self.rows
+            hit_wall = np.zeros(self.num_games, dtype=bool)
+        else:
+            hit_wall = (new_x < 0) | (new_x >= self.cols) | (new_y < 0) | (new_y >= self.rows)
+            np.clip(new_x, 0, self.cols - 1, out=new_x)
+            np.clip(new_y, 0, self.rows - 1, out=new_y)
+
+        new_cells = new_y * self.cols + new_x
+        dones = hit_wall | self.occupied[games, new_cells]
+        self.ticks += 1
+
+        # Движение: голова добавляется в буфер, хвост снимается, если змейка не растет
+        alive = np.flatnonzero(~dones)
+        moved = new_cells[alive]
+        self.head[alive] = (self.head[alive] + 1) % self.num_cells
+        self.body[alive, self.head[alive]] = moved
+        self.occupied[alive, moved] = True
+        self.length[alive] += 1
+
+        shrink = alive[self.length[alive] > self.grow_to[alive]]
+        tails = self.body[shrink, (self.head[shrink] - self.length[shrink] + 1) % self.num_cells]
+        self.occupied[shrink, tails] = False
+        self.length[shrink] -= 1
+
+        # Поедание еды
+        rewards = np.zeros(self.num_games, dtype=np.int64)
+        eaten = alive[moved == self.food[alive]]
+        if eaten.size:
+            self.grow_to[eaten] += 1
+            self.score[eaten] += 10
+            self.food_eaten[eaten] += 1
+            rewards[eaten] = 10
+            self.max_length[eaten] = np.maximum(self.max_length[eaten], self.length[eaten])
+            self.food[eaten] = self._spawn_food(eaten)
+            # Поле заполнено: победа, игра окончена
+            dones[eaten[self.food[eaten] < 0]] = True
+
+        scores = self.score.copy()
+        self.reset(dones)
+        return dones, rewards, scores
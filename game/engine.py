@@ -0,0 +1,279 @@
+"""
+Модуль игрового движка без отрисовки.
+
+Содержит правила игры (движение, столкновения, еда, счет) отдельно от
+дисплея, обработки событий и игрового таймера Pygame. Используется
+GameLogic для обычной игры, а также ботами и регрессионными прогонами,
+которым нужно моделировать игры без экрана с максимальной скоростью.
+"""
+
+import random
+from collections import deque
+
+from .snake import Snake
+from .food import Food
+
+# Действия агента: индексы в DIRECTIONS
+UP, DOWN, LEFT, RIGHT = range(4)
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+# Противоположное действие для каждого действия
+OPPOSITE = (DOWN, UP, RIGHT, LEFT)
+
+
+class TurnBuffer:
+    """
+    Кольцевой буфер поворотов, введенных между шагами игры.
+
+    Повороты принимаются в порядке ввода и выдаются по одному на шаг,
+    поэтому два быстрых нажатия за один шаг (например, UP и LEFT для
+    разворота) выполняются на двух шагах, а не затирают друг друга.
+    Поворот проверяется относительно направления после предыдущих
+    поворотов в буфере: повторы и развороты на 180 градусов отбрасываются.
+    Буфер не выделяет память после создания.
+
+    Attributes:
+        capacity (int): Максимальное количество поворотов в буфере
+        count (int): Количество поворотов в буфере
+    """
+
+    def __init__(self, capacity=3):
+        """
+        Создает пустой буфер.
+
+        Args:
+            capacity (int): Максимальное количество поворотов в буфере
+        """
+        self.capacity = capacity
+        self.count = 0
+        self._actions = [None] * capacity
+        self._start = 0
+
+    def push(self, action, current):
+        """
+        Добавляет поворот в конец буфера.
+
+        Args:
+            action (int): Одно из UP, DOWN, LEFT, RIGHT
+            current (int): Текущее направление змейки
+
+        Returns:
+            bool: True если поворот принят, False если он отброшен
+                (повтор, разворот или буфер заполнен)
+        """
+        if self.count:
+            current = self._actions[(self._start + self.count - 1) % self.capacity]
+        if action == current or action == OPPOSITE[current] or self.count == self.capacity:
+            return False
+        self._actions[(self._start + self.count) % self.capacity] = action
+        self.count += 1
+        return True
+
+    def pop(self):
+        """
+        Извлекает самый ранний поворот.
+
+        Returns:
+            int or None: Поворот или None, если буфер пуст
+        """
+        if not self.count:
+            return None
+        action = self._actions[self._start]
+        self._start = (self._start + 1) % self.capacity
+        self.count -= 1
+        return action
+
+    def clear(self):
+        """Удаляет все повороты из буфера."""
+        self.count = 0
+        self._start = 0
+
+
+class GameEngine:
+    """
+    Класс безголового игрового движка.
+
+    Хранит состояние змейки и еды и продвигает игру на один шаг за вызов
+    step() без какой-либо зависимости от дисплея.
+
+    Attributes:
+        screen_width (int): Ширина поля
+        screen_height (int): Высота поля
+        grid_size (int): Размер клетки сетки
+        wall_pass (bool): Прохождение сквозь стены
+        rng (random.Random): Генератор случайных чисел игры
+        snake (Snake): Объект змейки
+        food (Food): Объект еды
+        ticks (int): Количество сделанных шагов
+        food_eaten (int): Количество съеденной еды
+        max_length (int): Максимальная длина змейки
+        done (bool): Игра окончена
+        won (bool): Змейка заняла все поле
+    """
+
+    def __init__(self, screen_width, screen_height, grid_size, wall_pass=False,
+                 snake_color='green', food_color='red', seed=None):
+        """
+        Инициализирует движок и начинает новую игру.
+
+        Args:
+            screen_width (int): Ширина поля
+            screen_height (int): Высота поля
+            grid_size (int): Размер клетки сетки
+            wall_pass (bool): Разрешить прохождение сквозь стены
+            snake_color (str): Название цвета змейки
+            food_color (str): Название цвета еды
+            seed: Начальное значение генератора случайных чисел
+        """
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.grid_size = grid_size
+        self.wall_pass = wall_pass
+        self.directions = tuple((dx * grid_size, dy * grid_size) for dx, dy in DIRECTIONS)
+
+        self.rng = random.Random()
+        self.snake = Snake(grid_size, snake_color)
+        self.food = Food(grid_size, food_color, rng=self.rng)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        Начинает новую игру.
+
+        Args:
+            seed: Начальное значение генератора случайных чисел. Одинаковый
+                seed и одинаковая последовательность действий дают одинаковую игру.
+
+        Returns:
+            int: Начальный счет
+        """
+        self.rng.seed(seed)
+        self.snake.reset()
+        self.food.track(self.snake.positions, self.screen_width, self.screen_height)
+        self.food.randomize_position(self.snake.positions, self.screen_width, self.screen_height)
+
+        self.ticks = 0
+        self.food_eaten = 0
+        self.max_length = self.snake.get_length()
+        self.done = False
+        self.won = False
+        return self.snake.score
+
+    def snapshot(self):
+        """
+        Сохраняет полное состояние игры.
+
+        Returns:
+            tuple: Состояние для restore(); не зависит от дальнейших шагов
+        """
+        snake = self.snake
+        food = self.food
+        return (self.ticks, self.food_eaten, self.max_length, self.done, self.won,
+                self.rng.getstate(),
+                tuple(snake.positions), snake.vacated, snake.direction, snake.score,
+                snake.grow_to, snake.length,
+                food.position, tuple(food.free_cells.cells))
+
+    def restore(self, state):
+        """
+        Восстанавливает состояние игры, сохраненное snapshot().
+
+        Args:
+            state (tuple): Результат snapshot() движка с тем же размером поля
+        """
+        (self.ticks, self.food_eaten, self.max_length, self.done, self.won,
+         rng_state, positions, vacated, direction, score, grow_to, length,
+         food_position, free_cells) = state
+        self.rng.setstate(rng_state)
+
+        snake = self.snake
+        snake.positions = deque(positions)
+        snake.occupied = set(positions)
+        snake.vacated = vacated
+        snake.direction = direction
+        snake.score = score
+        snake.grow_to = grow_to
+        snake.length = length
+
+        # Порядок свободных клеток определяет выбор следующей позиции еды
+        cells = self.food.free_cells
+        cells.cells = list(free_cells)
+        cells.index = {cell: i for i, cell in enumerate(cells.cells)}
+        self.food.position = food_position
+
+    def turn(self, action):
+        """
+        Поворачивает змейку.
+
+        Args:
+            action (int): Одно из UP, DOWN, LEFT, RIGHT
+        """
+        self.snake.turn(self.directions[action])
+
+    def current_action(self):
+        """
+        Возвращает текущее направление змейки.
+
+        Returns:
+            int: Одно из UP, DOWN, LEFT, RIGHT
+        """
+        return self.directions.index(self.snake.direction)
+
+    def step(self, action=None):
+        """
+        Продвигает игру на один шаг.
+
+        Args:
+            action (int or None): Одно из UP, DOWN, LEFT, RIGHT или None,
+                чтобы сохранить текущее направление
+
+        Returns:
+            tuple: (done, reward, score) где:
+                done (bool): Игра окончена
+                reward (int): Прирост счета за шаг
+                score (int): Текущий счет
+        """
+        snake = self.snake
+        if self.done:
+            return True, 0, snake.score
+
+        if action is not None:
+            snake.turn(self.directions[action])
+        self.ticks += 1
+
+        # Движение змейки и столкновение с собой
+        if not snake.move(self.wall_pass, self.screen_width, self.screen_height):
+            self.done = True
+            return True, 0, snake.score
+
+        # Проверка столкновения со стенами (если wall_pass=False)
+        head = snake.positions[0]
+        if not self.wall_pass:
+            if (head[0] < 0 or head[0] >= self.screen_width or
+                    head[1] < 0 or head[1] >= self.screen_height):
+                self.done = True
+                return True, 0, snake.score
+
+        # Синхронизируем индекс свободных клеток с движением змейки
+        food = self.food
+        food.occupy(head)
+        if snake.vacated is not None:
+            food.release(snake.vacated)
+
+        # Проверка поедания еды
+        if head != food.position:
+            return False, 0, snake.score
+
+        score = snake.score
+        snake.grow()
+        self.food_eaten += 1
+
+        current_length = len(snake.positions)
+        if current_length > self.max_length:
+            self.max_length = current_length
+
+        if not food.randomize_position(snake.positions, self.screen_width, self.screen_height):
+            # Поле заполнено: победа
+            self.done = True
+            self.won = True
+
+        return self.done, snake.score - score, snake.score
@@ -4,9 +4,108 @@
 Содержит логику генерации и отрисовки еды для змейки.
 """
 
-import pygame
 import random
 
+try:
+    import pygame
+except ImportError:  # Безголовый режим: правила доступны, отрисовка нет
+    pygame = None
+
+# Сколько случайных клеток пробовать без индекса, пока змейка занимает
+# не больше половины поля: все попытки промахиваются с вероятностью 2**-32
+SAMPLE_ATTEMPTS = 32
+
+
+class FreeCells:
+    """
+    Индекс свободных клеток поля.
+
+    Хранит свободные клетки в списке и их индексы в словаре, поэтому
+    занятие и освобождение клетки (удаление перестановкой с последним
+    элементом) и выбор случайной клетки выполняются за O(1).
+
+    Attributes:
+        grid_size (int): Размер клетки сетки
+        screen_width (int): Ширина поля
+        screen_height (int): Высота поля
+        cells (list): Список свободных клеток
+        index (dict): Позиция каждой свободной клетки в списке cells
+    """
+
+    def __init__(self, grid_size, screen_width, screen_height, occupied=()):
+        """
+        Строит индекс по всем клеткам поля, кроме занятых.
+
+        Args:
+            grid_size (int): Размер клетки сетки
+            screen_width (int): Ширина поля
+            screen_height (int): Высота поля
+            occupied (iterable): Клетки, занятые змейкой
+        """
+        self.grid_size = grid_size
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+
+        occupied = set(occupied)
+        self.cells = [
+            (x, y)
+            for y in range(0, screen_height - grid_size + 1, grid_size)
+            for x in range(0, screen_width - grid_size + 1, grid_size)
+            if (x, y) not in occupied
+        ]
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def _on_board(self, cell):
+        """Проверяет, что клетка выровнена по сетке и лежит внутри поля."""
+        x, y = cell
+        return (0 <= x <= self.screen_width - self.grid_size and
+                0 <= y <= self.screen_height - self.grid_size and
+                x % self.grid_size == 0 and y % self.grid_size == 0)
+
+    def occupy(self, cell):
+        """
+        Помечает клетку занятой.
+
+        Args:
+            cell (tuple): Координаты клетки
+        """
+        i = self.index.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.index[last] = i
+
+    def release(self, cell):
+        """
+        Помечает клетку свободной.
+
+        Args:
+            cell (tuple): Координаты клетки
+        """
+        if cell in self.index or not self._on_board(cell):
+            return
+        self.index[cell] = len(self.cells)
+        self.cells.append(cell)
+
+    def choice(self, rng=random):
+        """
+        Возвращает случайную свободную клетку.
+
+        Args:
+            rng: Генератор случайных чисел (модуль random или random.Random)
+
+        Returns:
+            tuple or None: Координаты клетки или None, если поле заполнено
+        """
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
 
 class Food:
     """
@@ -15,20 +114,26 @@ class Food:
     Attributes:
         grid_size (int): Размер клетки сетки
         color (tuple): Цвет еды в формате RGB
-        position (tuple): Текущая позиция еды
+        position (tuple or None): Текущая позиция еды, None если поле заполнено
+        rng: Генератор случайных чисел для выбора позиции
+        free_cells (FreeCells or None): Индекс свободных клеток, который
+            поддерживается синхронно с движением змейки после вызова track()
     """
 
-    def __init__(self, grid_size, color='red'):
+    def __init__(self, grid_size, color='red', rng=None):
         """
         Инициализирует еду.
 
         Args:
             grid_size (int): Размер клетки сетки
             color (str): Название цвета еды
+            rng (random.Random): Генератор случайных чисел, по умолчанию модуль random
         """
         self.grid_size = grid_size
         self.color = self._get_color(color)
+        self.rng = rng if rng is not None else random
         self.position = (0, 0)
+        self.free_cells = None
         self.randomize_position()
 
     def _get_color(self, color_name):
@@ -50,25 +155,78 @@ class Food:
         }
         return colors.get(color_name, (255, 0, 0))
 
-    def randomize_position(self, snake_positions=None, screen_width=800, screen_height=600):
+    def track(self, snake_positions, screen_width, screen_height):
         """
-        Случайным образом размещает еду на поле.
+        Строит индекс свободных клеток для поля и начинает его отслеживать.
+
+        После вызова занятость поля обновляется через occupy() и release()
+        на каждом шаге змейки, а randomize_position() выбирает клетку за O(1).
 
         Args:
-            snake_positions (list): Список позиций змейки для избежания пересечения
+            snake_positions (iterable): Позиции змейки
             screen_width (int): Ширина экрана
             screen_height (int): Высота экрана
         """
-        if snake_positions is None:
-            snake_positions = []
+        self.free_cells = FreeCells(self.grid_size, screen_width, screen_height, snake_positions)
+
+    def occupy(self, cell):
+        """
+        Сообщает индексу, что змейка заняла клетку.
+
+        Args:
+            cell (tuple): Координаты клетки
+        """
+        if self.free_cells is not None:
+            self.free_cells.occupy(cell)
+
+    def release(self, cell):
+        """
+        Сообщает индексу, что змейка освободила клетку.
 
-        while True:
-            x = random.randint(0, (screen_width - self.grid_size) // self.grid_size) * self.grid_size
-            y = random.randint(0, (screen_height - self.grid_size) // self.grid_size) * self.grid_size
-            self.position = (x, y)
+        Args:
+            cell (tuple): Координаты клетки
+        """
+        if self.free_cells is not None:
+            self.free_cells.release(cell)
+
+    def randomize_position(self, snake_positions=None, screen_width=800, screen_height=600):
+        """
+        Случайным образом размещает еду на свободной клетке поля.
+
+        Если для поля этого размера вызван track(), клетка берется из
+        отслеживаемого индекса и snake_positions не используется. Иначе,
+        пока змейка занимает не больше половины поля, клетка выбирается
+        случайными попытками, и только на заполненном поле (или если
+        SAMPLE_ATTEMPTS попыток попали на змейку) по snake_positions
+        строится индекс свободных клеток.
+
+        Args:
+            snake_positions (list): Список позиций змейки для избежания пересечения
+            screen_width (int): Ширина экрана
+            screen_height (int): Высота экрана
 
-            if self.position not in snake_positions:
-                break
+        Returns:
+            bool: False если свободных клеток не осталось (поле заполнено, победа),
+                иначе True
+        """
+        free_cells = self.free_cells
+        if (free_cells is None or free_cells.screen_width != screen_width or
+                free_cells.screen_height != screen_height):
+            occupied = snake_positions
+            if not isinstance(occupied, (set, frozenset)):
+                occupied = set(occupied or ())
+            columns = screen_width // self.grid_size
+            rows = screen_height // self.grid_size
+            if columns and rows and 2 * len(occupied) <= columns * rows:
+                for _ in range(SAMPLE_ATTEMPTS):
+                    cell = (self.rng.randrange(columns) * self.grid_size, self.rng.randrange(rows) * self.grid_size)
+                    if cell not in occupied:
+                        self.position = cell
+                        return True
+            free_cells = FreeCells(self.grid_size, screen_width, screen_height, occupied)
+
+        self.position = free_cells.choice(self.rng)
+        return self.position is not None
 
     def draw(self, surface):
         """
@@ -77,6 +235,9 @@ class Food:
         Args:
             surface: Поверхность Pygame для отрисовки
         """
+        if self.position is None:
+            return
+
         rect = pygame.Rect((self.position[0], self.position[1]), (self.grid_size, self.grid_size))
         pygame.draw.rect(surface, self.color, rect)
         pygame.draw.rect(surface, (255, 255, 255), rect, 1)
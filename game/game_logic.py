@@ -5,17 +5,33 @@
 """
 
 import pygame
+import random
 import time
-from .snake import Snake
-from .food import Food
+from itertools import islice
+from .engine import GameEngine, TurnBuffer, UP, DOWN, LEFT, RIGHT
+from .render import EXPOSE_EVENTS, RenderContext
+from .replay import Replay
+
+# Максимум игровых шагов за один кадр
+MAX_TICKS_PER_FRAME = 5
+
+# Максимум поворотов, ожидающих своего шага
+TURN_BUFFER_SIZE = 3
+
+KEY_ACTIONS = {
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+}
 
 
 class GameLogic:
     """
     Класс основной игровой логики.
 
-    Управляет игровым процессом, обработкой событий, обновлением состояния
-    и отрисовкой игры.
+    Управляет обработкой событий и отрисовкой игры. Правила игры и ее
+    состояние находятся в GameEngine.
 
     Attributes:
         settings (dict): Настройки игры
@@ -23,17 +39,28 @@ class GameLogic:
         screen_width (int): Ширина экрана
         screen_height (int): Высота экрана
         grid_size (int): Размер клетки сетки
+        engine (GameEngine): Игровой движок с состоянием игры
         snake (Snake): Объект змейки
         food (Food): Объект еды
+        turns (TurnBuffer): Введенные повороты, по одному на шаг
+        replay (Replay): Запись игры, сохраняемая вместе с результатом
+        context (RenderContext): Экран и кэши отрисовки, общие для всех раундов
+        screen (pygame.Surface): Поверхность экрана
+        text_cache (TextCache): Кэш шрифтов и текста
+        background (BackgroundCache): Кэш фона с сеткой
+        sprites (SnakeSprites): Плитки сегментов змейки
+        profiler (FrameProfiler or None): Профилировщик кадров (--profile)
     """
 
-    def __init__(self, settings, db_handler):
+    def __init__(self, settings, db_handler, context=None):
         """
         Инициализирует игровую логику.
 
         Args:
             settings (dict): Словарь с настройками игры
             db_handler: Объект для работы с базой данных
+            context (RenderContext): Общий контекст отрисовки, по умолчанию
+                открывается окно размера settings['width'] x settings['height']
         """
         self.settings = settings
         self.db_handler = db_handler
@@ -41,23 +68,54 @@ class GameLogic:
         self.screen_height = settings['height']
         self.grid_size = settings['grid_size']
 
-        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-        pygame.display.set_caption('Snake Game')
+        # Режим экрана не меняется между раундами: окно и кэши берутся из контекста
+        self.context = context if context is not None else RenderContext(self.screen_width, self.screen_height)
+        self.screen = self.context.screen
 
         self.clock = pygame.time.Clock()
-        self.snake = Snake(self.grid_size, settings['snake_color'])
-        self.food = Food(self.grid_size, settings['food_color'])
-        self.food.randomize_position(self.snake.positions, self.screen_width, self.screen_height)
-
-        self.font = pygame.font.Font(None, 36)
+        # Начальное значение генератора известно заранее, чтобы игру можно было воспроизвести
+        seed = random.getrandbits(64)
+        self.engine = GameEngine(self.screen_width, self.screen_height, self.grid_size,
+                                 settings['wall_pass'], settings['snake_color'], settings['food_color'],
+                                 seed=seed)
+        self.replay = Replay(seed, self.screen_width, self.screen_height, self.grid_size, settings['wall_pass'])
+        self.snake = self.engine.snake
+        self.food = self.engine.food
+        self.turns = TurnBuffer(TURN_BUFFER_SIZE)
+
+        self.text_cache = self.context.text_cache
+        self.background = self.context.background
+        self.sprites = self.context.sprites(self.snake.color, self.grid_size)
         self.start_time = time.time()
-        self.food_eaten = 0
-        self.max_length = 3
+
+        # При прохождении сквозь стены на поле, не кратном клетке, змейка
+        # попадает на невыровненные позиции, и клетки перекрываются: такие
+        # кадры всегда перерисовываются целиком
+        self._incremental = settings.get('render_mode', 'full') == 'incremental' and (
+            not settings['wall_pass'] or
+            (self.screen_width % self.grid_size == 0 and self.screen_height % self.grid_size == 0))
+
+        # Состояние последнего кадра для инкрементальной отрисовки
+        self._painted = {}
+        self._painted_length = 0
+        self._painted_tick = None
+        self._painted_food = None
+        self._overlays_drawn = []
+        self._gradient_steps = []
+        self._hud_key = None
+        self._hud = []
+
+        self.profiler = self.context.profiler
+        if self.profiler is not None:
+            self.profiler.instrument(self)
 
     def handle_events(self):
         """
         Обрабатывает события Pygame.
 
+        Повороты не применяются сразу, а ставятся в очередь turns и
+        выполняются по одному на шаг в update().
+
         Returns:
             bool: False если игра должна завершиться, иначе True
         """
@@ -65,91 +123,285 @@ class GameLogic:
             if event.type == pygame.QUIT:
                 return False
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    self.snake.turn((0, -self.grid_size))
-                elif event.key == pygame.K_DOWN:
-                    self.snake.turn((0, self.grid_size))
-                elif event.key == pygame.K_LEFT:
-                    self.snake.turn((-self.grid_size, 0))
-                elif event.key == pygame.K_RIGHT:
-                    self.snake.turn((self.grid_size, 0))
+                action = KEY_ACTIONS.get(event.key)
+                if action is not None:
+                    self.turns.push(action, self.engine.current_action())
                 elif event.key == pygame.K_ESCAPE:
                     return False
         return True
 
     def update(self):
         """
-        Обновляет игровое состояние.
+        Обновляет игровое состояние на один шаг, выполняя очередной поворот.
+
+        Повороты записываются в replay.
 
         Returns:
             bool: False если игра окончена, иначе True
         """
-        # Движение змейки
-        if not self.snake.move(self.settings['wall_pass'], self.screen_width, self.screen_height):
-            return False  # Game over
+        action = self.turns.pop()
+        if action is not None:
+            self.replay.record(self.engine.ticks, action)
+        done, _, _ = self.engine.step(action)
+        return not done
 
-        # Проверка столкновения со стенами (если wall_pass=False)
-        head = self.snake.get_head_position()
-        if not self.settings['wall_pass']:
-            if (head[0] < 0 or head[0] >= self.screen_width or
-                    head[1] < 0 or head[1] >= self.screen_height):
-                return False  # Game over
+    def draw(self, alpha=1.0):
+        """
+        Отрисовывает кадр игры.
 
-        # Проверка поедания еды
-        if head == self.food.position:
-            self.snake.grow()
-            self.food_eaten += 1
-            self.food.randomize_position(self.snake.positions, self.screen_width, self.screen_height)
+        Тело змейки рисуется по клеткам, а голова и освобождающийся хвост
+        сдвигаются между позициями предыдущего и текущего шага на долю alpha,
+        поэтому при частоте кадров выше скорости игры змейка движется плавно.
 
-            # Обновляем максимальную длину
-            current_length = self.snake.get_length()
-            if current_length > self.max_length:
-                self.max_length = current_length
+        В режиме render_mode='incremental' перерисовываются только изменившиеся
+        клетки и HUD, и на экран выводятся только их прямоугольники. Полная
+        перерисовка выполняется на первом кадре, при изменении длины змейки
+        и если с прошлого кадра прошло больше одного шага.
 
-        return True
+        Args:
+            alpha (float): Доля времени от последнего шага до следующего (0..1)
+        """
+        overlays = self._overlays(alpha)
+        if self._incremental:
+            if (self._painted_tick is not None and
+                    self.engine.ticks - self._painted_tick <= 1 and
+                    self.snake.get_length() == self._painted_length):
+                self._draw_incremental(overlays)
+            else:
+                self._draw_full(overlays)
+                self._remember_frame(overlays)
+        else:
+            self._draw_full(overlays)
 
-    def draw(self):
-        self.screen.fill((0, 0, 0))
+    def _lerp(self, start, end, alpha):
+        """
+        Интерполирует позицию сегмента между двумя клетками.
 
-        # Рисуем сетку
-        for x in range(0, self.screen_width, self.grid_size):
-            pygame.draw.line(self.screen, (40, 40, 40), (x, 0), (x, self.screen_height))
-        for y in range(0, self.screen_height, self.grid_size):
-            pygame.draw.line(self.screen, (40, 40, 40), (0, y), (self.screen_width, y))
+        Args:
+            start (tuple): Позиция на предыдущем шаге
+            end (tuple): Позиция на текущем шаге
+            alpha (float): Доля пути от start к end
 
-        # Рисуем змейку и еду
-        self.snake.draw(self.screen)
-        self.food.draw(self.screen)
+        Returns:
+            tuple: Позиция в пикселях
+        """
+        dx = end[0] - start[0]
+        dy = end[1] - start[1]
+        # Переход через стену не интерполируется
+        if alpha >= 1 or abs(dx) > self.grid_size or abs(dy) > self.grid_size:
+            return end
+        return round(start[0] + dx * alpha), round(start[1] + dy * alpha)
+
+    def _overlays(self, alpha):
+        """
+        Возвращает плитки головы и хвоста, сдвинутые между шагами.
 
-        # Динамический размер шрифта в зависимости от разрешения
-        base_font_size = max(24, int(min(self.screen_width, self.screen_height) * 0.02))
-        font = pygame.font.Font(None, base_font_size)
+        Args:
+            alpha (float): Доля времени от последнего шага до следующего
 
+        Returns:
+            list: Пары (tile, position)
+        """
+        snake = self.snake
+        positions = snake.positions
+        length = len(positions)
+        overlays = [(self.sprites.tile(snake.segment_color(0, length)),
+                     self._lerp(positions[1], positions[0], alpha))]
+        if snake.vacated is not None and alpha < 1:
+            overlays.append((self.sprites.tile(snake.segment_color(length - 1, length)),
+                             self._lerp(snake.vacated, positions[-1], alpha)))
+        return overlays
+
+    def _hud_lines(self):
+        """
+        Возвращает строки HUD для текущего состояния.
 
-        score_text = font.render(f'Score: {self.snake.score}', True, (255, 255, 255))
+        Returns:
+            tuple: (font_size, lines) где lines - кортеж (text, color, position)
+        """
+        # Динамический размер шрифта в зависимости от разрешения
+        base_font_size = max(24, int(min(self.screen_width, self.screen_height) * 0.02))
 
         # Отступ рассчитываем как процент от ширины экрана
         padding_x = max(20, int(self.screen_width * 0.02))  # Минимум 20px или 2% ширины
         padding_y = max(10, int(self.screen_height * 0.02))  # Минимум 10px или 2% высоты
+        line_height = base_font_size + 5
 
-        # Позиции текста с отступами
-        self.screen.blit(score_text, (padding_x, padding_y))
+        game_time = int(time.time() - self.start_time)
+        lines = [
+            (f'Score: {self.snake.score}', (255, 255, 255), (padding_x, padding_y)),
+            (f'Length: {self.snake.get_length()}', (255, 255, 255), (padding_x, padding_y + line_height)),
+            (f'Time: {game_time}s', (255, 255, 255), (padding_x, padding_y + line_height * 2)),
+        ]
+        if self.settings['wall_pass']:
+            lines.append(('Wall Pass: ON', (255, 100, 100), (padding_x, padding_y + line_height * 4)))
+        return base_font_size, tuple(lines)
 
-        # Отображаем длину змейки
-        length_text = font.render(f'Length: {self.snake.get_length()}', True, (255, 255, 255))
-        self.screen.blit(length_text, (padding_x, padding_y + base_font_size + 5))
+    def _render_hud(self, hud_lines):
+        """
+        Рендерит строки HUD.
 
-        # Отображаем время игры
-        game_time = int(time.time() - self.start_time)
-        time_text = font.render(f'Time: {game_time}s', True, (255, 255, 255))
-        self.screen.blit(time_text, (padding_x, padding_y + (base_font_size + 5) * 2))
+        Args:
+            hud_lines (tuple): Результат _hud_lines()
 
+        Returns:
+            list: Пары (surface, rect) для вывода на экран
+        """
+        font_size, lines = hud_lines
+        hud = []
+        for text, color, position in lines:
+            surface = self.text_cache.render(text, color, font_size)
+            hud.append((surface, surface.get_rect(topleft=position)))
+        return hud
+
+    def _draw_full(self, overlays):
+        """
+        Полностью перерисовывает кадр и выводит весь экран.
 
-        if self.settings['wall_pass']:
-            wall_text = font.render('Wall Pass: ON', True, (255, 100, 100))
-            self.screen.blit(wall_text, (padding_x, padding_y + (base_font_size + 5) * 4))
+        Args:
+            overlays (list): Плитки головы и хвоста из _overlays()
+        """
+        # Фон с сеткой рисуется один раз и выводится одним вызовом
+        self.screen.blit(self.background.get(self.screen_width, self.screen_height, self.grid_size), (0, 0))
+
+        # Рисуем тело змейки без головы, затем голову и хвост между клетками и еду
+        positions = self.snake.positions
+        tiles = self.sprites.ramp(len(positions))
+        self.screen.blits(zip(islice(tiles, 1, None), islice(positions, 1, None)), doreturn=False)
+        self.screen.blits(overlays, doreturn=False)
+        self.food.draw(self.screen)
 
-        pygame.display.flip()
+        hud_key = self._hud_lines()
+        if hud_key != self._hud_key:
+            self._hud_key = hud_key
+            self._hud = self._render_hud(hud_key)
+        for surface, rect in self._hud:
+            self.screen.blit(surface, rect)
+
+        self._present()
+
+    def _remember_frame(self, overlays):
+        """
+        Запоминает нарисованное состояние после полной перерисовки.
+
+        Args:
+            overlays (list): Нарисованные плитки головы и хвоста
+        """
+        length = self.snake.get_length()
+        self._painted = {p: self.snake.segment_color(i, length)
+                         for i, p in enumerate(islice(self.snake.positions, 1, None), 1)}
+        self._overlays_drawn = overlays
+        if length != self._painted_length:
+            self._gradient_steps = self.snake.gradient_steps(length)
+            self._painted_length = length
+        self._painted_tick = self.engine.ticks
+        self._painted_food = self.food.position
+
+    def _cell_rect(self, cell):
+        """Возвращает прямоугольник клетки."""
+        return pygame.Rect(cell, (self.grid_size, self.grid_size))
+
+    def _draw_incremental(self, overlays):
+        """
+        Перерисовывает только изменившиеся клетки и HUD.
+
+        Args:
+            overlays (list): Плитки головы и хвоста из _overlays()
+        """
+        dirty = []
+
+        # Змейка сдвинулась на одну клетку: бывшая голова стала клеткой тела,
+        # хвост освободил клетку, у части сегментов сменился цвет градиента
+        if self.engine.ticks != self._painted_tick:
+            snake = self.snake
+            positions = snake.positions
+            length = self._painted_length
+            if snake.vacated is not None:
+                self._painted.pop(snake.vacated, None)
+                dirty.append(self._cell_rect(snake.vacated))
+            self._painted[positions[1]] = snake.segment_color(1, length)
+            dirty.append(self._cell_rect(positions[1]))
+            for i in self._gradient_steps:
+                self._painted[positions[i]] = snake.segment_color(i, length)
+                dirty.append(self._cell_rect(positions[i]))
+            self._painted_tick = self.engine.ticks
+
+        if overlays != self._overlays_drawn:
+            for _, position in self._overlays_drawn:
+                dirty.append(self._cell_rect(position))
+            for _, position in overlays:
+                dirty.append(self._cell_rect(position))
+            self._overlays_drawn = overlays
+
+        if self.food.position != self._painted_food:
+            for cell in (self._painted_food, self.food.position):
+                if cell is not None:
+                    dirty.append(self._cell_rect(cell))
+            self._painted_food = self.food.position
+
+        hud_key = self._hud_lines()
+        if hud_key != self._hud_key:
+            dirty.extend(rect for _, rect in self._hud)
+            self._hud_key = hud_key
+            self._hud = self._render_hud(hud_key)
+            dirty.extend(rect for _, rect in self._hud)
+
+        self._present([self._repaint(rect) for rect in dirty])
+
+    def _present(self, rects=None):
+        """
+        Выводит нарисованный кадр на экран.
+
+        Args:
+            rects (list or None): Изменившиеся области, None - весь экран
+        """
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def _repaint(self, rect):
+        """
+        Перерисовывает область экрана по запомненному состоянию кадра.
+
+        Область расширяется до целых клеток, чтобы сегменты и еда рисовались
+        целиком, а голова, хвост и HUD выводятся с отсечением по области.
+
+        Args:
+            rect (pygame.Rect): Область для перерисовки
+
+        Returns:
+            pygame.Rect: Фактически перерисованная область
+        """
+        screen = self.screen
+        grid_size = self.grid_size
+        left = rect.left - rect.left % grid_size
+        top = rect.top - rect.top % grid_size
+        right = -(-rect.right // grid_size) * grid_size
+        bottom = -(-rect.bottom // grid_size) * grid_size
+        area = pygame.Rect(left, top, right - left, bottom - top)
+
+        background = self.background.get(self.screen_width, self.screen_height, grid_size)
+        screen.blit(background, area, area)
+
+        # Сегменты змейки, голова и хвост между клетками, еда и HUD поверх них.
+        # Клетки и еда целиком внутри области, остальное отсекается по ней
+        screen.set_clip(area)
+        for y in range(top, bottom, grid_size):
+            for x in range(left, right, grid_size):
+                color = self._painted.get((x, y))
+                if color is not None:
+                    screen.blit(self.sprites.tile(color), (x, y))
+        for tile, position in self._overlays_drawn:
+            if area.colliderect(self._cell_rect(position)):
+                screen.blit(tile, position)
+        if self.food.position is not None and area.colliderect(self._cell_rect(self.food.position)):
+            self.food.draw(screen)
+        for surface, hud_rect in self._hud:
+            if area.colliderect(hud_rect):
+                screen.blit(surface, hud_rect)
+        screen.set_clip(None)
+        return area
 
     def show_game_over(self, player_name):
         """
@@ -162,23 +414,29 @@ class GameLogic:
             bool: True если игра должна продолжиться, False для выхода
         """
         game_duration = int(time.time() - self.start_time)
+        self.replay.ticks = self.engine.ticks
 
-        # Сохраняем результаты в базу данных
+        # Сохраняем результаты в базу данных в фоне, не задерживая экран
         settings_data = {
             'speed': self.settings['speed'],
             'wall_pass': self.settings['wall_pass'],
             'snake_color': self.settings['snake_color'],
-            'food_color': self.settings['food_color']
+            'food_color': self.settings['food_color'],
+            # Поле сверяется с заголовком записи игры при проверке рекорда
+            'width': self.screen_width,
+            'height': self.screen_height,
+            'grid_size': self.grid_size
         }
 
-        self.db_handler.save_game_session(
+        self.db_handler.queue_game_session(
             player_name=player_name,
             score=self.snake.score,
             game_duration=game_duration,
             settings=settings_data,
-            food_eaten=self.food_eaten,
-            max_length=self.max_length,
-            walls_passed=self.settings['wall_pass']
+            food_eaten=self.engine.food_eaten,
+            max_length=self.engine.max_length,
+            walls_passed=self.settings['wall_pass'],
+            replay=self.replay.to_bytes()
         )
 
         # Отображаем экран завершения игры
@@ -187,14 +445,15 @@ class GameLogic:
         overlay.fill((0, 0, 0))
         self.screen.blit(overlay, (0, 0))
 
-        font_large = pygame.font.Font(None, 74)
-        font_medium = pygame.font.Font(None, 48)
-
-        game_over = font_large.render('GAME OVER', True, (255, 0, 0))
-        score_text = font_medium.render(f'Final Score: {self.snake.score}', True, (255, 255, 255))
-        length_text = font_medium.render(f'Max Length: {self.max_length}', True, (255, 255, 255))
-        time_text = font_medium.render(f'Time: {game_duration}s', True, (255, 255, 255))
-        continue_text = font_medium.render('Press ENTER to continue', True, (128, 128, 128))
+        text = self.text_cache.render
+        if self.engine.won:
+            game_over = text('YOU WIN!', (0, 255, 0), 74)
+        else:
+            game_over = text('GAME OVER', (255, 0, 0), 74)
+        score_text = text(f'Final Score: {self.snake.score}', (255, 255, 255), 48)
+        length_text = text(f'Max Length: {self.engine.max_length}', (255, 255, 255), 48)
+        time_text = text(f'Time: {game_duration}s', (255, 255, 255), 48)
+        continue_text = text('Press ENTER to continue', (128, 128, 128), 48)
 
         self.screen.blit(game_over, (self.screen_width // 2 - game_over.get_width() // 2, 150))
         self.screen.blit(score_text, (self.screen_width // 2 - score_text.get_width() // 2, 250))
@@ -204,44 +463,75 @@ class GameLogic:
 
         pygame.display.flip()
 
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    waiting = False
+        # Экран не меняется: спим до нажатия клавиши
+        while True:
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                return False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_RETURN:
+                    return True
+                elif event.key == pygame.K_ESCAPE:
                     return False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN:
-                        waiting = False
-                        return True
-                    elif event.key == pygame.K_ESCAPE:
-                        waiting = False
-                        return False
-            self.clock.tick(30)
+            elif event.type in EXPOSE_EVENTS:
+                pygame.display.flip()
+
+    def _frame_rate(self):
+        """
+        Возвращает частоту кадров отрисовки и опроса ввода.
+
+        Частоту обновления рабочего стола сообщает только
+        pygame.display.get_desktop_refresh_rates (есть в pygame-ce, нет в
+        pygame 2.6), без нее используется 60.
+
+        Returns:
+            float: Значение --fps, а если оно не задано - частота обновления
+                основного дисплея или 60
+        """
+        if self.settings.get('fps', 0) > 0:
+            return self.settings['fps']
+        get_refresh_rates = getattr(pygame.display, 'get_desktop_refresh_rates', None)
+        if get_refresh_rates is not None:
+            rates = get_refresh_rates()
+            if rates and rates[0] > 0:
+                return rates[0]
+        return 60
 
     def run(self, player_name):
         """
         Запускает главный игровой цикл.
 
+        Игровая логика выполняется с фиксированным шагом settings['speed']
+        шагов в секунду, а ввод и отрисовка - с частотой кадров _frame_rate().
+        Между шагами голова и хвост змейки интерполируются.
+
         Args:
             player_name (str): Имя игрока
 
         Returns:
             bool: True если игра должна продолжиться с новым раундом, False для выхода в меню
         """
-        running = True
-        game_active = True
+        tick_time = 1.0 / self.settings['speed']
+        frame_rate = self._frame_rate()
+        previous = time.perf_counter()
+        lag = 0.0
 
-        while running:
-            if game_active:
-                running = self.handle_events()
-                if running:
-                    game_active = self.update()
+        while True:
+            if not self.handle_events():
+                return False
+
+            # После долгой паузы (перетаскивание окна и т.п.) не догоняем
+            # пропущенное время лавиной шагов
+            now = time.perf_counter()
+            lag = min(lag + now - previous, tick_time * MAX_TICKS_PER_FRAME)
+            previous = now
+
+            while lag >= tick_time:
+                lag -= tick_time
+                if not self.update():
+                    # Игра завершена
                     self.draw()
-                    self.clock.tick(self.settings['speed'])
-            else:
-                # Игра завершена
-                continue_game = self.show_game_over(player_name)
-                return continue_game
+                    return self.show_game_over(player_name)
 
-        return False
+            self.draw(lag / tick_time)
+            self.clock.tick(frame_rate)
@@ -7,43 +7,58 @@
 import pygame
 import sys
 
+from .render import EXPOSE_EVENTS
+
+# Сколько ждать события, прежде чем проверить таблицу рекордов (мс)
+IDLE_TIMEOUT = 1000
+
 
 class Menu:
     """
     Класс для управления игровым меню.
 
     Attributes:
+        context (RenderContext): Экран и кэши отрисовки
         screen: Поверхность Pygame для отрисовки
         db_handler: Обработчик базы данных
+        text_cache (TextCache): Кэш шрифтов и текста
         font_large: Шрифт для крупного текста
         font_medium: Шрифт для среднего текста
         font_small: Шрифт для мелкого текста
+        large_size (int): Размер крупного шрифта
+        medium_size (int): Размер среднего шрифта
+        small_size (int): Размер мелкого шрифта
         selected_option (int): Индекс выбранной опции меню
         options (list): Список доступных опций меню
         player_name (str): Текущее имя игрока
         name_input_active (bool): Флаг активности ввода имени
     """
 
-    def __init__(self, screen, db_handler, default_player_name="Player"):
+    def __init__(self, context, db_handler, default_player_name="Player"):
         """
         Инициализирует меню.
 
         Args:
-            screen: Поверхность Pygame для отрисовки
+            context (RenderContext): Общий контекст отрисовки
             db_handler: Обработчик базы данных
             default_player_name (str): Имя игрока по умолчанию
         """
-        self.screen = screen
+        self.context = context
+        self.screen = context.screen
         self.db_handler = db_handler
+        self.text_cache = context.text_cache
 
         # Получаем размеры экрана
-        self.screen_width = screen.get_width()
-        self.screen_height = screen.get_height()
+        self.screen_width = context.width
+        self.screen_height = context.height
 
         # Используем адаптивные размеры шрифтов
-        self.font_large = pygame.font.Font(None, int(self.screen_height * 0.1))    # 10% высоты
-        self.font_medium = pygame.font.Font(None, int(self.screen_height * 0.06))  # 6% высоты
-        self.font_small = pygame.font.Font(None, int(self.screen_height * 0.04))   # 4% высоты
+        self.large_size = int(self.screen_height * 0.1)    # 10% высоты
+        self.medium_size = int(self.screen_height * 0.06)  # 6% высоты
+        self.small_size = int(self.screen_height * 0.04)   # 4% высоты
+        self.font_large = self.text_cache.font(self.large_size)
+        self.font_medium = self.text_cache.font(self.medium_size)
+        self.font_small = self.text_cache.font(self.small_size)
 
         self.selected_option = 0
         self.options = ["Start Game", "High Scores", "Exit"]
@@ -58,18 +73,18 @@ class Menu:
         center_x = self.screen_width // 2
 
         # Заголовок (10% от верха экрана)
-        title = self.font_large.render("SNAKE GAME", True, (0, 255, 0))
+        title = self.text_cache.render("SNAKE GAME", (0, 255, 0), self.large_size)
         title_rect = title.get_rect(center=(center_x, self.screen_height * 0.15))
         self.screen.blit(title, title_rect)
 
         # Имя игрока (25% от верха экрана)
         name_color = (255, 255, 0) if self.name_input_active else (255, 255, 255)
-        name_text = self.font_small.render(f"Player: {self.player_name}", True, name_color)
+        name_text = self.text_cache.render(f"Player: {self.player_name}", name_color, self.small_size)
         name_rect = name_text.get_rect(center=(center_x, self.screen_height * 0.25))
         self.screen.blit(name_text, name_rect)
 
         if self.name_input_active:
-            hint_text = self.font_small.render("Type your name and press ENTER", True, (128, 128, 255))
+            hint_text = self.text_cache.render("Type your name and press ENTER", (128, 128, 255), self.small_size)
             hint_rect = hint_text.get_rect(center=(center_x, self.screen_height * 0.30))
             self.screen.blit(hint_text, hint_rect)
 
@@ -79,35 +94,43 @@ class Menu:
 
         for i, option in enumerate(self.options):
             color = (0, 255, 0) if i == self.selected_option else (255, 255, 255)
-            text = self.font_medium.render(option, True, color)
+            text = self.text_cache.render(option, color, self.medium_size)
             text_rect = text.get_rect(center=(center_x, option_start_y + i * option_spacing))
             self.screen.blit(text, text_rect)
 
         # Управление (85% от верха экрана)
         controls_text = "Use ARROW KEYS to navigate, ENTER to select, N to change name"
-        controls = self.font_small.render(controls_text, True, (128, 128, 128))
+        controls = self.text_cache.render(controls_text, (128, 128, 128), self.small_size)
         controls_rect = controls.get_rect(center=(center_x, self.screen_height * 0.85))
         self.screen.blit(controls, controls_rect)
 
         pygame.display.flip()
 
-    def draw_high_scores(self):
-        """Отрисовывает экран с таблицей рекордов."""
+    def draw_high_scores(self, high_scores=None):
+        """
+        Отрисовывает экран с таблицей рекордов.
+
+        Args:
+            high_scores (list): Рекорды, по умолчанию читаются из db_handler
+        """
         self.screen.fill((0, 0, 0))
 
         # Центр экрана
         center_x = self.screen_width // 2
 
         # Заголовок
-        title = self.font_large.render("HIGH SCORES", True, (255, 215, 0))
+        title = self.text_cache.render("HIGH SCORES", (255, 215, 0), self.large_size)
         title_rect = title.get_rect(center=(center_x, self.screen_height * 0.10))
         self.screen.blit(title, title_rect)
 
         # Получаем рекорды из базы данных
-        high_scores = self.db_handler.get_high_scores(10)
+        if high_scores is None:
+            high_scores = self.db_handler.get_high_scores(10)
 
         if not high_scores:
-            no_scores = self.font_medium.render("No games played yet!", True, (255, 255, 255))
+            # Пока хранилище подключается, рекорды еще не известны
+            message = "Loading high scores..." if self.db_handler.connecting else "No games played yet!"
+            no_scores = self.text_cache.render(message, (255, 255, 255), self.medium_size)
             no_scores_rect = no_scores.get_rect(center=(center_x, self.screen_height * 0.30))
             self.screen.blit(no_scores, no_scores_rect)
         else:
@@ -116,12 +139,12 @@ class Menu:
 
             for i, (player, score, duration, date) in enumerate(high_scores):
                 score_text = f"{i + 1}. {player}: {score} pts - {duration}s"
-                text = self.font_small.render(score_text, True, (255, 255, 255))
+                text = self.text_cache.render(score_text, (255, 255, 255), self.small_size)
                 text_rect = text.get_rect(center=(center_x, start_y + i * row_spacing))
                 self.screen.blit(text, text_rect)
 
         # Кнопка возврата (90% от верха экрана)
-        back_text = self.font_medium.render("Press ESC to return", True, (128, 128, 128))
+        back_text = self.text_cache.render("Press ESC to return", (128, 128, 128), self.medium_size)
         back_rect = back_text.get_rect(center=(center_x, self.screen_height * 0.90))
         self.screen.blit(back_text, back_rect)
 
@@ -146,6 +169,11 @@ class Menu:
         """
         Запускает главный цикл меню.
 
+        Цикл спит в ожидании событий и перерисовывает экран, только когда
+        меняется выбранная опция, имя игрока, открытый экран или таблица
+        рекордов. Без ввода таблица рекордов проверяется раз в IDLE_TIMEOUT,
+        поэтому она появляется, как только хранилище подключится в фоне.
+
         Returns:
             tuple: (player_name, game_started) где:
                 player_name (str): Имя игрока
@@ -154,13 +182,32 @@ class Menu:
         running = True
         game_started = False
         show_high_scores = False
+        drawn = None
 
         while running:
-            for event in pygame.event.get():
+            # Состояние подключения читается до рекордов: если подключение
+            # завершится между ними, экран обновится на следующей проверке
+            connecting = show_high_scores and self.db_handler.connecting
+            high_scores = self.db_handler.get_high_scores(10) if show_high_scores else None
+            view = (show_high_scores, self.selected_option, self.name_input_active, self.player_name,
+                    high_scores, connecting)
+            if view != drawn:
+                if show_high_scores:
+                    self.draw_high_scores(high_scores)
+                else:
+                    self.draw_main_menu()
+                drawn = view
+
+            first = pygame.event.wait(IDLE_TIMEOUT)
+            for event in [first] + pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                     return None, False
 
+                if event.type in EXPOSE_EVENTS:
+                    drawn = None
+                    continue
+
                 if self.name_input_active:
                     if event.type == pygame.KEYDOWN:
                         self.handle_name_input(event)
@@ -188,9 +235,4 @@ class Menu:
                         elif event.key == pygame.K_n:
                             self.name_input_active = True
 
-            if show_high_scores:
-                self.draw_high_scores()
-            else:
-                self.draw_main_menu()
-
         return self.player_name, game_started
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""
+Модуль профилирования кадров игры.
+
+FrameProfiler измеряет время обработки событий, шага игры, отрисовки и
+вывода кадра на экран монотонными часами perf_counter_ns и накапливает
+его в гистограммах с логарифмическими корзинами (как HDR Histogram): память
+под корзины выделяется один раз, запись значения - вычисление индекса и
+увеличение счетчика. Процентили показываются поверх игры и сохраняются в
+отчет JSON или CSV.
+
+Профилировщик подключается заменой методов GameLogic обертками с
+замером времени, поэтому без --profile игра не выполняет ни одной
+лишней проверки.
+"""
+
+import csv
+import json
+import math
+from array import array
+from time import perf_counter, perf_counter_ns
+
+import pygame
+
+# Корзин на каждую степень двойки: относительная погрешность не больше 1/32
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Значения до 2**36 нс (около 68 секунд), большие попадают в последнюю корзину
+MAX_VALUE_BITS = 36
+BUCKETS = (MAX_VALUE_BITS - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+
+# Замеряемые участки кадра: frame - полное время кадра вместе с ожиданием
+SECTIONS = ('events', 'update', 'draw', 'flip', 'frame')
+
+# Как часто перерисовывать таблицу поверх игры, секунды
+OVERLAY_INTERVAL = 0.5
+OVERLAY_COLOR = (255, 255, 0)
+OVERLAY_BACKGROUND = (0, 0, 0)
+OVERLAY_FONT_SIZE = 20
+
+
+def bucket_index(value):
+    """
+    Возвращает номер корзины для значения.
+
+    Значения меньше 2 * SUB_BUCKETS хранятся точно, дальше каждая степень
+    двойки делится на SUB_BUCKETS равных корзин.
+
+    Args:
+        value (int): Неотрицательное значение
+
+    Returns:
+        int: Номер корзины от 0 до BUCKETS - 1
+    """
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    if shift <= 0:
+        return value
+    index = shift * SUB_BUCKETS + (value >> shift)
+    return index if index < BUCKETS else BUCKETS - 1
+
+
+def bucket_value(index):
+    """
+    Возвращает наименьшее значение, попадающее в корзину.
+
+    Args:
+        index (int): Номер корзины
+
+    Returns:
+        int: Нижняя граница корзины
+    """
+    shift = index // SUB_BUCKETS - 1
+    if shift <= 0:
+        return index
+    return (index - shift * SUB_BUCKETS) << shift
+
+
+class LatencyHistogram:
+    """
+    Гистограмма длительностей в наносекундах.
+
+    Attributes:
+        counts (array): Количество значений в каждой корзине
+        count (int): Количество значений
+        total (int): Сумма значений
+        maximum (int): Наибольшее значение
+    """
+
+    def __init__(self):
+        """Создает пустую гистограмму."""
+        self.counts = array('Q', bytes(8 * BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    def record(self, value):
+        """
+        Добавляет значение.
+
+        Args:
+            value (int): Длительность в наносекундах
+        """
+        if value < 0:
+            value = 0
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def percentile(self, percent):
+        """
+        Возвращает процентиль.
+
+        Args:
+            percent (float): Процент от 0 до 100
+
+        Returns:
+            int: Верхняя граница корзины, в которую попадает процентиль,
+                но не больше maximum; 0 для пустой гистограммы
+        """
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bucket_value(index + 1) - 1, self.maximum)
+        return self.maximum
+
+    def mean(self):
+        """
+        Возвращает среднее значение.
+
+        Returns:
+            float: Среднее или 0.0 для пустой гистограммы
+        """
+        return self.total / self.count if self.count else 0.0
+
+    def buckets(self):
+        """
+        Возвращает непустые корзины.
+
+        Returns:
+            list: Пары (нижняя граница, количество)
+        """
+        return [(bucket_value(index), count) for index, count in enumerate(self.counts) if count]
+
+
+class FrameProfiler:
+    """
+    Класс профилировщика кадров GameLogic.
+
+    Время участков считается без вложенных замеров: вывод кадра
+    (flip) вызывается из отрисовки (draw), но в draw не входит.
+
+    Attributes:
+        histograms (dict): LatencyHistogram по имени участка из SECTIONS
+    """
+
+    def __init__(self):
+        """Создает профилировщик с пустыми гистограммами."""
+        self.histograms = {name: LatencyHistogram() for name in SECTIONS}
+        # Время вложенных замеров текущего участка
+        self._nested = 0
+        self._frame_start = None
+        self._overlay = None
+        self._overlay_time = None
+
+    def _timed(self, name, func):
+        """
+        Оборачивает функцию замером ее собственного времени.
+
+        Args:
+            name (str): Участок из SECTIONS
+            func (callable): Замеряемая функция
+
+        Returns:
+            callable: Обертка с теми же аргументами и результатом
+        """
+        record = self.histograms[name].record
+
+        def timed(*args, **kwargs):
+            outer = self._nested
+            self._nested = 0
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                record(elapsed - self._nested)
+                self._nested = outer + elapsed
+        return timed
+
+    def instrument(self, game):
+        """
+        Подключает замеры к игре, заменяя ее методы обертками.
+
+        Args:
+            game (GameLogic): Игра
+        """
+        handle_events = self._timed('events', game.handle_events)
+        self._frame_start = None
+        record_frame = self.histograms['frame'].record
+
+        def events_with_frame():
+            # Кадр - промежуток между началами обработки событий
+            now = perf_counter_ns()
+            if self._frame_start is not None:
+                record_frame(now - self._frame_start)
+            self._frame_start = now
+            return handle_events()
+
+        present = self._timed('flip', game._present)
+
+        def present_with_overlay(rects=None):
+            overlay_rect = self.draw_overlay(game.screen, game.text_cache)
+            if rects is not None:
+                rects = list(rects)
+                rects.append(overlay_rect)
+            present(rects)
+
+        game.handle_events = events_with_frame
+        game.update = self._timed('update', game.update)
+        game.draw = self._timed('draw', game.draw)
+        game._present = present_with_overlay
+
+    def summary(self):
+        """
+        Возвращает сводку по участкам.
+
+        Returns:
+            dict: По имени участка словарь count, mean_ms, p50_ms, p90_ms,
+                p99_ms, max_ms
+        """
+        summary = {}
+        for name, histogram in self.histograms.items():
+            summary[name] = {
+                'count': histogram.count,
+                'mean_ms': histogram.mean() / 1e6,
+                'p50_ms': histogram.percentile(50) / 1e6,
+                'p90_ms': histogram.percentile(90) / 1e6,
+                'p99_ms': histogram.percentile(99) / 1e6,
+                'max_ms': histogram.maximum / 1e6,
+            }
+        return summary
+
+    def draw_overlay(self, surface, text_cache):
+        """
+        Выводит таблицу p50/p99/max по участкам в правом верхнем углу.
+
+        Таблица пересчитывается раз в OVERLAY_INTERVAL, а между пересчетами
+        выводится готовая поверхность.
+
+        Args:
+            surface (pygame.Surface): Экран
+            text_cache (TextCache): Кэш шрифтов
+
+        Returns:
+            pygame.Rect: Область экрана, занятая таблицей
+        """
+        now = perf_counter()
+        if self._overlay is None or now - self._overlay_time >= OVERLAY_INTERVAL:
+            self._overlay = self._render_overlay(text_cache.font(OVERLAY_FONT_SIZE))
+            self._overlay_time = now
+        rect = self._overlay.get_rect(topright=(surface.get_width(), 0))
+        surface.blit(self._overlay, rect)
+        return rect
+
+    def _render_overlay(self, font):
+        """Рисует таблицу процентилей на новой поверхности."""
+        lines = ['section    p50    p99    max ms']
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<7}{stats['p50_ms']:7.2f}{stats['p99_ms']:7.2f}{stats['max_ms']:7.2f}")
+        rendered = [font.render(line, True, OVERLAY_COLOR) for line in lines]
+        # Ширина постоянна: таблица целиком закрывает предыдущую
+        width = font.size('M' * len(lines[0]))[0]
+        overlay = pygame.Surface((width, font.get_linesize() * len(lines)))
+        overlay.fill(OVERLAY_BACKGROUND)
+        for i, line in enumerate(rendered):
+            overlay.blit(line, (0, i * font.get_linesize()))
+        return overlay
+
+    def dump(self, path):
+        """
+        Сохраняет отчет: CSV для файлов .csv, иначе JSON с корзинами гистограмм.
+
+        Args:
+            path (str): Путь к файлу отчета
+        """
+        summary = self.summary()
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='') as report:
+                writer = csv.writer(report)
+                writer.writerow(['section', 'count', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'])
+                for name, stats in summary.items():
+                    writer.writerow([name, stats['count'], stats['mean_ms'], stats['p50_ms'],
+                                     stats['p90_ms'], stats['p99_ms'], stats['max_ms']])
+            return
+
+        report = {name: dict(stats, buckets_ns=self.histograms[name].buckets())
+                  for name, stats in summary.items()}
+        with open(path, 'w') as output:
+            json.dump(report, output, indent=2)
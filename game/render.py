@@ -0,0 +1,300 @@
+"""
+Модуль кэшей отрисовки.
+
+Содержит заранее отрисованные слои, которые не меняются от кадра к кадру
+и поэтому выводятся на экран одним вызовом blit, кэш шрифтов и
+отрендеренного текста, а также контекст отрисовки, в котором эти кэши и
+окно живут все время работы игры.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+from .snake import gradient_color
+
+BACKGROUND_COLOR = (0, 0, 0)
+GRID_COLOR = (40, 40, 40)
+OUTLINE_COLOR = (255, 255, 255)
+
+# События, после которых содержимое окна нужно вывести заново
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
+
+
+class BackgroundCache:
+    """
+    Кэш фона игрового поля с сеткой.
+
+    Фон рисуется один раз для каждого сочетания размера экрана и размера
+    клетки и перестраивается только при их изменении.
+
+    Attributes:
+        surface (pygame.Surface or None): Отрисованный фон
+        key (tuple or None): (width, height, grid_size) для которого построен фон
+    """
+
+    def __init__(self):
+        """Инициализирует пустой кэш."""
+        self.surface = None
+        self.key = None
+
+    def get(self, width, height, grid_size):
+        """
+        Возвращает фон с сеткой, при необходимости перестраивая его.
+
+        Args:
+            width (int): Ширина экрана
+            height (int): Высота экрана
+            grid_size (int): Размер клетки сетки
+
+        Returns:
+            pygame.Surface: Фон размера width x height
+        """
+        key = (width, height, grid_size)
+        if key != self.key:
+            self.surface = self._build(width, height, grid_size)
+            self.key = key
+        return self.surface
+
+    def _build(self, width, height, grid_size):
+        """
+        Рисует фон с сеткой.
+
+        Args:
+            width (int): Ширина экрана
+            height (int): Высота экрана
+            grid_size (int): Размер клетки сетки
+
+        Returns:
+            pygame.Surface: Новый фон
+        """
+        surface = pygame.Surface((width, height))
+        if pygame.display.get_surface() is not None:
+            # Формат пикселей экрана ускоряет последующие blit
+            surface = surface.convert()
+
+        surface.fill(BACKGROUND_COLOR)
+        for x in range(0, width, grid_size):
+            pygame.draw.line(surface, GRID_COLOR, (x, 0), (x, height))
+        for y in range(0, height, grid_size):
+            pygame.draw.line(surface, GRID_COLOR, (0, y), (width, y))
+        return surface
+
+
+class TextCache:
+    """
+    Кэш шрифтов и отрендеренного текста.
+
+    Шрифты создаются один раз для каждого размера, а поверхности текста
+    хранятся по ключу (text, color, size) с вытеснением давно не
+    использованных (LRU).
+
+    Attributes:
+        max_entries (int): Максимальное количество поверхностей текста
+        fonts (dict): Шрифты по размеру
+        surfaces (OrderedDict): Поверхности текста в порядке использования
+    """
+
+    def __init__(self, max_entries=256):
+        """
+        Инициализирует пустой кэш.
+
+        Args:
+            max_entries (int): Максимальное количество поверхностей текста
+        """
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def font(self, size):
+        """
+        Возвращает шрифт по умолчанию заданного размера.
+
+        Args:
+            size (int): Размер шрифта
+
+        Returns:
+            pygame.font.Font: Шрифт
+        """
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, text, color, size):
+        """
+        Возвращает сглаженную поверхность текста.
+
+        Повторные вызовы с теми же аргументами не рендерят текст заново.
+        Возвращаемую поверхность нельзя изменять: она общая для всех вызовов.
+
+        Args:
+            text (str): Текст
+            color (tuple): RGB цвет текста
+            size (int): Размер шрифта
+
+        Returns:
+            pygame.Surface: Поверхность с текстом
+        """
+        key = (text, color, size)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = self.surfaces[key] = self.font(size).render(text, True, color)
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+class SnakeSprites:
+    """
+    Атлас плиток сегментов змейки.
+
+    Для каждого цвета градиента змейки заранее рисуется плитка клетки с
+    обводкой, поэтому тело выводится одним вызовом Surface.blits вместо
+    двух вызовов draw.rect на сегмент.
+
+    Attributes:
+        color (tuple): Базовый RGB цвет змейки
+        grid_size (int): Размер клетки сетки
+        atlas (pygame.Surface): Поверхность со всеми плитками градиента в ряд
+        tiles (dict): Плитки по RGB цвету
+    """
+
+    # Шаг перебора яркости меньше шага одного уровня канала (1/255),
+    # поэтому перебор попадает на каждый цвет градиента
+    RAMP_STEPS = 1024
+
+    def __init__(self, color, grid_size):
+        """
+        Рисует атлас плиток для всех цветов градиента.
+
+        Args:
+            color (tuple): Базовый RGB цвет змейки
+            grid_size (int): Размер клетки сетки
+        """
+        self.color = color
+        self.grid_size = grid_size
+        self.tiles = {}
+        self._ramp_length = None
+        self._ramp = []
+
+        colors = []
+        for step in range(self.RAMP_STEPS // 2, self.RAMP_STEPS + 1):
+            ramp_color = gradient_color(color, step, self.RAMP_STEPS)
+            if not colors or colors[-1] != ramp_color:
+                colors.append(ramp_color)
+
+        self.atlas = self._new_surface((grid_size * len(colors), grid_size))
+        for i, ramp_color in enumerate(colors):
+            tile = self.atlas.subsurface((i * grid_size, 0, grid_size, grid_size))
+            self._paint(tile, ramp_color)
+            self.tiles[ramp_color] = tile
+
+    def _new_surface(self, size):
+        """Создает поверхность в формате пикселей экрана, если он открыт."""
+        surface = pygame.Surface(size)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+    def _paint(self, tile, color):
+        """Рисует клетку сегмента: заливка и обводка."""
+        tile.fill(color)
+        pygame.draw.rect(tile, OUTLINE_COLOR, tile.get_rect(), 1)
+
+    def tile(self, color):
+        """
+        Возвращает плитку сегмента заданного цвета.
+
+        Цвета вне атласа (на стыке уровней разных каналов) дорисовываются
+        и запоминаются при первом обращении.
+
+        Args:
+            color (tuple): RGB цвет сегмента
+
+        Returns:
+            pygame.Surface: Плитка размера grid_size x grid_size
+        """
+        tile = self.tiles.get(color)
+        if tile is None:
+            tile = self.tiles[color] = self._new_surface((self.grid_size, self.grid_size))
+            self._paint(tile, color)
+        return tile
+
+    def ramp(self, length):
+        """
+        Возвращает плитки для всех сегментов змейки заданной длины.
+
+        Список пересчитывается только при изменении длины.
+
+        Args:
+            length (int): Длина змейки
+
+        Returns:
+            list: Плитки по номеру сегмента, 0 - голова
+        """
+        if length != self._ramp_length:
+            self._ramp = [self.tile(gradient_color(self.color, i, length)) for i in range(length)]
+            self._ramp_length = length
+        return self._ramp
+
+
+class RenderContext:
+    """
+    Контекст отрисовки, общий для меню и всех раундов.
+
+    Создается один раз при запуске игры: режим экрана устанавливается
+    только здесь, поэтому новый раунд не переключает полноэкранный режим и
+    не создает заново шрифты, фон с сеткой и плитки змейки.
+
+    Attributes:
+        screen (pygame.Surface): Поверхность экрана
+        width (int): Ширина экрана
+        height (int): Высота экрана
+        fullscreen (bool): Полноэкранный режим
+        text_cache (TextCache): Кэш шрифтов и текста
+        background (BackgroundCache): Кэш фона с сеткой
+        profiler (FrameProfiler or None): Профилировщик кадров (--profile)
+    """
+
+    def __init__(self, width=0, height=0, fullscreen=False, profiler=None):
+        """
+        Открывает окно или включает полноэкранный режим.
+
+        Args:
+            width (int): Ширина окна, в полноэкранном режиме не используется
+            height (int): Высота окна, в полноэкранном режиме не используется
+            fullscreen (bool): Полноэкранный режим с разрешением дисплея
+            profiler (FrameProfiler): Профилировщик, подключаемый к каждому раунду
+        """
+        if fullscreen:
+            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.screen = pygame.display.set_mode((width, height))
+        pygame.display.set_caption('Snake Game')
+        self.width, self.height = self.screen.get_size()
+        self.fullscreen = fullscreen
+        self.text_cache = TextCache()
+        self.background = BackgroundCache()
+        self.profiler = profiler
+        self._sprites = {}
+
+    def sprites(self, color, grid_size):
+        """
+        Возвращает плитки змейки, рисуя их при первом обращении.
+
+        Args:
+            color (tuple): Базовый RGB цвет змейки
+            grid_size (int): Размер клетки сетки
+
+        Returns:
+            SnakeSprites: Плитки сегментов
+        """
+        key = (color, grid_size)
+        sprites = self._sprites.get(key)
+        if sprites is None:
+            sprites = self._sprites[key] = SnakeSprites(color, grid_size)
+        return sprites
@@ -0,0 +1,242 @@
+"""
+Модуль записи и воспроизведения игр.
+
+Игра полностью определяется начальным значением генератора случайных
+чисел, размерами поля и поворотами змейки, поэтому запись хранит только
+их: заголовок фиксированного размера и поток событий (шаг, поворот).
+Каждое событие кодируется одним целым (разность шагов << 2 | поворот) в
+формате varint и обычно занимает один байт.
+
+ReplayPlayer восстанавливает игру теми же правилами GameEngine без
+дисплея и таймера, поэтому запись проигрывается с максимальной скоростью,
+а переход к произвольному шагу начинается с ближайшего снимка состояния.
+"""
+
+import bisect
+import struct
+
+from .engine import GameEngine
+
+REPLAY_MAGIC = b'SNKR'
+REPLAY_VERSION = 1
+
+# Через сколько шагов проигрыватель сохраняет снимок состояния
+SNAPSHOT_INTERVAL = 1000
+
+# magic, версия, флаги, seed, ширина, высота, клетка, шагов, событий
+_HEADER = struct.Struct('>4sBBQHHHII')
+_WALL_PASS = 1
+
+
+class Replay:
+    """
+    Класс записи игры.
+
+    Attributes:
+        seed (int): Начальное значение генератора случайных чисел игры
+        width (int): Ширина поля
+        height (int): Высота поля
+        grid_size (int): Размер клетки сетки
+        wall_pass (bool): Прохождение сквозь стены
+        events (list): Пары (tick, action): поворот action перед шагом tick
+        ticks (int): Сколько шагов длилась игра
+    """
+
+    def __init__(self, seed, width, height, grid_size, wall_pass=False, events=None, ticks=0):
+        """
+        Создает запись.
+
+        Args:
+            seed (int): Начальное значение генератора, от 0 до 2**64 - 1
+            width (int): Ширина поля
+            height (int): Высота поля
+            grid_size (int): Размер клетки сетки
+            wall_pass (bool): Прохождение сквозь стены
+            events (list): Пары (tick, action) по возрастанию tick
+            ticks (int): Сколько шагов длилась игра
+        """
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.grid_size = grid_size
+        self.wall_pass = wall_pass
+        self.events = events if events is not None else []
+        self.ticks = ticks
+
+    def record(self, tick, action):
+        """
+        Добавляет поворот в запись.
+
+        Args:
+            tick (int): Номер шага, перед которым выполнен поворот
+            action (int): Одно из UP, DOWN, LEFT, RIGHT
+        """
+        self.events.append((tick, action))
+
+    def to_bytes(self):
+        """
+        Кодирует запись.
+
+        Returns:
+            bytes: Заголовок и события
+        """
+        out = bytearray(_HEADER.pack(
+            REPLAY_MAGIC, REPLAY_VERSION, _WALL_PASS if self.wall_pass else 0, self.seed,
+            self.width, self.height, self.grid_size, self.ticks, len(self.events)))
+        previous = 0
+        for tick, action in self.events:
+            value = (tick - previous) << 2 | action
+            previous = tick
+            while value > 0x7F:
+                out.append(value & 0x7F | 0x80)
+                value >>= 7
+            out.append(value)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Декодирует запись.
+
+        Args:
+            data (bytes): Результат to_bytes()
+
+        Returns:
+            Replay: Запись
+
+        Raises:
+            ValueError: Если данные не являются записью этой версии или обрезаны
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("Запись игры обрезана")
+        magic, version, flags, seed, width, height, grid_size, ticks, count = _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError("Неизвестный формат записи игры")
+
+        events = []
+        tick = 0
+        offset = _HEADER.size
+        for _ in range(count):
+            value = 0
+            shift = 0
+            while True:
+                if offset >= len(data):
+                    raise ValueError("Запись игры обрезана")
+                byte = data[offset]
+                offset += 1
+                value |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            tick += value >> 2
+            events.append((tick, value & 3))
+        return cls(seed, width, height, grid_size, bool(flags & _WALL_PASS), events, ticks)
+
+
+class ReplayPlayer:
+    """
+    Класс проигрывателя записей без дисплея.
+
+    При проходе вперед проигрыватель сохраняет снимок состояния движка
+    каждые snapshot_interval шагов. Переход назад или далеко вперед
+    восстанавливает ближайший снимок не позже цели и досчитывает от него
+    не больше snapshot_interval шагов.
+
+    Attributes:
+        replay (Replay): Проигрываемая запись
+        engine (GameEngine): Движок с восстановленным состоянием игры
+        snapshot_interval (int or None): Шагов между снимками, None - без снимков
+    """
+
+    def __init__(self, replay, snapshot_interval=SNAPSHOT_INTERVAL):
+        """
+        Создает проигрыватель в начале записи.
+
+        Args:
+            replay (Replay): Запись игры
+            snapshot_interval (int or None): Шагов между снимками, None - без
+                снимков (для однократного проигрывания до конца)
+        """
+        self.replay = replay
+        self.snapshot_interval = snapshot_interval
+        self.engine = GameEngine(replay.width, replay.height, replay.grid_size,
+                                 replay.wall_pass, seed=replay.seed)
+        self._cursor = 0
+        # Снимки по номеру шага: (состояние движка, позиция в событиях)
+        self._snapshot_ticks = [0]
+        self._snapshots = {0: (self.engine.snapshot(), 0)}
+
+    @property
+    def tick(self):
+        """int: Номер текущего шага."""
+        return self.engine.ticks
+
+    @property
+    def finished(self):
+        """bool: Игра окончена или запись проиграна до конца."""
+        return self.engine.done or self.engine.ticks >= self.replay.ticks
+
+    def step(self):
+        """
+        Проигрывает один шаг записи.
+
+        Returns:
+            bool: True если шаг сделан, False если запись закончилась
+        """
+        if self.finished:
+            return False
+
+        engine = self.engine
+        events = self.replay.events
+        action = None
+        # GameLogic записывает не больше одного поворота за шаг; из
+        # нескольких событий одного шага выполняется последнее
+        while self._cursor < len(events) and events[self._cursor][0] <= engine.ticks:
+            if events[self._cursor][0] == engine.ticks:
+                action = events[self._cursor][1]
+            self._cursor += 1
+        engine.step(action)
+
+        tick = engine.ticks
+        if self.snapshot_interval and tick % self.snapshot_interval == 0 and tick not in self._snapshots:
+            self._snapshots[tick] = (engine.snapshot(), self._cursor)
+            bisect.insort(self._snapshot_ticks, tick)
+        return True
+
+    def run(self, until=None):
+        """
+        Проигрывает запись с максимальной скоростью.
+
+        Args:
+            until (int or None): Номер шага, на котором остановиться,
+                None - до конца записи
+
+        Returns:
+            GameEngine: Движок с состоянием на момент остановки
+        """
+        step = self.step
+        if until is None:
+            while step():
+                pass
+        else:
+            while self.engine.ticks < until and step():
+                pass
+        return self.engine
+
+    def seek(self, tick):
+        """
+        Переходит к шагу записи.
+
+        Args:
+            tick (int): Номер шага; за концом записи - конец записи
+
+        Returns:
+            GameEngine: Движок с состоянием на шаге tick
+        """
+        i = bisect.bisect_right(self._snapshot_ticks, tick) - 1
+        nearest = self._snapshot_ticks[i]
+        # Вперед в пределах текущего отрезка досчитываем без восстановления
+        if not nearest <= self.engine.ticks <= tick:
+            state, self._cursor = self._snapshots[nearest]
+            self.engine.restore(state)
+        return self.run(tick)
@@ -4,7 +4,35 @@
 Содержит логику движения, отрисовки и управления змейкой.
 """
 
-import pygame
+from collections import deque
+
+try:
+    import pygame
+except ImportError:  # Безголовый режим: правила доступны, отрисовка нет
+    pygame = None
+
+
+def gradient_color(color, index, length):
+    """
+    Возвращает цвет сегмента змейки с учетом градиента.
+
+    Первая половина змейки рисуется половинной яркостью, дальше яркость
+    растет к хвосту.
+
+    Args:
+        color (tuple): Базовый RGB цвет змейки
+        index (int): Номер сегмента, 0 - голова
+        length (int): Длина змейки
+
+    Returns:
+        tuple: RGB цвет сегмента
+    """
+    color_factor = max(0.5, index / length)
+    return (
+        int(color[0] * color_factor),
+        int(color[1] * color_factor),
+        int(color[2] * color_factor)
+    )
 
 
 class Snake:
@@ -14,7 +42,9 @@ class Snake:
     Attributes:
         grid_size (int): Размер клетки сетки
         color (tuple): Цвет змейки в формате RGB
-        positions (list): Список позиций сегментов змейки
+        positions (deque): Позиции сегментов змейки, голова слева
+        occupied (set): Множество клеток, занятых телом змейки
+        vacated (tuple or None): Клетка, освобожденная хвостом на последнем шаге
         direction (tuple): Текущее направление движения
         score (int): Текущий счет
         grow_to (int): Целевая длина для роста
@@ -56,9 +86,12 @@ class Snake:
         Сбрасывает змейку в начальное состояние.
         """
         self.length = 3
-        self.positions = [(self.grid_size * 5, self.grid_size * 5)]
-        for i in range(1, self.length):
-            self.positions.append((self.positions[0][0] - i * self.grid_size, self.positions[0][1]))
+        head = (self.grid_size * 5, self.grid_size * 5)
+        self.positions = deque((head[0] - i * self.grid_size, head[1]) for i in range(self.length))
+        # Множество занятых клеток дублирует positions, чтобы проверка
+        # столкновения не сканировала всё тело на каждом шаге
+        self.occupied = set(self.positions)
+        self.vacated = None
         self.direction = (self.grid_size, 0)  # Начальное направление: вправо
         self.score = 0
         self.grow_to = 3
@@ -113,13 +146,17 @@ class Snake:
 
         new_position = (new_x, new_y)
 
-        # Проверка на столкновение с собой
-        if new_position in self.positions[1:]:
+        # Проверка на столкновение с собой (голова не может совпасть с новой
+        # позицией, поэтому достаточно проверить всё тело)
+        if new_position in self.occupied:
             return False
 
-        self.positions.insert(0, new_position)
+        self.positions.appendleft(new_position)
+        self.occupied.add(new_position)
+        self.vacated = None
         if len(self.positions) > self.grow_to:
-            self.positions.pop()
+            self.vacated = self.positions.pop()
+            self.occupied.discard(self.vacated)
 
         return True
 
@@ -130,25 +167,73 @@ class Snake:
         self.grow_to += 1
         self.score += 10
 
-    def draw(self, surface):
+    def segment_color(self, index, length):
+        """
+        Возвращает цвет сегмента с учетом градиента.
+
+        Args:
+            index (int): Номер сегмента, 0 - голова
+            length (int): Длина змейки
+
+        Returns:
+            tuple: RGB цвет сегмента
+        """
+        return gradient_color(self.color, index, length)
+
+    def gradient_steps(self, length):
+        """
+        Возвращает номера сегментов, цвет которых меняется при сдвиге на один шаг.
+
+        Сегмент с номером i после шага получает номер i + 1. Его цвет
+        меняется только там, где отличаются цвета соседних номеров, поэтому
+        при неизменной длине достаточно перерисовать эти сегменты.
+
+        Args:
+            length (int): Длина змейки
+
+        Returns:
+            list: Номера i (1 <= i < length), для которых
+                segment_color(i) != segment_color(i - 1)
+        """
+        steps = []
+        previous = self.segment_color(0, length)
+        for i in range(1, length):
+            color = self.segment_color(i, length)
+            if color != previous:
+                steps.append(i)
+            previous = color
+        return steps
+
+    def draw_segment(self, surface, position, color):
+        """
+        Отрисовывает один сегмент змейки.
+
+        Args:
+            surface: Поверхность Pygame для отрисовки
+            position (tuple): Координаты сегмента
+            color (tuple): RGB цвет сегмента
+        """
+        rect = pygame.Rect(position, (self.grid_size, self.grid_size))
+        pygame.draw.rect(surface, color, rect)
+        pygame.draw.rect(surface, (255, 255, 255), rect, 1)
+
+    def draw(self, surface, sprites=None):
         """
         Отрисовывает змейку на поверхности.
 
         Args:
             surface: Поверхность Pygame для отрисовки
+            sprites (SnakeSprites): Заранее отрисованные плитки сегментов.
+                Если заданы, все тело выводится одним пакетным вызовом blits.
         """
+        length = len(self.positions)
+        if sprites is not None:
+            surface.blits(zip(sprites.ramp(length), self.positions), doreturn=False)
+            return
+
         for i, p in enumerate(self.positions):
             # Градиент цвета для змейки
-            color_factor = max(0.5, i / len(self.positions))
-            color = (
-                int(self.color[0] * color_factor),
-                int(self.color[1] * color_factor),
-                int(self.color[2] * color_factor)
-            )
-
-            rect = pygame.Rect((p[0], p[1]), (self.grid_size, self.grid_size))
-            pygame.draw.rect(surface, color, rect)
-            pygame.draw.rect(surface, (255, 255, 255), rect, 1)
+            self.draw_segment(surface, p, self.segment_color(i, length))
 
     def get_length(self):
         """
@@ -15,9 +15,11 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'database'))
 sys.path.append(os.path.join(os.path.dirname(__file__), 'game'))
 
 from config.settings import GameSettings
-from database.db_handler import DatabaseHandler
+from database.storage import create_storage
 from game.menu import Menu
 from game.game_logic import GameLogic
+from game.render import RenderContext
+from game.profiler import FrameProfiler
 
 
 def main():
@@ -36,41 +38,40 @@ def main():
         settings_manager = GameSettings()
         settings = settings_manager.get_settings()
 
-        # АВТОМАТИЧЕСКОЕ подключение к PostgreSQL
-        db_handler = DatabaseHandler()
-
-        # РЕЖИМ ОТОБРАЖЕНИЯ: полноэкранный или оконный
-        if settings.get('windowed', False):
-            # Оконный режим
-            if settings['width'] > 0 and settings['height'] > 0:
-                screen = pygame.display.set_mode((settings['width'], settings['height']))
-                print(f"🪟 Оконный режим: {settings['width']}x{settings['height']}")
-            else:
-                screen = pygame.display.set_mode((1024, 768))
-                settings['width'] = 1024
-                settings['height'] = 768
-                print("🪟 Оконный режим: 1024x768")
-        else:
-            # ПОЛНОЭКРАННЫЙ РЕЖИМ (по умолчанию)
-            screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-            screen_info = pygame.display.Info()
-            settings['width'] = screen_info.current_w
-            settings['height'] = screen_info.current_h
+        # АВТОМАТИЧЕСКОЕ подключение к хранилищу результатов (по умолчанию PostgreSQL).
+        # PostgreSQL подключается в фоне: меню открывается, не дожидаясь БД
+        db_handler = create_storage(settings, background=True)
+
+        # Профилировщик накапливает замеры всех раундов, отчет пишется при выходе
+        profiler = FrameProfiler() if settings.get('profile') else None
+
+        # РЕЖИМ ОТОБРАЖЕНИЯ: полноэкранный (по умолчанию) или оконный.
+        # Режим устанавливается один раз: окно, шрифты и кэши отрисовки
+        # общие для меню и всех раундов
+        fullscreen = not settings.get('windowed', False)
+        if not fullscreen and (settings['width'] <= 0 or settings['height'] <= 0):
+            settings['width'] = 1024
+            settings['height'] = 768
+        context = RenderContext(settings['width'], settings['height'], fullscreen, profiler)
+        settings['width'] = context.width
+        settings['height'] = context.height
+        if fullscreen:
             print(f"🖥️ Полноэкранный режим: {settings['width']}x{settings['height']}")
+        else:
+            print(f"🪟 Оконный режим: {settings['width']}x{settings['height']}")
 
-        pygame.display.set_caption('Snake Game')
+        # Меню создается один раз и сохраняет введенное имя между раундами
+        menu = Menu(context, db_handler, settings['player_name'])
 
         # Главный игровой цикл
         while True:
-            # Показываем меню с именем игрока из аргументов
-            menu = Menu(screen, db_handler, settings['player_name'])
             player_name, start_game = menu.run()
 
             if not start_game:
                 break
 
             # Запускаем игру
-            game = GameLogic(settings, db_handler)
+            game = GameLogic(settings, db_handler, context)
             continue_playing = game.run(player_name)
 
             if not continue_playing:
@@ -82,9 +83,16 @@ def main():
         traceback.print_exc()
 
     finally:
-        # Завершение работы
+        # Завершение работы: сначала сохраняем игры, отчет профилирования
+        # не должен мешать закрытию хранилища
         if 'db_handler' in locals():
             db_handler.close()
+        if locals().get('profiler') is not None:
+            try:
+                profiler.dump(settings['profile_output'])
+                print(f"📊 Отчет профилирования: {settings['profile_output']}")
+            except OSError as e:
+                print(f"❌ Ошибка сохранения отчета профилирования: {e}")
         pygame.quit()
         sys.exit()
 
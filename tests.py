@@ -1,15 +1,45 @@
 import unittest
+import argparse
 from unittest.mock import Mock, patch
+from concurrent.futures import ThreadPoolExecutor
 import pygame
 import sys
 import os
+import json
+import random
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+
+# Тесты отрисовки работают без окна
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
 
 sys.path.append(os.path.dirname(__file__))
 
 from game.snake import Snake
-from game.food import Food
+from game.food import Food, FreeCells
+from game.engine import GameEngine, TurnBuffer, UP, DOWN, LEFT, RIGHT
+from game.game_logic import GameLogic
+from game.menu import Menu
+from game.replay import Replay, ReplayPlayer
+from game.agents import GreedyAgent
+from game.render import BackgroundCache, RenderContext, SnakeSprites, TextCache, GRID_COLOR
+from game.profiler import FrameProfiler, LatencyHistogram, bucket_index, bucket_value, BUCKETS
 from config.settings import GameSettings
 from database.db_handler import DatabaseHandler
+from database.journal import SessionJournal
+from database.leaderboard import Leaderboard
+from database.storage import MemoryStorage, SQLiteStorage, Storage, create_storage
+from tournament import RunningStats, play_chunk, save_results
+from verify_replays import verify_pending, verify_replay
+import benchmarks
+from benchmarks import compare, run_benchmarks
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class TestSnake(unittest.TestCase):
@@ -37,6 +67,23 @@ class TestSnake(unittest.TestCase):
         self.assertEqual(self.snake.score, start_score + 10)
         self.assertEqual(self.snake.grow_to, start_grow_to + 1)
 
+    def test_self_collision(self):
+        self.snake.grow_to = 10
+        for _ in range(4):
+            self.snake.move(False, 800, 600)
+        self.snake.turn((0, 20))
+        self.assertTrue(self.snake.move(False, 800, 600))
+        self.snake.turn((-20, 0))
+        self.assertTrue(self.snake.move(False, 800, 600))
+        self.snake.turn((0, -20))
+        self.assertFalse(self.snake.move(False, 800, 600))
+
+    def test_occupied_follows_positions(self):
+        for _ in range(5):
+            self.snake.move(False, 800, 600)
+        self.assertEqual(self.snake.occupied, set(self.snake.positions))
+        self.assertEqual(len(self.snake.occupied), self.snake.get_length())
+
 
 class TestFood(unittest.TestCase):
     """Тесты для еды из game/food.py"""
@@ -54,6 +101,388 @@ class TestFood(unittest.TestCase):
         self.food.randomize_position(snake_positions, 800, 600)
         self.assertNotIn(self.food.position, snake_positions)
 
+    def test_tracked_free_cells(self):
+        snake_positions = [(0, 0), (20, 0)]
+        self.food.track(snake_positions, 60, 20)
+        self.assertTrue(self.food.randomize_position(snake_positions, 60, 20))
+        self.assertEqual(self.food.position, (40, 0))
+
+        self.food.release((0, 0))
+        self.food.occupy((40, 0))
+        self.assertTrue(self.food.randomize_position(snake_positions, 60, 20))
+        self.assertEqual(self.food.position, (0, 0))
+
+    def test_untracked_board_uses_sampling_until_crowded(self):
+        with patch('game.food.FreeCells', wraps=FreeCells) as free_cells:
+            self.assertTrue(self.food.randomize_position([(100, 100)], 800, 600))
+            free_cells.assert_not_called()
+
+            # Свободна одна клетка из 60: индекс строится
+            snake_positions = [(x, y) for x in range(0, 200, 20) for y in range(0, 120, 20)][1:]
+            self.assertTrue(self.food.randomize_position(snake_positions, 200, 120))
+            self.assertEqual(self.food.position, (0, 0))
+            free_cells.assert_called_once()
+
+    def test_board_full(self):
+        snake_positions = [(0, 0), (20, 0), (40, 0)]
+        self.assertFalse(self.food.randomize_position(snake_positions, 60, 20))
+        self.assertIsNone(self.food.position)
+
+
+class TestEngine(unittest.TestCase):
+    """Тесты безголового движка из game/engine.py"""
+
+    def test_seed_is_deterministic(self):
+        first = GameEngine(200, 200, 20, seed=42)
+        second = GameEngine(200, 200, 20, seed=42)
+        self.assertEqual(first.food.position, second.food.position)
+
+        for action in (None, DOWN, LEFT, None, UP, RIGHT):
+            self.assertEqual(first.step(action), second.step(action))
+        self.assertEqual(list(first.snake.positions), list(second.snake.positions))
+        self.assertEqual(first.food.position, second.food.position)
+
+    def test_step_eats_food(self):
+        engine = GameEngine(200, 200, 20, seed=1)
+        engine.food.position = (120, 100)
+        done, reward, score = engine.step()
+        self.assertFalse(done)
+        self.assertEqual(reward, 10)
+        self.assertEqual(score, 10)
+        self.assertEqual(engine.food_eaten, 1)
+
+    def test_wall_collision_ends_game(self):
+        engine = GameEngine(120, 200, 20, seed=1)
+        engine.food.position = (0, 0)
+        done, reward, score = engine.step()
+        self.assertTrue(done)
+        self.assertEqual(engine.step(), (True, 0, 0))
+
+        engine.reset(1)
+        self.assertFalse(engine.done)
+        self.assertEqual(engine.ticks, 0)
+
+    def test_turn_buffer_keeps_fast_turns_in_order(self):
+        turns = TurnBuffer(2)
+        self.assertFalse(turns.push(LEFT, RIGHT))
+        self.assertFalse(turns.push(RIGHT, RIGHT))
+        self.assertTrue(turns.push(UP, RIGHT))
+        self.assertFalse(turns.push(DOWN, RIGHT))
+        self.assertTrue(turns.push(LEFT, RIGHT))
+        self.assertFalse(turns.push(DOWN, RIGHT))
+        self.assertEqual((turns.pop(), turns.pop(), turns.pop()), (UP, LEFT, None))
+
+    def test_quick_u_turn_takes_two_steps(self):
+        engine = GameEngine(200, 200, 20, seed=1)
+        turns = TurnBuffer()
+        head = engine.snake.positions[0]
+        turns.push(UP, engine.current_action())
+        turns.push(LEFT, engine.current_action())
+        engine.step(turns.pop())
+        engine.step(turns.pop())
+        self.assertEqual(engine.snake.positions[0], (head[0] - 20, head[1] - 20))
+
+
+# Настройки сессии, сохраняемые GameLogic для поля record_game()
+BOARD_SETTINGS = {'speed': 10, 'wall_pass': True, 'width': 400, 'height': 300, 'grid_size': 20}
+
+
+def record_game(seed=7, max_ticks=3000):
+    """Играет жадным агентом и возвращает движок и запись игры."""
+    engine = GameEngine(400, 300, 20, wall_pass=True, seed=seed)
+    agent = GreedyAgent(random.Random(seed))
+    replay = Replay(seed, 400, 300, 20, wall_pass=True)
+    while not engine.done and engine.ticks < max_ticks:
+        action = agent.act(engine)
+        if action is not None:
+            replay.record(engine.ticks, action)
+        engine.step(action)
+    replay.ticks = engine.ticks
+    return engine, replay
+
+
+class TestReplay(unittest.TestCase):
+    """Тесты записи и воспроизведения игр из game/replay.py"""
+
+    def test_bytes_round_trip(self):
+        _, replay = record_game()
+        data = replay.to_bytes()
+        decoded = Replay.from_bytes(data)
+        self.assertEqual((decoded.seed, decoded.width, decoded.height, decoded.grid_size,
+                          decoded.wall_pass, decoded.ticks, decoded.events),
+                         (replay.seed, 400, 300, 20, True, replay.ticks, replay.events))
+        with self.assertRaises(ValueError):
+            Replay.from_bytes(data[:-1] + b'\x80')
+        with self.assertRaises(ValueError):
+            Replay.from_bytes(b'XXXX' + data[4:])
+
+    def test_player_reproduces_game(self):
+        engine, replay = record_game()
+        played = ReplayPlayer(Replay.from_bytes(replay.to_bytes())).run()
+        self.assertEqual((played.ticks, played.snake.score, played.food_eaten, played.max_length),
+                         (engine.ticks, engine.snake.score, engine.food_eaten, engine.max_length))
+        self.assertEqual(list(played.snake.positions), list(engine.snake.positions))
+
+    def test_seek_matches_straight_playback(self):
+        _, replay = record_game()
+        player = ReplayPlayer(replay, snapshot_interval=50)
+        player.run()
+        for tick in (120, 7, 260, 260, 49):
+            expected = ReplayPlayer(replay).run(tick).snapshot()
+            self.assertEqual(player.seek(tick).snapshot(), expected)
+        self.assertEqual(player.seek(10 ** 6).ticks, replay.ticks)
+
+    def test_game_logic_records_turns(self):
+        pygame.init()
+        try:
+            settings = dict(width=200, height=160, grid_size=20, speed=10, wall_pass=False,
+                            snake_color='green', food_color='red')
+            game = GameLogic(settings, None)
+            game.turns.push(DOWN, game.engine.current_action())
+            game.update()
+            game.update()
+            self.assertEqual(game.replay.events, [(0, DOWN)])
+
+            game.replay.ticks = game.engine.ticks
+            played = ReplayPlayer(game.replay).run()
+            self.assertEqual(played.snapshot(), game.engine.snapshot())
+        finally:
+            pygame.quit()
+
+    def test_saved_game_passes_verification(self):
+        pygame.init()
+        self.addCleanup(pygame.quit)
+        settings = dict(width=200, height=160, grid_size=20, speed=10, wall_pass=False,
+                        snake_color='green', food_color='red')
+        storage = MemoryStorage()
+        game = GameLogic(settings, storage)
+        while game.update():
+            pass
+        escape = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE)
+        with patch('game.game_logic.pygame.event.wait', return_value=escape):
+            self.assertFalse(game.show_game_over("P"))
+
+        (submission,) = storage.get_unverified_replays()
+        self.assertEqual(submission[4]['width'], 200)
+        self.assertTrue(verify_replay(submission[5], *submission[1:5]))
+
+
+@unittest.skipIf(numpy is None, "numpy не установлен")
+class TestBatchEngine(unittest.TestCase):
+    """Тесты пакетного движка из game/batch_engine.py"""
+
+    def setUp(self):
+        from game.batch_engine import BatchGameEngine
+        self.batch = BatchGameEngine(4, 10, 10, seed=0)
+
+    def test_step_moves_all_games(self):
+        heads = self.batch.heads().copy()
+        dones, rewards, scores = self.batch.step([-1, DOWN, UP, LEFT])
+        self.assertFalse(dones.any())
+        self.assertEqual(list(self.batch.heads() - heads), [1, 10, -10, 1])
+        self.assertEqual(list(self.batch.occupied.sum(axis=1)), [3, 3, 3, 3])
+
+    def test_food_and_auto_reset(self):
+        self.batch.food[0] = 5 * 10 + 6
+        dones, rewards, scores = self.batch.step()
+        self.assertEqual(rewards[0], 10)
+        self.assertEqual(self.batch.food_eaten[0], 1)
+
+        for _ in range(4):
+            dones, rewards, scores = self.batch.step()
+        self.assertTrue(dones.all())
+        self.assertEqual(scores[0], 10)
+        self.assertEqual(list(self.batch.score), [0, 0, 0, 0])
+        self.assertEqual(list(self.batch.length), [3, 3, 3, 3])
+
+
+class TestIncrementalRender(unittest.TestCase):
+    """Тесты инкрементальной отрисовки из game/game_logic.py"""
+
+    def setUp(self):
+        pygame.init()
+        settings = dict(width=200, height=160, grid_size=20, speed=10, wall_pass=False,
+                        snake_color='green', food_color='red', render_mode='incremental')
+        self.game = GameLogic(settings, None)
+        self.game.engine.reset(0)
+
+    def tearDown(self):
+        pygame.quit()
+
+    def test_incremental_frame_matches_full_redraw(self):
+        self.game.draw()
+        for action in (None, DOWN, None, LEFT):
+            self.game.engine.step(action)
+            for alpha in (0.0, 0.3, 0.7, 1.0):
+                self.game.draw(alpha)
+                incremental = pygame.image.tobytes(self.game.screen, 'RGB')
+                self.game._draw_full(self.game._overlays(alpha))
+                self.assertEqual(pygame.image.tobytes(self.game.screen, 'RGB'), incremental)
+
+    def test_frame_rate_follows_desktop_refresh_rate(self):
+        # pygame 2.6 не сообщает частоту обновления
+        with patch('pygame.display', Mock(spec=[])):
+            self.assertEqual(self.game._frame_rate(), 60)
+        with patch('pygame.display.get_desktop_refresh_rates', return_value=[144, 60], create=True):
+            self.assertEqual(self.game._frame_rate(), 144)
+            self.game.settings['fps'] = 30
+            self.assertEqual(self.game._frame_rate(), 30)
+            self.game.settings['fps'] = 0
+        # Частота неизвестна
+        with patch('pygame.display.get_desktop_refresh_rates', return_value=[0], create=True):
+            self.assertEqual(self.game._frame_rate(), 60)
+
+    def test_interpolation_moves_head_and_tail_between_cells(self):
+        self.game.engine.step()
+        head, neck = self.game.snake.positions[0], self.game.snake.positions[1]
+        overlays = self.game._overlays(0.5)
+        self.assertEqual(overlays[0][1], (neck[0] + 10, neck[1]))
+        self.assertEqual(overlays[1][1], (self.game.snake.vacated[0] + 10, self.game.snake.vacated[1]))
+        self.assertEqual([position for _, position in self.game._overlays(1.0)], [head])
+
+
+class TestProfiler(unittest.TestCase):
+    """Тесты профилирования кадров из game/profiler.py"""
+
+    def test_histogram_percentiles_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.record(value * 1000)
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.maximum, 1000000)
+        self.assertAlmostEqual(histogram.percentile(50), 500000, delta=500000 / 32)
+        self.assertAlmostEqual(histogram.percentile(99), 990000, delta=990000 / 32)
+        self.assertEqual(histogram.percentile(100), 1000000)
+        self.assertEqual(LatencyHistogram().percentile(50), 0)
+
+    def test_bucket_bounds(self):
+        for value in (0, 1, 63, 64, 65, 1000, 123456789, 2 ** 40):
+            index = bucket_index(value)
+            self.assertLess(index, BUCKETS)
+            if value < 2 ** 36:
+                self.assertLessEqual(bucket_value(index), value)
+                self.assertGreater(bucket_value(index + 1), value)
+
+    def test_game_sections_recorded_and_dumped(self):
+        pygame.init()
+        self.addCleanup(pygame.quit)
+        settings = dict(width=200, height=160, grid_size=20, speed=10, wall_pass=False,
+                        snake_color='green', food_color='red', render_mode='incremental')
+        profiler = FrameProfiler()
+        game = GameLogic(settings, None, RenderContext(200, 160, profiler=profiler))
+        for _ in range(3):
+            game.handle_events()
+            game.update()
+            game.draw()
+
+        counts = {name: histogram.count for name, histogram in profiler.histograms.items()}
+        self.assertEqual(counts, {'events': 3, 'update': 3, 'draw': 3, 'flip': 3, 'frame': 2})
+
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'profile.json')
+            profiler.dump(json_path)
+            with open(json_path) as report:
+                self.assertEqual(json.load(report)['draw']['count'], 3)
+            csv_path = os.path.join(directory, 'profile.csv')
+            profiler.dump(csv_path)
+            with open(csv_path) as report:
+                self.assertEqual(len(report.read().splitlines()), 6)
+
+
+class TestRenderCache(unittest.TestCase):
+    """Тесты кэшей отрисовки из game/render.py"""
+
+    def setUp(self):
+        pygame.init()
+
+    def tearDown(self):
+        pygame.quit()
+
+    def test_background_cache_rebuilds_only_on_change(self):
+        cache = BackgroundCache()
+        background = cache.get(100, 80, 20)
+        self.assertIs(cache.get(100, 80, 20), background)
+        self.assertEqual(background.get_at((20, 5))[:3], GRID_COLOR)
+        self.assertEqual(background.get_at((25, 5))[:3], (0, 0, 0))
+
+        self.assertIsNot(cache.get(100, 80, 10), background)
+        self.assertEqual(cache.get(100, 80, 10).get_at((10, 5))[:3], GRID_COLOR)
+
+    def test_text_cache_lru(self):
+        cache = TextCache(max_entries=2)
+        first = cache.render('Score: 0', (255, 255, 255), 24)
+        self.assertIs(cache.render('Score: 0', (255, 255, 255), 24), first)
+        self.assertIs(cache.font(24), cache.font(24))
+
+        cache.render('Score: 10', (255, 255, 255), 24)
+        cache.render('Score: 0', (255, 255, 255), 24)
+        cache.render('Score: 20', (255, 255, 255), 24)
+        self.assertEqual(list(cache.surfaces), [('Score: 0', (255, 255, 255), 24),
+                                                ('Score: 20', (255, 255, 255), 24)])
+
+
+    def test_snake_sprites_match_primitive_draw(self):
+        snake = Snake(10, 'purple')
+        snake.grow_to = 40
+        for _ in range(30):
+            snake.move(True, 200, 200)
+        sprites = SnakeSprites(snake.color, 10)
+
+        primitive = pygame.Surface((200, 200))
+        snake.draw(primitive)
+        batched = pygame.Surface((200, 200))
+        snake.draw(batched, sprites)
+        self.assertEqual(pygame.image.tobytes(batched, 'RGB'), pygame.image.tobytes(primitive, 'RGB'))
+        self.assertIs(sprites.ramp(snake.get_length()), sprites.ramp(snake.get_length()))
+
+    def test_rounds_share_render_context(self):
+        settings = dict(width=200, height=160, grid_size=20, speed=10, wall_pass=False,
+                        snake_color='green', food_color='red', render_mode='incremental')
+        context = RenderContext(200, 160)
+        first = GameLogic(settings, None, context)
+        first.draw()
+        with patch('game.render.pygame.display.set_mode') as set_mode:
+            second = GameLogic(settings, None, context)
+            second.draw()
+        set_mode.assert_not_called()
+        self.assertIs(second.screen, first.screen)
+        self.assertIs(second.sprites, first.sprites)
+        self.assertIs(second.text_cache, context.text_cache)
+        self.assertIs(second.background.surface, first.background.surface)
+
+
+class TestMenu(unittest.TestCase):
+    """Тесты главного меню из game/menu.py"""
+
+    def setUp(self):
+        pygame.init()
+        self.context = RenderContext(400, 300)
+
+    def tearDown(self):
+        pygame.quit()
+
+    def test_menu_redraws_only_on_change(self):
+        storage = MemoryStorage()
+        storage.save_game_session("A", 30, 60, {}, 3, 6, False)
+        menu = Menu(self.context, storage)
+
+        def key(k):
+            return pygame.event.Event(pygame.KEYDOWN, key=k, unicode='')
+        idle = pygame.event.Event(pygame.NOEVENT)
+        events = [key(pygame.K_DOWN), key(pygame.K_RETURN), idle, idle, idle,
+                  key(pygame.K_ESCAPE), idle, key(pygame.K_UP), key(pygame.K_RETURN)]
+
+        with patch('game.menu.pygame.event.wait', side_effect=events), \
+                patch('game.menu.pygame.event.get', return_value=[]), \
+                patch.object(menu, 'draw_main_menu') as draw_main_menu, \
+                patch.object(menu, 'draw_high_scores') as draw_high_scores, \
+                patch.object(storage, '_load_leaderboard', wraps=storage._load_leaderboard) as load:
+            self.assertEqual(menu.run(), ("Player", True))
+
+        self.assertEqual(draw_main_menu.call_count, 4)
+        self.assertEqual(draw_high_scores.call_count, 1)
+        self.assertEqual(load.call_count, 1)
+
 
 class TestSettings(unittest.TestCase):
     """Тесты для настроек из config/settings.py"""
@@ -89,7 +518,13 @@ class TestSettings(unittest.TestCase):
 class TestDatabase(unittest.TestCase):
     """Тесты для базы данных из database/db_handler.py"""
 
-    @patch('database.db_handler.psycopg2.connect')
+    def setUp(self):
+        # Журнал во временном каталоге: тесты не должны трогать журнал игрока
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.journal_path = os.path.join(directory.name, 'sessions.journal')
+
+    @patch('psycopg2.connect')
     def test_db_save_session(self, mock_connect):
         mock_conn = Mock()
         mock_cursor = Mock()
@@ -97,7 +532,7 @@ class TestDatabase(unittest.TestCase):
         mock_conn.cursor.return_value = mock_cursor
         mock_cursor.fetchone.return_value = [1]  # session_id
 
-        db = DatabaseHandler()
+        db = DatabaseHandler(self.journal_path)
         session_id = db.save_game_session(
             player_name="Test",
             score=100,
@@ -110,22 +545,521 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(session_id, 1)
         # Убрали проверку call_count - она нестабильна
 
-    @patch('database.db_handler.psycopg2.connect')
+    @patch('psycopg2.connect')
+    def test_save_session_prepared_once(self, mock_connect):
+        mock_conn = Mock(closed=0)
+        mock_cursor = Mock()
+        mock_connect.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = [1]
+
+        db = DatabaseHandler(self.journal_path)
+        mock_cursor.execute.reset_mock()
+        for score in (10, 20):
+            db.save_game_session("Test", score, 60, {}, 1, 3, False)
+
+        sql = [call[0][0].split()[0] for call in mock_cursor.execute.call_args_list]
+        self.assertEqual(sql, ['PREPARE', 'EXECUTE', 'EXECUTE'])
+
+    @patch('psycopg2.connect')
     def test_get_high_scores(self, mock_connect):
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_connect.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
+        # Лучшие сессии (in_top) и лучший счет каждого игрока
         mock_cursor.fetchall.return_value = [
-            ("Player1", 100, 60, "2023-01-01"),
-            ("Player2", 90, 55, "2023-01-02")
+            (1, "Player1", 100, 60, "2023-01-01", True),
+            (2, "Player2", 90, 55, "2023-01-02", True),
+            (None, "Player1", 100, None, None, False),
+            (None, "Player2", 90, None, None, False)
         ]
 
-        db = DatabaseHandler()
+        db = DatabaseHandler(self.journal_path)
         scores = db.get_high_scores(5)
         self.assertEqual(len(scores), 2)
         self.assertEqual(scores[0][1], 100)
 
+    @patch('psycopg2.connect')
+    def test_reads_do_not_hold_transaction(self, mock_connect):
+        mock_connect.return_value = Mock(closed=0)
+        db = DatabaseHandler(self.journal_path)
+        self.assertIs(db.connection.autocommit, True)
+        db.connection.commit.reset_mock()
+
+        # Ошибка запроса не должна ломать следующие чтения
+        db.connection.cursor.return_value.execute.side_effect = [Exception("invalid input"), None]
+        db.connection.cursor.return_value.fetchone.return_value = (b'replay',)
+        self.assertIsNone(db.get_replay('bad'))
+        self.assertEqual(db.get_replay(1), b'replay')
+        db.connection.commit.assert_not_called()
+
+    @patch('psycopg2.connect')
+    def test_reconnect_waits_for_running_query(self, mock_connect):
+        old, new = Mock(closed=0), Mock(closed=0)
+        mock_connect.return_value = old
+        db = DatabaseHandler(self.journal_path)
+        db.create_tables = Mock()
+
+        started, release = threading.Event(), threading.Event()
+
+        def slow_query(*args):
+            started.set()
+            release.wait()
+        old.cursor.return_value.execute.side_effect = slow_query
+        old.cursor.return_value.fetchall.return_value = []
+        reader = threading.Thread(target=db.get_high_scores)
+        reader.start()
+        started.wait()
+
+        # Фоновый поток записи переподключается во время запроса меню
+        mock_connect.return_value = new
+        reconnect = threading.Thread(target=db.connect)
+        reconnect.start()
+        reconnect.join(0.2)
+        self.assertTrue(reconnect.is_alive())
+        old.close.assert_not_called()
+
+        release.set()
+        reader.join()
+        reconnect.join()
+        old.close.assert_called()
+        self.assertIs(db.connection, new)
+
+
+    @patch('psycopg2.connect')
+    def test_migrations_apply_only_new_versions(self, mock_connect):
+        mock_conn = Mock(closed=0)
+        mock_cursor = Mock()
+        mock_connect.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [(1,)]
+        # Блокировка миграций свободна, недействительных индексов нет
+        mock_cursor.fetchone.side_effect = lambda: (True,)
+
+        db = DatabaseHandler(self.journal_path)
+        mock_cursor.execute.reset_mock()
+        self.assertEqual(db.migrate(), [2, 3, 4, 5, 6])
+        sql = ' '.join(call[0][0] for call in mock_cursor.execute.call_args_list)
+        self.assertIn('pg_try_advisory_lock', sql)
+        self.assertIn('CREATE INDEX CONCURRENTLY IF NOT EXISTS game_stats_session_id_idx', sql)
+        self.assertNotIn('pg_advisory_xact_lock', sql)
+        self.assertIn('pg_advisory_unlock', sql)
+
+    @patch('psycopg2.connect')
+    def test_migrations_skipped_while_other_client_migrates(self, mock_connect):
+        mock_conn = Mock(closed=0)
+        mock_cursor = Mock()
+        mock_connect.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = (False,)
+
+        db = DatabaseHandler(self.journal_path)
+        mock_cursor.execute.reset_mock()
+        self.assertEqual(db.migrate(), [])
+        sql = ' '.join(call[0][0] for call in mock_cursor.execute.call_args_list)
+        self.assertNotIn('CREATE INDEX', sql)
+        self.assertNotIn('pg_advisory_unlock', sql)
+
+    @patch('psycopg2.extras.execute_values')
+    @patch('psycopg2.connect')
+    def test_save_game_sessions_bulk(self, mock_connect, mock_execute_values):
+        mock_conn = Mock()
+        mock_connect.return_value = mock_conn
+
+        db = DatabaseHandler(self.journal_path)
+        sessions = [
+            dict(player_name="Bot", score=score, game_duration=1, settings={'speed': 10},
+                 food_eaten=score // 10, max_length=3, walls_passed=False)
+            for score in (10, 20, 30)
+        ]
+        self.assertEqual(db.save_game_sessions(sessions), 3)
+        self.assertEqual(mock_execute_values.call_count, 1)
+        rows = mock_execute_values.call_args[0][2]
+        self.assertEqual([row[1] for row in rows], [10, 20, 30])
+
+    @patch('psycopg2.extras.execute_values')
+    @patch('psycopg2.connect')
+    def test_queued_sessions_written_on_close(self, mock_connect, mock_execute_values):
+        mock_connect.return_value = Mock(closed=0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            db = DatabaseHandler(os.path.join(directory, 'sessions.journal'))
+            for score in (10, 20, 30):
+                db.queue_game_session("Test", score, 60, {'speed': 10}, 1, 4, False)
+            db.close()
+            self.assertFalse(db.journal.pending())
+
+        rows = [row for call in mock_execute_values.call_args_list for row in call[0][2]]
+        self.assertEqual([row[1] for row in rows], [10, 20, 30])
+        self.assertIsNone(db._writer)
+
+    @patch('psycopg2.extras.execute_values')
+    @patch('psycopg2.connect')
+    def test_sessions_survive_database_outage(self, mock_connect, mock_execute_values):
+        mock_connect.side_effect = Exception("connection refused")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sessions.journal')
+            db = DatabaseHandler(path)
+            self.assertIsNone(db.save_game_session("Test", 50, 60, {'speed': 10}, 5, 8, False))
+            db.close()
+            self.assertEqual([r['score'] for r in SessionJournal(path).read()], [50])
+            mock_execute_values.assert_not_called()
+
+            # БД снова доступна: журнал переносится при следующем запуске
+            mock_connect.side_effect = None
+            mock_connect.return_value = Mock(closed=0)
+            db = DatabaseHandler(path)
+            db.close()
+            self.assertFalse(db.journal.pending())
+        self.assertEqual(mock_execute_values.call_args[0][2][0][1], 50)
+
+    @patch('psycopg2.extras.execute_values')
+    @patch('psycopg2.connect')
+    def test_background_connect_does_not_block(self, mock_connect, mock_execute_values):
+        release = threading.Event()
+
+        def slow_connect(**kwargs):
+            release.wait(5)
+            return Mock(closed=0)
+        mock_connect.side_effect = slow_connect
+
+        with tempfile.TemporaryDirectory() as directory:
+            db = DatabaseHandler(os.path.join(directory, 'sessions.journal'), background=True)
+            self.assertTrue(db.connecting)
+            self.assertEqual(db.get_high_scores(10), [])
+            self.assertIsNone(db.save_game_session("Test", 70, 60, {}, 7, 9, False))
+
+            release.set()
+            db.close()
+            self.assertFalse(db.connecting)
+            self.assertFalse(db.journal.pending())
+        self.assertEqual(mock_connect.call_args[1]['connect_timeout'], DatabaseHandler.CONNECT_TIMEOUT)
+        self.assertEqual(mock_execute_values.call_args[0][2][0][1], 70)
+
+    def test_journal_append_waits_for_replay_lock(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sessions.journal')
+            journal = SessionJournal(path)
+            journal.append([{'score': 10}])
+            # Другой процесс с тем же журналом дописывает во время переноса
+            other = threading.Thread(target=SessionJournal(path).append, args=([{'score': 20}],))
+            with journal.lock():
+                self.assertEqual(journal.read(), [{'score': 10}])
+                other.start()
+                other.join(0.2)
+                self.assertTrue(other.is_alive())
+                journal.clear()
+            other.join()
+            self.assertEqual(journal.read(), [{'score': 20}])
+
+    @patch('psycopg2.extras.execute_values')
+    @patch('psycopg2.connect')
+    def test_corrupt_journal_record_is_quarantined(self, mock_connect, mock_execute_values):
+        mock_connect.return_value = Mock(closed=0)
+        journal = SessionJournal(self.journal_path)
+        session = dict(player_name="Test", score=10, game_duration=60, settings={}, food_eaten=1,
+                       max_length=4, walls_passed=False, replay=None)
+        journal.append([session])
+        # Целая запись с испорченным JSON и запись с испорченной записью игры
+        with open(journal.path, 'ab') as f:
+            f.write(b'\x00\x00\x00\x05{"sc}')
+        journal.append([dict(session, score=20, replay='not base64!'), dict(session, score=30)])
+
+        db = DatabaseHandler(self.journal_path)
+        db.close()
+        self.assertFalse(journal.pending())
+        rows = mock_execute_values.call_args[0][2]
+        self.assertEqual([row[1] for row in rows], [10, 30])
+        with open(journal.path + '.bad', 'rb') as f:
+            bad = f.read()
+        self.assertIn(b'{"sc}', bad)
+        self.assertIn(b'not base64!', bad)
+
+    def test_journal_drops_torn_tail(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = SessionJournal(os.path.join(directory, 'sessions.journal'))
+            journal.append([{'score': 10}, {'score': 20}])
+            with open(journal.path, 'ab') as f:
+                f.write(b'\x00\x00\x00\x10{"sc')
+            self.assertEqual(journal.read(), [{'score': 10}, {'score': 20}])
+            journal.append([{'score': 30}])
+            self.assertEqual([r['score'] for r in journal.read()], [10, 20, 30])
+            journal.clear()
+            self.assertFalse(journal.pending())
+
+
+class TestStorage(unittest.TestCase):
+    """Тесты хранилищ результатов из database/storage.py"""
+
+    def test_incomplete_storage_cannot_be_created(self):
+        class NoReplays(Storage):
+            def save_game_session(self, *args, **kwargs):
+                return 1
+
+            def _load_leaderboard(self, limit):
+                return [], {}
+
+        with self.assertRaises(TypeError):
+            NoReplays()
+
+    def check_storage(self, storage):
+        for name, score in (("A", 30), ("B", 50), ("C", 10)):
+            self.assertIsNotNone(storage.save_game_session(name, score, 60, {'speed': 10}, 3, 6, False))
+        sessions = [dict(player_name="D", score=40, game_duration=5, settings={}, food_eaten=4,
+                         max_length=7, walls_passed=True)]
+        self.assertEqual(storage.save_game_sessions(sessions), 1)
+
+        scores = storage.get_high_scores(3)
+        self.assertEqual([(player, score) for player, score, _, _ in scores], [("B", 50), ("D", 40), ("A", 30)])
+        self.assertIsInstance(scores[0][3], datetime)
+
+        replay = Replay(1, 400, 300, 20, events=[(3, UP)], ticks=9).to_bytes()
+        session_id = storage.save_game_session("E", 0, 1, {}, 0, 3, False, replay=replay)
+        self.assertEqual(storage.get_replay(session_id), replay)
+        self.assertIsNone(storage.get_replay(1))
+
+    def test_memory_storage(self):
+        self.check_storage(create_storage({'storage': 'memory'}))
+
+    def test_sqlite_storage_uses_wal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            storage = create_storage({'storage': 'sqlite', 'db_path': os.path.join(directory, 'scores.db')})
+            try:
+                self.assertIsInstance(storage, SQLiteStorage)
+                self.assertEqual(storage.connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+                self.check_storage(storage)
+                stats = storage.connection.execute('SELECT COUNT(*) FROM game_stats').fetchone()[0]
+                self.assertEqual(stats, 5)
+            finally:
+                storage.close()
+
+    def test_leaderboard_loaded_once_and_updated_on_save(self):
+        storage = MemoryStorage()
+        storage.save_game_session("A", 30, 60, {}, 3, 6, False)
+        with patch.object(storage, '_load_leaderboard', wraps=storage._load_leaderboard) as load:
+            first = storage.get_high_scores(10)
+            self.assertIs(storage.get_high_scores(10), first)
+            self.assertEqual(len(storage.get_high_scores(5)), 1)
+
+            storage.save_game_session("B", 50, 60, {}, 5, 8, False)
+            storage.save_game_session("A", 20, 60, {}, 2, 5, False)
+            self.assertEqual([row[1] for row in storage.get_high_scores(10)], [50, 30, 20])
+            self.assertEqual((storage.get_player_best("A"), storage.get_player_rank("A")), (30, 2))
+            self.assertEqual(storage.get_player_rank("B"), 1)
+            self.assertIsNone(storage.get_player_rank("C"))
+            self.assertEqual(load.call_count, 1)
+
+            storage.high_scores_ttl = 0
+            storage.get_high_scores(10)
+            self.assertEqual(load.call_count, 2)
+
+    def test_leaderboard_keeps_top_k(self):
+        board = Leaderboard(capacity=3)
+        board.seed([("A", 40, 1, None), ("B", 30, 1, None)], {"A": 40, "B": 30})
+        for name, score in (("C", 10), ("D", 30), ("E", 50), ("A", 60)):
+            board.add(name, score, 1, None)
+        self.assertEqual([(row[0], row[1]) for row in board.top(10)], [("A", 60), ("E", 50), ("A", 40)])
+        self.assertEqual([board.rank(name) for name in "ABCDE"], [1, 3, 5, 3, 2])
+        self.assertEqual(board.best("C"), 10)
+
+    def check_pages(self, storage):
+        sessions = [dict(player_name=f"P{i}", score=score, game_duration=1, settings={},
+                         food_eaten=0, max_length=3, walls_passed=False)
+                    for i, score in enumerate((30, 50, 30, 10, 50, 30, 20))]
+        storage.save_game_sessions(sessions)
+
+        pages = [storage.get_high_scores_page(limit=3)]
+        while pages[-1]:
+            last = pages[-1][-1]
+            pages.append(storage.get_high_scores_page(last[2], last[0], 3))
+        rows = [row for page in pages for row in page]
+        self.assertEqual([len(page) for page in pages], [3, 3, 1, 0])
+        self.assertEqual([(row[1], row[2]) for row in rows],
+                         [("P1", 50), ("P4", 50), ("P0", 30), ("P2", 30), ("P5", 30), ("P6", 20), ("P3", 10)])
+
+    def test_memory_keyset_pages(self):
+        self.check_pages(MemoryStorage())
+
+    def test_sqlite_keyset_pages_and_migrations(self):
+        storage = SQLiteStorage(':memory:')
+        try:
+            self.assertEqual(storage.connection.execute('PRAGMA user_version').fetchone()[0],
+                             len(SQLiteStorage.MIGRATIONS))
+            self.assertEqual(storage.migrate(), [])
+            plan = storage.connection.execute('EXPLAIN QUERY PLAN ' + storage.SELECT_PAGE,
+                                              {'score': 30, 'id': 1, 'limit': 3}).fetchall()
+            self.assertIn('game_sessions_score_idx', plan[0][3])
+            self.check_pages(storage)
+        finally:
+            storage.close()
+
+    def test_sqlite_migration_commits_with_version(self):
+        class CrashBeforeVersion:
+            """Подключение, падающее перед записью номера версии."""
+            def __init__(self, connection):
+                self.connection = connection
+
+            def execute(self, sql, *args):
+                if sql.startswith('PRAGMA user_version ='):
+                    raise sqlite3.OperationalError('crash')
+                return self.connection.execute(sql, *args)
+
+            def __enter__(self):
+                return self.connection.__enter__()
+
+            def __exit__(self, *exc):
+                return self.connection.__exit__(*exc)
+
+        storage = SQLiteStorage(':memory:')
+        try:
+            connection = storage.connection
+            # Схема до миграции 5
+            connection.execute('DROP INDEX game_replays_unverified_idx')
+            connection.execute('ALTER TABLE game_replays DROP COLUMN verified')
+            connection.execute('PRAGMA user_version = 4')
+
+            storage.connection = CrashBeforeVersion(connection)
+            with self.assertRaises(sqlite3.OperationalError):
+                storage.migrate()
+            storage.connection = connection
+            columns = [row[1] for row in connection.execute('PRAGMA table_info(game_replays)')]
+            self.assertNotIn('verified', columns)
+            self.assertEqual(storage.migrate(), [5, 6])
+        finally:
+            storage.close()
+
+    def test_unknown_storage(self):
+        with self.assertRaises(ValueError):
+            create_storage({'storage': 'csv'})
+
+
+class TestTournament(unittest.TestCase):
+    """Тесты турнирного прогона из tournament.py"""
+
+    def test_running_stats_merge(self):
+        first, second, total = RunningStats(), RunningStats(), RunningStats()
+        for value in (1, 2, 3):
+            first.add(value)
+            total.add(value)
+        for value in (10, 20):
+            second.add(value)
+            total.add(value)
+
+        first.merge(second)
+        self.assertEqual(first.count, 5)
+        self.assertAlmostEqual(first.mean, total.mean)
+        self.assertAlmostEqual(first.std(), total.std())
+        self.assertEqual((first.minimum, first.maximum), (1, 20))
+
+    def test_play_chunk_is_deterministic(self):
+        config = dict(width=200, height=200, grid_size=20, wall_pass=False, max_ticks=500)
+        stats, results = play_chunk('0:0', 5, 'greedy', config)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(stats['score'].count, 5)
+        self.assertEqual(play_chunk('0:0', 5, 'greedy', config)[1], results)
+
+    def test_unsaved_results_fail_the_run(self):
+        args = argparse.Namespace(player_name=None, agent='greedy', speed=10, wall_pass=False, seed=0,
+                                  storage='memory', db_path=None)
+        results = [(10, 4, 1, 30), (20, 5, 2, 40)]
+        storage = MemoryStorage()
+        with patch('tournament.create_storage', return_value=storage):
+            self.assertEqual(save_results(results, args), 0)
+        self.assertEqual(storage.get_player_best('bot-greedy'), 20)
+
+        # БД недоступна: сохранено 0 результатов
+        storage = Mock()
+        storage.save_game_sessions.return_value = 0
+        with patch('tournament.create_storage', return_value=storage):
+            self.assertEqual(save_results(results, args), 1)
+        storage.close.assert_called()
+
+
+class TestVerifyReplays(unittest.TestCase):
+    """Тесты проверки записей игр из verify_replays.py"""
+
+    def test_verify_replay_rejects_forged_results(self):
+        engine, replay = record_game()
+        data = replay.to_bytes()
+        claimed = (engine.snake.score, engine.food_eaten, engine.max_length, BOARD_SETTINGS)
+        self.assertTrue(verify_replay(data, *claimed))
+        self.assertFalse(verify_replay(data, claimed[0] + 10, *claimed[1:]))
+        self.assertFalse(verify_replay(data[:-1] + b'\x80', *claimed))
+
+        replay.ticks -= 1
+        self.assertFalse(verify_replay(replay.to_bytes(), *claimed))
+        self.assertFalse(verify_replay(data, *claimed, max_ticks=engine.ticks - 1))
+
+    def test_verify_replay_rejects_other_board(self):
+        engine, replay = record_game()
+        claimed = (engine.snake.score, engine.food_eaten, engine.max_length)
+        data = replay.to_bytes()
+        # Запись на маленьком поле или со сквозными стенами для рекорда с другими настройками
+        for changes in ({'width': 800}, {'height': 600}, {'grid_size': 10}, {'wall_pass': False}):
+            self.assertFalse(verify_replay(data, *claimed, dict(BOARD_SETTINGS, **changes)))
+        self.assertFalse(verify_replay(data, *claimed, {'speed': 10, 'wall_pass': True}))
+        self.assertFalse(verify_replay(data, *claimed, None))
+
+    def test_verify_pending_marks_sessions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            storages = (MemoryStorage(), SQLiteStorage(os.path.join(directory, 'scores.db')))
+            for storage in storages:
+                for seed in range(5):
+                    engine, replay = record_game(seed)
+                    # Каждая вторая игра заявляет чужой счет
+                    score = engine.snake.score + 10 * (seed % 2)
+                    storage.save_game_session("P", score, 1, BOARD_SETTINGS, engine.food_eaten,
+                                              engine.max_length, True, replay=replay.to_bytes())
+                # Честная игра, заявленная для большого поля
+                engine, replay = record_game(5)
+                storage.save_game_session("P", engine.snake.score, 1, dict(BOARD_SETTINGS, width=800),
+                                          engine.food_eaten, engine.max_length, True, replay=replay.to_bytes())
+                storage.save_game_session("P", 999, 1, {}, 0, 3, False)
+
+                with ThreadPoolExecutor(2) as executor:
+                    self.assertEqual(verify_pending(storage, executor, batch_size=2, max_in_flight=1), (6, 3))
+                self.assertEqual(storage.get_unverified_replays(), [])
+                with ThreadPoolExecutor(2) as executor:
+                    self.assertEqual(verify_pending(storage, executor), (0, 0))
+            storages[1].close()
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Тесты замеров производительности из benchmarks.py"""
+
+    def test_selected_benchmarks_run(self):
+        results = run_benchmarks(repeat=1, selected='[memory]', scale=0.05)
+        self.assertEqual(sorted(results), ['storage.get_high_scores.cold[memory]',
+                                           'storage.get_high_scores[memory]',
+                                           'storage.save_game_session[memory]'])
+        for result in results.values():
+            self.assertGreater(result['min_ns'], 0)
+            self.assertLessEqual(result['min_ns'], result['median_ns'])
+
+        results = run_benchmarks(repeat=1, selected='draw[800x600,grid=40,incremental]', scale=0.1)
+        self.assertEqual(list(results), ['game_logic.draw[800x600,grid=40,incremental]'])
+
+    def test_missing_baseline_fails(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            args = ['benchmarks.py', '--filter', 'snake.move[length=3]', '--repeat', '1', '--scale', '0.01',
+                    '--output', os.path.join(directory, 'results.json'), '--baseline', baseline,
+                    '--tolerance', '1000']
+            with patch('sys.argv', args):
+                self.assertEqual(benchmarks.main(), 1)
+            with patch('sys.argv', args + ['--save-baseline']):
+                self.assertEqual(benchmarks.main(), 0)
+            with patch('sys.argv', args):
+                self.assertEqual(benchmarks.main(), 0)
+
+    def test_compare_reports_slowdowns_over_tolerance(self):
+        baseline = {'a': {'min_ns': 100}, 'b': {'min_ns': 100}, 'gone': {'min_ns': 100}}
+        results = {'a': {'min_ns': 120}, 'b': {'min_ns': 130}, 'new': {'min_ns': 1000}}
+        self.assertEqual(compare(results, baseline, tolerance=0.25), [('b', 100, 130)])
+        self.assertEqual(compare(results, baseline, tolerance=0.5), [])
+
 
 class TestSnakeCollisions(unittest.TestCase):
     """Тесты столкновений змейки"""
@@ -0,0 +1,266 @@
+"""
+Турнирный прогон агентов без отрисовки.
+
+Запускает много полных игр на GameEngine, распределяя их блоками по
+процессам ProcessPoolExecutor. Каждый блок играет свои игры со своим seed
+и возвращает итоговую статистику и компактные результаты одним сообщением.
+Статистика объединяется по мере завершения блоков. С --save результаты в
+конце сохраняются в БД одним пакетом; если сохранить их не удалось,
+скрипт завершается с кодом 1.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(__file__))
+
+from game.engine import GameEngine
+from game.agents import AGENTS
+from database.storage import DEFAULT_STORAGE, DEFAULT_DB_PATH, create_storage
+
+
+class RunningStats:
+    """
+    Потоковая статистика (алгоритм Уэлфорда) с объединением частичных результатов.
+
+    Attributes:
+        count (int): Количество значений
+        mean (float): Среднее
+        m2 (float): Сумма квадратов отклонений от среднего
+        minimum: Минимальное значение
+        maximum: Максимальное значение
+    """
+
+    def __init__(self):
+        """Инициализирует пустую статистику."""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value):
+        """
+        Добавляет значение.
+
+        Args:
+            value: Число
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other):
+        """
+        Добавляет статистику другого блока.
+
+        Args:
+            other (RunningStats): Статистика для объединения
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def std(self):
+        """
+        Возвращает стандартное отклонение.
+
+        Returns:
+            float: Стандартное отклонение выборки
+        """
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.count - 1))
+
+
+def play_chunk(chunk_seed, games, agent_name, config):
+    """
+    Играет блок игр в рабочем процессе.
+
+    Args:
+        chunk_seed: Seed блока, из которого выводятся seed игр
+        games (int): Количество игр в блоке
+        agent_name (str): Имя агента из AGENTS
+        config (dict): Параметры поля: width, height, grid_size, wall_pass, max_ticks
+
+    Returns:
+        tuple: (stats, results) где stats - словарь RunningStats по ключам
+            score, length, ticks, а results - список кортежей
+            (score, max_length, food_eaten, ticks) для каждой игры
+    """
+    rng = random.Random(chunk_seed)
+    agent = AGENTS[agent_name](rng=random.Random(rng.getrandbits(64)))
+    engine = GameEngine(config['width'], config['height'], config['grid_size'], config['wall_pass'])
+    max_ticks = config['max_ticks']
+
+    stats = {'score': RunningStats(), 'length': RunningStats(), 'ticks': RunningStats()}
+    results = []
+    for _ in range(games):
+        engine.reset(rng.getrandbits(64))
+        done = False
+        while not done and engine.ticks < max_ticks:
+            done, _, _ = engine.step(agent.act(engine))
+
+        score = engine.snake.score
+        stats['score'].add(score)
+        stats['length'].add(engine.max_length)
+        stats['ticks'].add(engine.ticks)
+        results.append((score, engine.max_length, engine.food_eaten, engine.ticks))
+    return stats, results
+
+
+def parse_args():
+    """
+    Разбирает аргументы командной строки турнира.
+
+    Returns:
+        argparse.Namespace: Аргументы
+    """
+    parser = argparse.ArgumentParser(description='Snake Game headless tournament')
+    parser.add_argument('--agent', type=str, default='greedy', choices=sorted(AGENTS),
+                        help='Agent to evaluate')
+    parser.add_argument('--games', type=int, default=1000,
+                        help='Number of games to play')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Worker processes, default: all cores')
+    parser.add_argument('--chunk-size', type=int, default=250,
+                        help='Games per work unit sent to a worker')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Base seed of the tournament')
+    parser.add_argument('--max-ticks', type=int, default=100000,
+                        help='Tick limit per game')
+    parser.add_argument('--speed', type=int, default=10,
+                        help='Ticks per second used to convert game length to seconds')
+    parser.add_argument('--wall-pass', action='store_true',
+                        help='Allow passing through walls')
+    parser.add_argument('--grid-size', type=int, default=20,
+                        help='Grid cell size in pixels')
+    parser.add_argument('--width', type=int, default=800,
+                        help='Board width')
+    parser.add_argument('--height', type=int, default=600,
+                        help='Board height')
+    parser.add_argument('--player-name', type=str, default=None,
+                        help='Name for saved results, default: bot-<agent>')
+    parser.add_argument('--save', action='store_true',
+                        help='Write results to the database; bot games then appear in the high scores')
+    parser.add_argument('--storage', type=str, default=DEFAULT_STORAGE,
+                        choices=['postgres', 'sqlite', 'memory'],
+                        help='Where results are stored')
+    parser.add_argument('--db-path', type=str, default=DEFAULT_DB_PATH,
+                        help='SQLite database file for --storage sqlite')
+    return parser.parse_args()
+
+
+def save_results(results, args):
+    """
+    Сохраняет результаты турнира в хранилище одним пакетом.
+
+    Args:
+        results (list): Кортежи (score, max_length, food_eaten, ticks)
+        args (argparse.Namespace): Аргументы командной строки
+
+    Returns:
+        int: Код завершения: 0 если сохранены все результаты, иначе 1
+    """
+    player_name = args.player_name or f'bot-{args.agent}'
+    settings_data = {
+        'speed': args.speed,
+        'wall_pass': args.wall_pass,
+        'agent': args.agent,
+        'seed': args.seed,
+    }
+    db_handler = create_storage({'storage': args.storage, 'db_path': args.db_path})
+    try:
+        saved = db_handler.save_game_sessions(
+            {
+                'player_name': player_name,
+                'score': score,
+                'game_duration': ticks // args.speed,
+                'settings': settings_data,
+                'food_eaten': food_eaten,
+                'max_length': max_length,
+                'walls_passed': args.wall_pass,
+            }
+            for score, max_length, food_eaten, ticks in results
+        )
+    finally:
+        db_handler.close()
+
+    if saved != len(results):
+        print(f"❌ Сохранено {saved} из {len(results)} результатов. Проверьте подключение к БД, "
+              f"используйте --storage sqlite или запустите турнир без --save")
+        return 1
+    return 0
+
+
+def main():
+    """
+    Запускает турнир, печатает статистику и сохраняет результаты.
+
+    Returns:
+        int: Код завершения
+    """
+    args = parse_args()
+    config = {
+        'width': args.width,
+        'height': args.height,
+        'grid_size': args.grid_size,
+        'wall_pass': args.wall_pass,
+        'max_ticks': args.max_ticks,
+    }
+
+    # Seed блока зависит только от seed турнира и номера блока,
+    # поэтому результат не зависит от количества процессов
+    chunks = []
+    for index, first in enumerate(range(0, args.games, args.chunk_size)):
+        chunks.append((f'{args.seed}:{index}', min(args.chunk_size, args.games - first)))
+
+    totals = {'score': RunningStats(), 'length': RunningStats(), 'ticks': RunningStats()}
+    results = []
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(play_chunk, seed, games, args.agent, config) for seed, games in chunks]
+        for future in as_completed(futures):
+            stats, chunk_results = future.result()
+            for key, value in stats.items():
+                totals[key].merge(value)
+            results.extend(chunk_results)
+            print(f"🎮 Сыграно {totals['score'].count}/{args.games}, "
+                  f"средний счет: {totals['score'].mean:.1f}")
+
+    elapsed = time.perf_counter() - started
+    print(f"🏁 Агент {args.agent}: {len(results)} игр за {elapsed:.1f}s")
+    for key, label in (('score', 'Score'), ('length', 'Max length'), ('ticks', 'Ticks')):
+        stats = totals[key]
+        print(f"   {label}: mean {stats.mean:.1f} ± {stats.std():.1f}, "
+              f"min {stats.minimum}, max {stats.maximum}")
+
+    if not args.save or not results:
+        return 0
+    return save_results(results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Проверка записей игр повторной игрой без отрисовки.
+
+Счет в game_sessions присылает клиент, поэтому ему нельзя доверять. Этот
+прогон читает непроверенные записи игр пачками, проигрывает их на
+GameEngine в процессах ProcessPoolExecutor и сравнивает счет, количество
+съеденной еды и максимальную длину с заявленными, а поле записи - с
+настройками сессии. Результат каждой проверки сохраняется в
+game_replays.verified.
+
+Новые пачки читаются из БД, только пока в работе меньше max_in_flight
+пачек, поэтому при всплеске отправленных игр очередь в памяти не растет,
+а БД и процессы загружаются равномерно.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+sys.path.append(os.path.dirname(__file__))
+
+from game.replay import Replay, ReplayPlayer
+from database.storage import DEFAULT_STORAGE, DEFAULT_DB_PATH, create_storage
+
+# Ограничения, защищающие процессы от заведомо поддельных записей
+MAX_TICKS = 1000000
+MAX_BOARD_CELLS = 1000000
+
+
+def matches_settings(replay, settings):
+    """
+    Сравнивает поле записи игры с настройками сохраненной сессии.
+
+    Args:
+        replay (Replay): Запись игры
+        settings (dict or None): Настройки сессии (game_sessions.settings)
+
+    Returns:
+        bool: True если размеры поля, клетка и прохождение сквозь стены
+            совпадают; сессии без размеров поля проверить нельзя
+    """
+    if not settings:
+        return False
+    return (settings.get('width') == replay.width and settings.get('height') == replay.height and
+            settings.get('grid_size') == replay.grid_size and
+            bool(settings.get('wall_pass')) == replay.wall_pass)
+
+
+def verify_replay(data, score, food_eaten, max_length, settings, max_ticks=MAX_TICKS):
+    """
+    Проигрывает запись игры и сравнивает результат с заявленным.
+
+    Args:
+        data (bytes): Запись игры (Replay.to_bytes())
+        score (int): Заявленный счет
+        food_eaten (int): Заявленное количество съеденной еды
+        max_length (int): Заявленная максимальная длина змейки
+        settings (dict or None): Настройки сессии, с которыми сверяется поле записи
+        max_ticks (int): Записи длиннее считаются поддельными
+
+    Returns:
+        bool: True если запись сыграна на поле из настроек и закончилась на
+            записанном шаге с заявленными результатами
+    """
+    try:
+        replay = Replay.from_bytes(data)
+        # Запись с маленького поля или со сквозными стенами не подтверждает
+        # рекорд, заявленный для других настроек
+        if not matches_settings(replay, settings):
+            return False
+        if (replay.ticks > max_ticks or replay.grid_size == 0 or
+                (replay.width // replay.grid_size) * (replay.height // replay.grid_size) > MAX_BOARD_CELLS):
+            return False
+        engine = ReplayPlayer(replay, snapshot_interval=None).run()
+    except Exception:
+        return False
+    return (engine.done and engine.ticks == replay.ticks and engine.snake.score == score and
+            engine.food_eaten == food_eaten and engine.max_length == max_length)
+
+
+def verify_chunk(submissions, max_ticks=MAX_TICKS):
+    """
+    Проверяет пачку записей игр в рабочем процессе.
+
+    Args:
+        submissions (list): Кортежи (session_id, score, food_eaten, max_length, settings, replay)
+        max_ticks (int): Записи длиннее считаются поддельными
+
+    Returns:
+        list: Пары (session_id, verified)
+    """
+    return [(session_id, verify_replay(data, score, food_eaten, max_length, settings, max_ticks))
+            for session_id, score, food_eaten, max_length, settings, data in submissions]
+
+
+def verify_pending(storage, executor, batch_size=200, max_in_flight=8, max_ticks=MAX_TICKS):
+    """
+    Проверяет все непроверенные записи игр хранилища.
+
+    Args:
+        storage (Storage): Хранилище результатов
+        executor (concurrent.futures.Executor): Пул, выполняющий verify_chunk
+        batch_size (int): Записей в одной пачке
+        max_in_flight (int): Максимум пачек, отправленных в пул и еще не проверенных
+        max_ticks (int): Записи длиннее считаются поддельными
+
+    Returns:
+        tuple: (checked, rejected) - количество проверенных и отклоненных записей
+    """
+    checked = 0
+    rejected = 0
+    after_id = 0
+    pending = set()
+    exhausted = False
+    while True:
+        while not exhausted and len(pending) < max_in_flight:
+            batch = storage.get_unverified_replays(after_id, batch_size)
+            if not batch:
+                exhausted = True
+                break
+            after_id = batch[-1][0]
+            pending.add(executor.submit(verify_chunk, batch, max_ticks))
+        if not pending:
+            return checked, rejected
+
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            results = future.result()
+            storage.mark_replays_verified(results)
+            checked += len(results)
+            rejected += sum(not verified for _, verified in results)
+        print(f"🔍 Проверено записей: {checked}, отклонено: {rejected}")
+
+
+def parse_args():
+    """
+    Разбирает аргументы командной строки проверки.
+
+    Returns:
+        argparse.Namespace: Аргументы
+    """
+    parser = argparse.ArgumentParser(description='Snake Game replay verification')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Worker processes, default: all cores')
+    parser.add_argument('--batch-size', type=int, default=200,
+                        help='Replays per work unit sent to a worker')
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help='Work units queued at once, default: twice the workers')
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS,
+                        help='Replays longer than this are rejected')
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep polling for new submissions')
+    parser.add_argument('--poll-interval', type=float, default=5.0,
+                        help='Seconds between polls with --follow')
+    parser.add_argument('--storage', type=str, default=DEFAULT_STORAGE,
+                        choices=['postgres', 'sqlite'],
+                        help='Where results are stored')
+    parser.add_argument('--db-path', type=str, default=DEFAULT_DB_PATH,
+                        help='SQLite database file for --storage sqlite')
+    return parser.parse_args()
+
+
+def main():
+    """
+    Запускает проверку и печатает итог.
+    """
+    args = parse_args()
+    workers = args.workers or 1
+    max_in_flight = args.max_in_flight or 2 * workers
+
+    storage = create_storage({'storage': args.storage, 'db_path': args.db_path})
+    checked = 0
+    rejected = 0
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                batch_checked, batch_rejected = verify_pending(
+                    storage, executor, args.batch_size, max_in_flight, args.max_ticks)
+                checked += batch_checked
+                rejected += batch_rejected
+                if not args.follow:
+                    break
+                time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        storage.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"🏁 Проверено {checked} записей за {elapsed:.1f}s, отклонено: {rejected}")
+
+
+if __name__ == "__main__":
+    main()